@@ -0,0 +1,93 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+MAX_BULK_ITEMS = 1000
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class BulkUpdateItem(BaseModel, Generic[T]):
+    id: int = Field(..., gt=0, description="Id of the record to update")
+    data: T
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status_code: int
+    id: Optional[int] = None
+    detail: Optional[Any] = None
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(item_type: Any) -> TypeAdapter:
+    return TypeAdapter(List[item_type])
+
+
+def validate_batch(
+    item_type: Any, items: List[Any]
+) -> Tuple[List[Tuple[int, Any]], List[BulkItemResult]]:
+    """Validate a whole batch with one ``TypeAdapter(List[item_type])`` pass.
+
+    Returns ``(index, model)`` pairs for valid items and a 422 result per
+    invalid one. When something fails, the valid rest is validated once more
+    because the first pass does not hand back partial results.
+    """
+    adapter = _list_adapter(item_type)
+    try:
+        return list(enumerate(adapter.validate_python(items))), []
+    except ValidationError as exc:
+        errors: Dict[int, List[Dict]] = {}
+        for error in exc.errors(include_url=False):
+            index, *loc = error["loc"]
+            errors.setdefault(index, []).append(
+                {"type": error["type"], "loc": loc, "msg": error["msg"]}
+            )
+
+    valid = [index for index in range(len(items)) if index not in errors]
+    models = adapter.validate_python([items[index] for index in valid])
+    failed = [
+        BulkItemResult(index=index, status_code=422, detail=details)
+        for index, details in errors.items()
+    ]
+    return list(zip(valid, models)), failed
+
+
+async def process_batch(
+    item_type: Any,
+    items: List[Any],
+    apply: Callable[[Any], Awaitable[Dict]],
+    success_code: int,
+    prepare: Optional[Callable[[Any], Awaitable[Any]]] = None,
+) -> List[BulkItemResult]:
+    """Validate ``items`` and ``apply`` each valid one, collecting per-item results.
+
+    ``apply`` is the same helper the single-item route uses; an
+    ``HTTPException`` it raises fails only that item. ``prepare`` (if
+    given) turns every valid item into what ``apply`` receives; it runs for
+    all items concurrently, so slow work such as password hashing keeps
+    every worker of a pool busy while the writes still go in order.
+    """
+    validated, results = validate_batch(item_type, items)
+    if prepare is not None:
+        prepared = await asyncio.gather(*(prepare(item) for _, item in validated))
+        validated = [(index, value) for (index, _), value in zip(validated, prepared)]
+    for index, item in validated:
+        try:
+            record = await apply(item)
+        except HTTPException as exc:
+            results.append(
+                BulkItemResult(
+                    index=index, status_code=exc.status_code, detail=exc.detail
+                )
+            )
+        else:
+            results.append(
+                BulkItemResult(index=index, status_code=success_code, id=record["id"])
+            )
+    results.sort(key=lambda result: result.index)
+    return results
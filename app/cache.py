@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+
+class CachedResponse(NamedTuple):
+    version: str
+    body: bytes
+    headers: Dict[str, str]
+    tags: Tuple[Hashable, ...]
+
+
+class ResponseCache:
+    """LRU cache of encoded response bodies within a memory budget.
+
+    Every entry is stamped with the storage version it was built from, and
+    a lookup with another version misses: writes made by other workers or
+    straight through the engine can never be served stale. Handlers also
+    ``invalidate`` the tags a write touches, so entries that can no longer
+    hit stop occupying the budget right away.
+
+    ``max_bytes`` bounds the encoded bodies plus ``entry_overhead`` per
+    entry; least recently used entries are evicted beyond it, and ``0``
+    disables caching. Used from the event loop only, so it takes no locks.
+    """
+
+    entry_overhead = 256
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._tagged: Dict[Hashable, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, version: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.version != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(
+        self,
+        key: Hashable,
+        version: str,
+        body: bytes,
+        headers: Optional[Dict[str, str]] = None,
+        tags: Iterable[Hashable] = (),
+    ) -> CachedResponse:
+        """Store a response; returns the entry even if it is over budget."""
+        entry = CachedResponse(version, body, headers or {}, tuple(tags))
+        cost = self._cost(body)
+        if cost > self.max_bytes:
+            return entry
+        self._discard(key)
+        self._entries[key] = entry
+        self.size += cost
+        for tag in entry.tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while self.size > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+        return entry
+
+    def invalidate(self, *tags: Hashable) -> None:
+        """Drop every entry carrying one of ``tags``."""
+        for tag in tags:
+            for key in self._tagged.pop(tag, ()):
+                if self._discard(key):
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tagged.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _cost(self, body: bytes) -> int:
+        return len(body) + self.entry_overhead
+
+    def _discard(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= self._cost(entry.body)
+        for tag in entry.tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+        return True
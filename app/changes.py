@@ -0,0 +1,163 @@
+import time
+from collections.abc import Callable, Iterator
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.storage import StoredChange
+from app.storage.aio import AsyncChangeStore
+
+# Changes read from a ``ChangeStore`` per query.
+READ_BATCH_SIZE = 500
+
+# ``read`` result: the changes, the cursor to continue from, and whether the
+# caller must resync instead.
+Feed = Tuple[List["Change"], int, bool]
+
+
+class Change(NamedTuple):
+    """One write: ``data`` is the record encoded at write time (``None`` on delete).
+
+    ``scope`` is the owner for checkouts, ``None`` for other collections.
+    """
+
+    seq: int
+    collection: str
+    op: str
+    id: int
+    scope: Optional[int]
+    data: Optional[bytes]
+
+    def encode(self) -> bytes:
+        return b'{"seq":%d,"collection":"%b","op":"%b","id":%d,"data":%b}' % (
+            self.seq,
+            self.collection.encode(),
+            self.op.encode(),
+            self.id,
+            b"null" if self.data is None else self.data,
+        )
+
+
+class ChangeLog:
+    """Sequenced log of the last ``retention`` writes, in a ring buffer.
+
+    Sequence numbers are consecutive, so the slot of a change is its
+    ``seq`` modulo the buffer size and reading from a cursor costs only
+    the changes returned. They start at the current time in microseconds:
+    numbers keep growing across restarts, and a cursor from an earlier run
+    is older than anything retained, which asks the client to resync
+    instead of silently skipping the writes it missed.
+
+    Appends and reads happen on the event loop, so no locking is needed.
+    The log belongs to the process: other workers have logs of their own.
+    """
+
+    shared = False
+
+    def __init__(self, retention: int) -> None:
+        self.retention = retention
+        self._buffer: List[Optional[Change]] = [None] * retention
+        self._first = time.time_ns() // 1000
+        self.latest = self._first - 1
+
+    def append(
+        self,
+        collection: str,
+        op: str,
+        record_id: int,
+        scope: Optional[int] = None,
+        data: Optional[bytes] = None,
+    ) -> Change:
+        self.latest += 1
+        change = Change(self.latest, collection, op, record_id, scope, data)
+        self._buffer[self.latest % self.retention] = change
+        return change
+
+    @property
+    def oldest(self) -> int:
+        """Sequence number of the oldest change still retained."""
+        return max(self._first, self.latest - self.retention + 1)
+
+    def covers(self, since: int) -> bool:
+        """Whether every change after ``since`` is still retained."""
+        return self.oldest - 1 <= since <= self.latest
+
+    def after(self, since: int) -> Iterator[Change]:
+        """Retained changes with ``seq > since``, oldest first."""
+        for seq in range(max(since + 1, self.oldest), self.latest + 1):
+            yield self._buffer[seq % self.retention]
+
+    async def read(
+        self, since: int, limit: Optional[int], accepts: Callable[[Change], bool]
+    ) -> Feed:
+        """Up to ``limit`` changes after ``since`` that ``accepts`` lets through.
+
+        The cursor returned is the last change looked at, accepted or not.
+        """
+        if not self.covers(since):
+            return [], self.latest, True
+        changes: List[Change] = []
+        next_seq = since
+        for change in self.after(since):
+            next_seq = change.seq
+            if accepts(change):
+                changes.append(change)
+                if limit is not None and len(changes) >= limit:
+                    break
+        return changes, next_seq, False
+
+
+class StoredChangeLog:
+    """Change feed read from the log the storage engine keeps (``ChangeStore``).
+
+    Every process sharing the engine sees every write in one sequence, so
+    a cursor from one worker is valid on the others. Nothing is appended
+    here; ``make_change`` turns a stored record into a ``Change``.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        store: AsyncChangeStore,
+        make_change: Callable[[StoredChange], Change],
+        batch_size: int = READ_BATCH_SIZE,
+    ) -> None:
+        self.store = store
+        self.make_change = make_change
+        self.batch_size = batch_size
+
+    async def latest(self) -> int:
+        return (await self.store.bounds())[1]
+
+    async def after(self, since: int) -> List[Change]:
+        """The next batch of changes with ``seq > since``, oldest first."""
+        batch = await self.store.after(since, self.batch_size)
+        return [self.make_change(stored) for stored in batch]
+
+    async def read(
+        self, since: int, limit: Optional[int], accepts: Callable[[Change], bool]
+    ) -> Feed:
+        """Same contract as ``ChangeLog.read``."""
+        oldest, latest = await self.store.bounds()
+        if not oldest - 1 <= since <= latest:
+            return [], latest, True
+        changes: List[Change] = []
+        next_seq = since
+        while limit is None or len(changes) < limit:
+            batch = await self.after(next_seq)
+            for change in batch:
+                next_seq = change.seq
+                if accepts(change):
+                    changes.append(change)
+                    if limit is not None and len(changes) >= limit:
+                        break
+            if len(batch) < self.batch_size:
+                break
+        return changes, next_seq, False
+
+
+def encode_feed(changes: List[Change], next_seq: int, resync: bool) -> bytes:
+    return b'{"next":%d,"resync":%b,"changes":[%b]}' % (
+        next_seq,
+        b"true" if resync else b"false",
+        b",".join(change.encode() for change in changes),
+    )
@@ -0,0 +1,36 @@
+from typing import Any, Optional
+
+from fastapi import Response
+from starlette import status
+
+ETAG_HEADER = "ETag"
+
+
+def make_etag(collection: str, version: str, scope: Any = None) -> str:
+    """Strong ETag for a read of ``collection`` at storage ``version``.
+
+    A response is fully determined by its URL, the visibility scope of the
+    caller and the collection version, so the tag needs no body hash and
+    can be checked before anything is read or serialized.
+    """
+    if scope is None:
+        return f'"{collection}-{version}"'
+    return f'"{collection}-{scope}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether ``If-None-Match`` lists ``etag`` (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers={ETAG_HEADER: etag}
+    )
@@ -0,0 +1,69 @@
+import os
+from typing import Literal, Mapping
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class Settings(BaseModel):
+    """Runtime configuration read from environment variables (see ``.env.example``)."""
+
+    app_env: str = "dev"
+    storage_backend: Literal["memory", "journal", "sqlite"] = "memory"
+    sqlite_path: str = "data/equipment.db"
+    sqlite_pool_size: int = Field(8, ge=1)
+    journal_dir: str = "data/journal"
+    journal_commit_interval: float = Field(0.005, gt=0)
+    journal_snapshot_every: int = Field(100_000, ge=1)
+    # Seconds between overdue sweeps; 0 turns the sweeper off.
+    overdue_sweep_interval: float = Field(30.0, ge=0)
+    # Budget of the encoded-response cache for asset reads; 0 disables it.
+    response_cache_bytes: int = Field(16 * 1024 * 1024, ge=0)
+    # Writes kept for ``GET /changes``; older cursors must resync.
+    change_log_size: int = Field(10_000, ge=1)
+    # Seconds between reads of the shared SQLite change log for /events.
+    change_poll_interval: float = Field(0.2, gt=0)
+    # Events a slow /events subscriber may fall behind before it is dropped.
+    event_queue_size: int = Field(100, ge=1)
+    event_keepalive: float = Field(15.0, gt=0)
+    # scrypt cost for new password hashes; older hashes upgrade on login.
+    password_scrypt_n: int = Field(2**15, ge=2)
+    password_scrypt_r: int = Field(8, ge=1)
+    password_scrypt_p: int = Field(1, ge=1)
+    password_hash_workers: int = Field(
+        default_factory=lambda: os.cpu_count() or 1, ge=1
+    )
+    # HMAC key of bearer tokens; empty means a random key per process, so
+    # tokens do not survive a restart and are not shared between workers.
+    token_secret: str = ""
+    token_ttl: int = Field(3600, ge=1)
+    # Verified tokens remembered, and for how long at most, in seconds.
+    token_cache_size: int = Field(10000, ge=0)
+    token_cache_ttl: float = Field(60.0, gt=0)
+    # Trust X-User-Id/X-User-Role on requests without a bearer token. Anyone
+    # can send them, so this is only for local development and tests.
+    header_auth: bool = False
+    # Share of requests profiled at random (admins can also ask per request
+    # with X-Profile: 1), and how many profiles are kept.
+    profile_sample_rate: float = Field(0.0, ge=0, le=1)
+    profile_keep: int = Field(50, ge=1)
+
+    @field_validator("password_scrypt_n")
+    @classmethod
+    def validate_scrypt_n(cls, v: int) -> int:
+        if v & (v - 1):
+            raise ValueError("PASSWORD_SCRYPT_N must be a power of two")
+        return v
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "Settings":
+        """Build settings from upper-cased field names, e.g. ``STORAGE_BACKEND``."""
+        return cls(
+            **{
+                name: environ[name.upper()]
+                for name in cls.model_fields
+                if name.upper() in environ
+            }
+        )
+
+
+settings = Settings.from_env()
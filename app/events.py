@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable
+from typing import Optional, Set, Union
+
+from app.changes import Change, ChangeLog, StoredChangeLog
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+RESYNC_EVENT = b"event: resync\ndata: {}\n\n"
+
+# Queued after the last event a subscription will get; the stream then ends.
+_CLOSED = None
+
+
+class Subscription:
+    """Bounded queue of changes matching ``accepts`` for one consumer.
+
+    ``lagged`` is set when the consumer fell ``queue_size`` events behind
+    and was dropped; it must then resync from a full read.
+    """
+
+    def __init__(self, accepts: Callable[[Change], bool], queue_size: int) -> None:
+        self.accepts = accepts
+        self.queue: "asyncio.Queue[Optional[Change]]" = asyncio.Queue(queue_size + 1)
+        self.queue_size = queue_size
+        self.lagged = False
+
+    def offer(self, change: Change) -> bool:
+        """Queue ``change`` without waiting; ``False`` once the queue is full."""
+        if self.queue.qsize() >= self.queue_size:
+            return False
+        self.queue.put_nowait(change)
+        return True
+
+    def close(self) -> None:
+        # One slot is kept spare so the end marker always fits.
+        self.queue.put_nowait(_CLOSED)
+
+
+class Broadcaster:
+    """Fan-out of changes to subscribers, each with its own bounded queue.
+
+    ``publish`` never waits: a subscriber whose queue is full is dropped
+    instead of slowing down the writer or the other subscribers.
+    """
+
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._subscribers: Set[Subscription] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, accepts: Callable[[Change], bool]) -> Subscription:
+        subscription = Subscription(accepts, self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, change: Change) -> None:
+        for subscription in list(self._subscribers):
+            if subscription.accepts(change) and not subscription.offer(change):
+                subscription.lagged = True
+                subscription.close()
+                self._subscribers.discard(subscription)
+                self.dropped += 1
+
+    def close(self) -> None:
+        """End every open stream (on shutdown)."""
+        for subscription in self._subscribers:
+            subscription.close()
+        self._subscribers.clear()
+
+    def resync(self) -> None:
+        """End every open stream with ``resync``: changes were lost."""
+        for subscription in self._subscribers:
+            subscription.lagged = True
+        self.close()
+
+
+def format_event(change: Change) -> bytes:
+    return b'id: %d\nevent: %b\ndata: {"op":"%b","id":%d,"data":%b}\n\n' % (
+        change.seq,
+        change.collection.encode(),
+        change.op.encode(),
+        change.id,
+        b"null" if change.data is None else change.data,
+    )
+
+
+async def event_stream(
+    broadcaster: Broadcaster,
+    accepts: Callable[[Change], bool],
+    log: Union[ChangeLog, StoredChangeLog],
+    last_event_id: Optional[int] = None,
+    keepalive: float = 15.0,
+) -> AsyncIterator[bytes]:
+    """Server-sent events for the changes ``accepts`` lets through.
+
+    Subscribes when the stream starts. A reconnecting client sends the
+    ``Last-Event-ID`` it saw; what it missed is replayed from ``log``, or,
+    if no longer retained, it gets a ``resync`` event. A comment line goes
+    out after ``keepalive`` idle seconds so proxies keep the connection
+    open, and a subscription dropped for lagging ends with ``resync``.
+    """
+    subscription = broadcaster.subscribe(accepts)
+    sent = -1
+    try:
+        if last_event_id is not None:
+            # Subscribed first: what is written meanwhile goes to the queue,
+            # and whatever both the replay and the queue hold is sent once.
+            missed, _, resync = await log.read(last_event_id, None, accepts)
+            if resync:
+                yield RESYNC_EVENT
+            for change in missed:
+                yield format_event(change)
+                sent = change.seq
+        while True:
+            try:
+                change = await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if change is _CLOSED:
+                break
+            if change.seq > sent:
+                yield format_event(change)
+        if subscription.lagged:
+            yield RESYNC_EVENT
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+async def tail_changes(
+    log: StoredChangeLog, broadcaster: Broadcaster, interval: float
+) -> None:
+    """Publish the changes of every process from a shared log, until cancelled.
+
+    Polls every ``interval`` seconds. While nobody listens only the cursor
+    moves forward; if the log dropped changes before they were read, the
+    open streams end with ``resync``.
+    """
+    last = await log.latest()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not len(broadcaster):
+                last = await log.latest()
+                continue
+            oldest, _ = await log.store.bounds()
+            if oldest > last + 1:
+                broadcaster.resync()
+                last = await log.latest()
+                continue
+            while batch := await log.after(last):
+                for change in batch:
+                    broadcaster.publish(change)
+                last = batch[-1].seq
+        except Exception:
+            logger.exception("Reading the change log failed")
@@ -0,0 +1,57 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+from fastapi.responses import StreamingResponse
+
+EXPORT_BATCH_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+PageFetcher = Callable[[int, int], Awaitable[List[Dict]]]
+Serializer = Callable[[Dict], bytes]
+
+
+async def iter_records(
+    fetch_page: PageFetcher, batch_size: int
+) -> AsyncIterator[List[Dict]]:
+    """Walk a collection by keyset cursor, one batch at a time.
+
+    Each batch is fetched lazily, so records created or deleted while the
+    export runs never invalidate the iteration.
+    """
+    after_id = 0
+    while True:
+        batch = await fetch_page(after_id, batch_size)
+        if not batch:
+            return
+        yield batch
+        after_id = batch[-1]["id"]
+
+
+async def iter_ndjson(
+    fetch_page: PageFetcher, serialize: Serializer
+) -> AsyncIterator[bytes]:
+    async for batch in iter_records(fetch_page, EXPORT_BATCH_SIZE):
+        yield b"".join(serialize(record) + b"\n" for record in batch)
+
+
+async def iter_json_array(
+    fetch_page: PageFetcher, serialize: Serializer
+) -> AsyncIterator[bytes]:
+    separator = b"["
+    async for batch in iter_records(fetch_page, EXPORT_BATCH_SIZE):
+        yield separator + b",".join(serialize(record) for record in batch)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def export_response(
+    accept: str, fetch_page: PageFetcher, serialize: Serializer
+) -> StreamingResponse:
+    """Stream a collection as NDJSON if the client asks for it, else a JSON array."""
+    if NDJSON_MEDIA_TYPE in (accept or ""):
+        return StreamingResponse(
+            iter_ndjson(fetch_page, serialize), media_type=NDJSON_MEDIA_TYPE
+        )
+    return StreamingResponse(
+        iter_json_array(fetch_page, serialize), media_type=JSON_MEDIA_TYPE
+    )
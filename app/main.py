@@ -1,234 +1,795 @@
-from typing import Dict, List
-
-from fastapi import Depends, FastAPI, HTTPException
+import asyncio
+import secrets
+from collections.abc import Mapping
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from fastapi import Body, Depends, FastAPI, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
 from starlette import status
-
+from starlette.datastructures import Headers
+
+from app.bulk import MAX_BULK_ITEMS, BulkItemResult, BulkUpdateItem, process_batch
+from app.cache import ResponseCache
+from app.changes import Change, ChangeLog, StoredChangeLog, encode_feed
+from app.conditional import ETAG_HEADER, etag_matches, make_etag, not_modified
+from app.config import settings
+from app.events import EVENT_STREAM_MEDIA_TYPE, Broadcaster, event_stream, tail_changes
+from app.export import JSON_MEDIA_TYPE, export_response
+from app.metrics import METRICS, TEXT_MEDIA_TYPE, MetricsMiddleware
 from app.models.asset import AssetCreate, AssetOut
 
 # fmt: off
-from app.models.checkout import CheckoutCreate, CheckoutOut, CheckoutStatus, can_transition
-from app.models.user import UserCreate, UserOut, UserRole
-from app.security import CurrentUser, ensure_owner_or_admin, get_current_user, require_admin
+from app.models.checkout import (
+    ACTIVE_STATUSES,
+    CheckoutCreate,
+    CheckoutOut,
+    CheckoutStatsOut,
+    CheckoutStatus,
+    can_transition,
+)
+from app.models.user import TokenOut, TokenRequest, UserCreate, UserOut, UserRole
+from app.overdue import OverdueSweeper
+from app.pagination import MAX_PAGE_SIZE, Page, page_params, paginate
+from app.passwords import PasswordHasher, ScryptCost
+from app.profiling import SORT_KEYS, ProfileStore, ProfilingMiddleware
+from app.security import (
+    CurrentUser,
+    ensure_owner_or_admin,
+    get_current_user,
+    require_admin,
+    resolve_user,
+)
+from app.serialization import ASSETS_JSON, CHECKOUTS_JSON, USERS_JSON, json_response
+from app.storage import AsyncStorage, DuplicateKeyError, StoredChange, create_storage
+from app.storage.aio import AsyncRepository
+from app.tokens import TokenAuthenticator, TokenSigner
 
 # fmt: on
 
-app = FastAPI(title="Equipment Checkout", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    tasks = []
+    if settings.overdue_sweep_interval:
+        tasks.append(asyncio.create_task(_SWEEPER.run(settings.overdue_sweep_interval)))
+    if _CHANGES.shared:
+        tasks.append(
+            asyncio.create_task(
+                tail_changes(_CHANGES, _EVENTS, settings.change_poll_interval)
+            )
+        )
+    yield
+    _EVENTS.close()
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    _PASSWORDS.close()
+    _DB.close()
+
+
+app = FastAPI(title="Equipment Checkout", version="0.1.0", lifespan=lifespan)
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
-_DB: Dict[str, List[Dict]] = {
-    "users": [],
-    "assets": [],
-    "checkouts": [],
-    "equipment": [],
-}
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, storage and cache metrics."""
+    return Response(METRICS.render(), media_type=TEXT_MEDIA_TYPE)
 
 
-def _get_record(bucket: str, entity_id: int, message: str) -> Dict:
-    if entity_id < 1 or entity_id > len(_DB[bucket]):
+@app.get("/profiles")
+async def list_profiles(
+    route: Optional[str] = None, current_user: CurrentUser = Depends(get_current_user)
+):
+    """Stored request profiles, newest first (``route`` is a template, e.g. ``/assets``)."""
+    require_admin(current_user)
+    return [profile.summary() for profile in _PROFILES.list(route)]
+
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: int,
+    sort: Literal[SORT_KEYS] = "cumulative",
+    limit: int = Query(40, ge=1, le=1000),
+    format: Literal["text", "pstats"] = "text",
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """A profile as a ``pstats`` report, or raw for ``pstats.Stats``/snakeviz."""
+    require_admin(current_user)
+    profile = _PROFILES.get(profile_id)
+    if profile is None:
+        raise HTTPException(404, "Profile not found")
+    if format == "pstats":
+        return Response(profile.stats, media_type="application/octet-stream")
+    return Response(profile.render(sort, limit), media_type="text/plain")
+
+
+_DB = AsyncStorage(
+    create_storage(settings),
+    METRICS.histogram(
+        "storage_operation_seconds",
+        "Storage calls as awaited by handlers: lookups, and writes with their"
+        " index maintenance.",
+        ("collection", "operation"),
+    ),
+)
+# A shared engine logs writes itself, so every worker serves the same feed.
+_CHANGES = (
+    ChangeLog(settings.change_log_size)
+    if _DB.changes is None
+    else StoredChangeLog(_DB.changes, lambda stored: _stored_change(stored))
+)
+_EVENTS = Broadcaster(settings.event_queue_size)
+_SWEEPER = OverdueSweeper(
+    _DB.checkouts, lambda record: _record_change("checkouts", "update", record)
+)
+_RESPONSES = ResponseCache(settings.response_cache_bytes)
+_PASSWORDS = PasswordHasher(
+    ScryptCost(
+        settings.password_scrypt_n,
+        settings.password_scrypt_r,
+        settings.password_scrypt_p,
+    ),
+    settings.password_hash_workers,
+)
+_TOKENS = TokenAuthenticator(
+    TokenSigner(
+        settings.token_secret.encode() or secrets.token_bytes(32), settings.token_ttl
+    ),
+    _DB.users.get,
+    settings.token_cache_size,
+    settings.token_cache_ttl,
+)
+app.state.tokens = _TOKENS
+_PROFILES = ProfileStore(settings.profile_keep)
+
+
+async def _is_admin(headers: Headers) -> bool:
+    try:
+        user = await resolve_user(
+            _TOKENS,
+            headers.get("Authorization"),
+            headers.get("X-User-Id"),
+            headers.get("X-User-Role"),
+        )
+    except (HTTPException, ValidationError):
+        return False
+    return user.role == UserRole.admin
+
+
+# Added last is outermost: metrics also time the profiled requests.
+app.add_middleware(
+    ProfilingMiddleware,
+    store=_PROFILES,
+    authorize=_is_admin,
+    sample_rate=settings.profile_sample_rate,
+    # Streams: /events never ends, /export can run for minutes.
+    skip=("/events/", "/export/"),
+)
+app.add_middleware(MetricsMiddleware, registry=METRICS)
+METRICS.collected(
+    "cache_stat",
+    "Counters and sizes of the response and token caches.",
+    ("cache", "stat"),
+    lambda: [
+        ((cache, stat), value)
+        for cache, stats in (("responses", _RESPONSES), ("tokens", _TOKENS))
+        for stat, value in stats.stats().items()
+    ],
+)
+METRICS.collected(
+    "event_subscribers",
+    "Open /events streams, and streams dropped for lagging.",
+    ("state",),
+    lambda: [(("open",), len(_EVENTS)), (("dropped",), _EVENTS.dropped)],
+)
+_SERIALIZERS = {"users": USERS_JSON, "assets": ASSETS_JSON, "checkouts": CHECKOUTS_JSON}
+
+# Cache tag of every cached asset list; single assets are tagged ("assets", id).
+ASSET_LISTS = "assets"
+
+
+async def _get_record(repo: AsyncRepository, entity_id: int, message: str) -> Dict:
+    record = await repo.get(entity_id)
+    if record is None:
         raise HTTPException(404, message)
 
-    return _DB[bucket][entity_id - 1]
+    return record
+
+
+def _change_fields(
+    collection: str, op: str, record: Mapping
+) -> Tuple[Optional[int], Optional[bytes]]:
+    """Scope and encoded data of a change to ``record``."""
+    return (
+        record["owner_id"] if collection == "checkouts" else None,
+        None if op == "delete" else _SERIALIZERS[collection].dump(record),
+    )
 
 
-def _reindex(bucket: str) -> None:
-    for idx, record in enumerate(_DB[bucket], start=1):
-        record["id"] = idx
+def _record_change(collection: str, op: str, record: Mapping) -> None:
+    """Append a write to the change feed, encoding the record as it is now.
+
+    A shared log is written by the engine and published by ``tail_changes``.
+    """
+    if _CHANGES.shared:
+        return
+    change = _CHANGES.append(
+        collection, op, record["id"], *_change_fields(collection, op, record)
+    )
+    _EVENTS.publish(change)
+
+
+def _stored_change(stored: StoredChange) -> Change:
+    return Change(
+        stored.seq,
+        stored.collection,
+        stored.op,
+        stored.record["id"],
+        *_change_fields(stored.collection, stored.op, stored.record),
+    )
+
+
+def _change_visible(change: Change, current_user: CurrentUser) -> bool:
+    if current_user.role == UserRole.admin or change.collection == "assets":
+        return True
+    return change.collection == "checkouts" and change.scope == current_user.id
+
+
+async def _read_etag(
+    repo: AsyncRepository, collection: str, scope: Optional[int] = None
+) -> str:
+    # Read before the records: a write landing in between leaves the tag
+    # older than the body, which costs one extra full response, never a
+    # stale 304.
+    return make_etag(collection, await repo.version(scope), scope)
 
 
 def _serialize_checkout(data: Dict) -> CheckoutOut:
     return CheckoutOut(**data)
 
 
-def _visible_checkouts(current_user: CurrentUser) -> List[Dict]:
-    if current_user.role == UserRole.admin:
-        return _DB["checkouts"]
-    return [c for c in _DB["checkouts"] if c["owner_id"] == current_user.id]
+def _visible_scope(current_user: CurrentUser) -> Optional[int]:
+    """Owner whose checkouts ``current_user`` sees; ``None`` means all."""
+    return None if current_user.role == UserRole.admin else current_user.id
+
+
+async def _visible_checkouts(current_user: CurrentUser, **filters) -> List[Dict]:
+    scope = _visible_scope(current_user)
+    if scope is not None:
+        filters["owner_id"] = scope
+    return await _DB.checkouts.query(**filters)
+
+
+async def _has_active_checkout(asset_id: int) -> bool:
+    return await _DB.checkouts.has_active(asset_id)
+
+
+async def _user_record(user: UserCreate) -> Dict:
+    """Fields to store for ``user``, with the password hashed off the event loop."""
+    return {**user.model_dump(), "password": await _PASSWORDS.hash(user.password)}
+
 
+async def _insert_user(user: UserCreate) -> Dict:
+    return await _insert_user_record(await _user_record(user))
 
-def _has_active_checkout(asset_id: int) -> bool:
-    active_statuses = ["active", "overdue"]  # статусы, когда asset занят
 
-    for checkout in _DB["checkouts"]:
-        if (
-            checkout.get("asset_id") == asset_id
-            and checkout.get("status") in active_statuses
-        ):
-            return True
+async def _insert_user_record(fields: Dict) -> Dict:
+    try:
+        record = await _DB.users.insert(fields)
+    except DuplicateKeyError:
+        raise HTTPException(400, "User with this email already exists")
+    _record_change("users", "insert", record)
+    return record
 
-    return False
+
+async def _replace_user(user_id: int, user: UserCreate) -> Dict:
+    return await _replace_user_record(user_id, await _user_record(user))
+
+
+async def _replace_user_record(user_id: int, fields: Dict) -> Dict:
+    await _get_record(_DB.users, user_id, "User not found")
+    try:
+        record = await _DB.users.update(user_id, fields)
+    except DuplicateKeyError:
+        raise HTTPException(400, "User with this email already exists")
+    _TOKENS.forget_user(user_id)
+    _record_change("users", "update", record)
+    return record
+
+
+async def _insert_asset(asset: AssetCreate) -> Dict:
+    record = await _DB.assets.insert(asset.model_dump())
+    _RESPONSES.invalidate(ASSET_LISTS)
+    _record_change("assets", "insert", record)
+    return record
+
+
+async def _replace_asset(asset_id: int, asset: AssetCreate) -> Dict:
+    await _get_record(_DB.assets, asset_id, "Asset not found")
+    record = await _DB.assets.update(asset_id, asset.model_dump())
+    _RESPONSES.invalidate(ASSET_LISTS, ("assets", asset_id))
+    _record_change("assets", "update", record)
+    return record
+
+
+async def _insert_checkout(checkout: CheckoutCreate, current_user: CurrentUser) -> Dict:
+    await _get_record(_DB.assets, checkout.asset_id, "Asset not found")
+
+    if await _has_active_checkout(checkout.asset_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Asset is already checked out"
+        )
+
+    if not can_transition(None, checkout.status):
+        raise HTTPException(400, "Cannot create checkout with this status")
+
+    try:
+        record = await _DB.checkouts.insert(
+            {
+                "asset_id": checkout.asset_id,
+                "due_at": checkout.due_at,
+                "status": checkout.status.value,
+                "owner_id": current_user.id,
+            }
+        )
+    except DuplicateKeyError:
+        # Another request took the asset between the check and the insert.
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Asset is already checked out"
+        )
+    _SWEEPER.track(record)
+    _record_change("checkouts", "insert", record)
+    return record
+
+
+async def _replace_checkout(
+    checkout_id: int, checkout: CheckoutCreate, current_user: CurrentUser
+) -> Dict:
+    existing = await _get_record(_DB.checkouts, checkout_id, "Checkout not found")
+    ensure_owner_or_admin(existing["owner_id"], current_user)
+    await _get_record(_DB.assets, checkout.asset_id, "Asset not found")
+
+    current_status = CheckoutStatus(existing["status"])
+    if not can_transition(current_status, checkout.status):
+        raise HTTPException(400, "Cannot create checkout with this status")
+
+    holder = await _DB.checkouts.get_active(checkout.asset_id)
+    if (
+        holder is not None
+        and holder["id"] != checkout_id
+        and checkout.status.value in ACTIVE_STATUSES
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Asset is already checked out"
+        )
+
+    try:
+        record = await _DB.checkouts.update(
+            checkout_id,
+            {
+                "asset_id": checkout.asset_id,
+                "due_at": checkout.due_at,
+                "status": checkout.status.value,
+            },
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Asset is already checked out"
+        )
+    _SWEEPER.track(record)
+    _record_change("checkouts", "update", record)
+    return record
 
 
 # Users CRUD
 @app.get("/users", response_model=List[UserOut])
-def get_users(current_user: CurrentUser = Depends(get_current_user)):
+async def get_users(
+    current_user: CurrentUser = Depends(get_current_user),
+    page: Page = Depends(page_params),
+    if_none_match: Optional[str] = Header(None),
+):
     require_admin(current_user)
-    return [UserOut(**user) for user in _DB["users"]]
+    etag = await _read_etag(_DB.users, "users")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    users, headers = paginate(await _DB.users.page(page.after_id, page.limit + 1), page)
+    return json_response(USERS_JSON.dump_many(users), {**headers, ETAG_HEADER: etag})
+
+
+@app.post("/users/bulk", response_model=List[BulkItemResult])
+async def create_users_bulk(
+    items: List[Dict[str, Any]] = Body(..., max_length=MAX_BULK_ITEMS),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return await process_batch(
+        UserCreate,
+        items,
+        _insert_user_record,
+        status.HTTP_201_CREATED,
+        prepare=_user_record,
+    )
+
+
+@app.put("/users/bulk", response_model=List[BulkItemResult])
+async def update_users_bulk(
+    items: List[Dict[str, Any]] = Body(..., max_length=MAX_BULK_ITEMS),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return await process_batch(
+        BulkUpdateItem[UserCreate],
+        items,
+        lambda pair: _replace_user_record(*pair),
+        status.HTTP_200_OK,
+        prepare=_prepare_user_update,
+    )
+
+
+async def _prepare_user_update(item: BulkUpdateItem[UserCreate]) -> Tuple[int, Dict]:
+    return item.id, await _user_record(item.data)
 
 
 @app.get("/users/{user_id}", response_model=UserOut)
-def get_user(user_id: int, current_user: CurrentUser = Depends(get_current_user)):
+async def get_user(
+    user_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+):
     require_admin(current_user)
-    return _get_record("users", user_id, "User not found")
+    etag = await _read_etag(_DB.users, "users")
+    user = await _get_record(_DB.users, user_id, "User not found")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(USERS_JSON.dump(user), {ETAG_HEADER: etag})
+
+
+@app.post("/auth/token", response_model=TokenOut)
+async def issue_token(credentials: TokenRequest):
+    """Exchange email and password for a bearer token.
+
+    A password stored with outdated hashing parameters (or in plaintext)
+    is rehashed with the current ones on success. The new hash is stored
+    only if the password was not changed (or the user deleted) meanwhile.
+    """
+    user = await _DB.users.get_by_email(credentials.email)
+    if user is None:
+        # As slow as a wrong password, so timing does not tell which
+        # emails are registered.
+        await _PASSWORDS.verify(credentials.password, _PASSWORDS.dummy)
+        raise HTTPException(401, "Invalid email or password")
+    # Read now: in-memory records are live and may change while we await.
+    verified = user["password"]
+    valid, upgraded = await _PASSWORDS.verify_and_update(credentials.password, verified)
+    if not valid:
+        raise HTTPException(401, "Invalid email or password")
+    if upgraded is not None:
+        rehashed = await _DB.users.replace_if(
+            user["id"], "password", verified, upgraded
+        )
+        if rehashed is not None:
+            _record_change("users", "update", rehashed)
+    token = _TOKENS.signer.issue(user["id"], UserRole(user["role"]).value)
+    return TokenOut(access_token=token, expires_in=_TOKENS.signer.ttl)
 
 
 @app.post("/users", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     user: UserCreate, current_user: CurrentUser = Depends(get_current_user)
 ):
     require_admin(current_user)
-    for u in _DB["users"]:
-        if u.get("email") == user.email:
-            raise HTTPException(400, "User with this email already exists")
-
-    user_data = {"id": len(_DB["users"]) + 1, **user.dict()}
-    _DB["users"].append(user_data)
-    return UserOut(**user_data)
+    return UserOut(**(await _insert_user(user)))
 
 
 @app.put("/users/{user_id}", response_model=UserOut)
-def update_user(
+async def update_user(
     user_id: int,
     user: UserCreate,
     current_user: CurrentUser = Depends(get_current_user),
 ):
     require_admin(current_user)
-    _ = _get_record("users", user_id, "User not found")
-
-    for idx, existing in enumerate(_DB["users"]):
-        if existing.get("email") == user.email and idx != user_id - 1:
-            raise HTTPException(400, "User with this email already exists")
-
-    _DB["users"][user_id - 1] = {"id": user_id, **user.dict()}
-    return UserOut(**_DB["users"][user_id - 1])
+    return UserOut(**(await _replace_user(user_id, user)))
 
 
 @app.delete("/users/{user_id}")
-def delete_user(user_id: int, current_user: CurrentUser = Depends(get_current_user)):
+async def delete_user(
+    user_id: int, current_user: CurrentUser = Depends(get_current_user)
+):
     require_admin(current_user)
-    _get_record("users", user_id, "User not found")
-    deleted = _DB["users"].pop(user_id - 1)
-    _reindex("users")
+    await _get_record(_DB.users, user_id, "User not found")
+    deleted = await _DB.users.delete(user_id)
+    _TOKENS.forget_user(user_id)
+    _record_change("users", "delete", deleted)
     return {"message": f"User {deleted['name']} deleted"}
 
 
 # Assets CRUD
 @app.get("/assets", response_model=List[AssetOut])
-def get_assets():
-    return [AssetOut(**asset) for asset in _DB["assets"]]
+async def get_assets(
+    page: Page = Depends(page_params),
+    inv_id_prefix: Optional[str] = Query(None, max_length=50),
+    if_none_match: Optional[str] = Header(None),
+):
+    etag = await _read_etag(_DB.assets, "assets")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    prefix = inv_id_prefix.strip().upper() if inv_id_prefix else None
+    # Public route: the response does not depend on the caller's role.
+    key = ("GET /assets", prefix, page.after_id, page.limit)
+    cached = _RESPONSES.get(key, etag)
+    if cached is None:
+        assets = await _DB.assets.query(
+            inv_id_prefix=prefix, after_id=page.after_id, limit=page.limit + 1
+        )
+        assets, headers = paginate(assets, page)
+        cached = _RESPONSES.put(
+            key, etag, ASSETS_JSON.dump_many(assets), headers, (ASSET_LISTS,)
+        )
+    return json_response(cached.body, {**cached.headers, ETAG_HEADER: etag})
+
+
+@app.post("/assets/bulk", response_model=List[BulkItemResult])
+async def create_assets_bulk(
+    items: List[Dict[str, Any]] = Body(..., max_length=MAX_BULK_ITEMS),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return await process_batch(
+        AssetCreate,
+        items,
+        _insert_asset,
+        status.HTTP_201_CREATED,
+    )
+
+
+@app.put("/assets/bulk", response_model=List[BulkItemResult])
+async def update_assets_bulk(
+    items: List[Dict[str, Any]] = Body(..., max_length=MAX_BULK_ITEMS),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return await process_batch(
+        BulkUpdateItem[AssetCreate],
+        items,
+        lambda item: _replace_asset(item.id, item.data),
+        status.HTTP_200_OK,
+    )
 
 
 @app.get("/assets/{asset_id}", response_model=AssetOut)
-def get_asset(asset_id: int):
-    return _get_record("assets", asset_id, "Asset not found")
+async def get_asset(asset_id: int, if_none_match: Optional[str] = Header(None)):
+    etag = await _read_etag(_DB.assets, "assets", asset_id)
+    key = ("GET /assets/{asset_id}", asset_id)
+    # A body cached under the current ETag proves the asset exists.
+    cached = _RESPONSES.get(key, etag)
+    if cached is None:
+        asset = await _get_record(_DB.assets, asset_id, "Asset not found")
+        cached = _RESPONSES.put(
+            key, etag, ASSETS_JSON.dump(asset), tags=(("assets", asset_id),)
+        )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(cached.body, {ETAG_HEADER: etag})
 
 
 @app.post("/assets", response_model=AssetOut, status_code=status.HTTP_201_CREATED)
-def create_asset(
+async def create_asset(
     asset: AssetCreate, current_user: CurrentUser = Depends(get_current_user)
 ):
     require_admin(current_user)
-    asset_data = {"id": len(_DB["assets"]) + 1, **asset.dict()}
-    _DB["assets"].append(asset_data)
-    return asset_data
+    return await _insert_asset(asset)
 
 
 @app.put("/assets/{asset_id}", response_model=AssetOut)
-def update_asset(
+async def update_asset(
     asset_id: int,
     asset: AssetCreate,
     current_user: CurrentUser = Depends(get_current_user),
 ):
     require_admin(current_user)
-    _get_record("assets", asset_id, "Asset not found")
-    _DB["assets"][asset_id - 1] = {"id": asset_id, **asset.dict()}
-    return _DB["assets"][asset_id - 1]
+    return await _replace_asset(asset_id, asset)
 
 
 @app.delete("/assets/{asset_id}")
-def delete_asset(asset_id: int, current_user: CurrentUser = Depends(get_current_user)):
+async def delete_asset(
+    asset_id: int, current_user: CurrentUser = Depends(get_current_user)
+):
     require_admin(current_user)
-    _get_record("assets", asset_id, "Asset not found")
-    deleted_asset = _DB["assets"].pop(asset_id - 1)
-    _reindex("assets")
+    await _get_record(_DB.assets, asset_id, "Asset not found")
+    deleted_asset = await _DB.assets.delete(asset_id)
+    _RESPONSES.invalidate(ASSET_LISTS, ("assets", asset_id))
+    _record_change("assets", "delete", deleted_asset)
     return {"message": f"Asset {deleted_asset['title']} deleted"}
 
 
 # Checkouts CRUD
 @app.get("/checkouts", response_model=List[CheckoutOut])
-def get_checkouts(current_user: CurrentUser = Depends(get_current_user)):
-    return [_serialize_checkout(co) for co in _visible_checkouts(current_user)]
+async def get_checkouts(
+    current_user: CurrentUser = Depends(get_current_user),
+    page: Page = Depends(page_params),
+    checkout_status: Optional[CheckoutStatus] = Query(None, alias="status"),
+    asset_id: Optional[int] = Query(None, gt=0),
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    etag = await _read_etag(_DB.checkouts, "checkouts", _visible_scope(current_user))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    checkouts = await _visible_checkouts(
+        current_user,
+        status=checkout_status.value if checkout_status else None,
+        asset_id=asset_id,
+        due_after=CheckoutCreate.normalize_datetime(due_after) if due_after else None,
+        due_before=(
+            CheckoutCreate.normalize_datetime(due_before) if due_before else None
+        ),
+        after_id=page.after_id,
+        limit=page.limit + 1,
+    )
+    checkouts, headers = paginate(checkouts, page)
+    return json_response(
+        CHECKOUTS_JSON.dump_many(checkouts), {**headers, ETAG_HEADER: etag}
+    )
 
 
-@app.get("/checkouts/{checkout_id}", response_model=CheckoutOut)
-def get_checkout(
-    checkout_id: int, current_user: CurrentUser = Depends(get_current_user)
+@app.post("/checkouts/bulk", response_model=List[BulkItemResult])
+async def create_checkouts_bulk(
+    items: List[Dict[str, Any]] = Body(..., max_length=MAX_BULK_ITEMS),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    checkout = _get_record("checkouts", checkout_id, "Checkout not found")
-    ensure_owner_or_admin(checkout["owner_id"], current_user)
-    return _serialize_checkout(checkout)
+    return await process_batch(
+        CheckoutCreate,
+        items,
+        lambda checkout: _insert_checkout(checkout, current_user),
+        status.HTTP_201_CREATED,
+    )
 
 
-@app.post("/checkouts", response_model=CheckoutOut, status_code=status.HTTP_201_CREATED)
-def create_checkout(
-    checkout: CheckoutCreate, current_user: CurrentUser = Depends(get_current_user)
+@app.put("/checkouts/bulk", response_model=List[BulkItemResult])
+async def update_checkouts_bulk(
+    items: List[Dict[str, Any]] = Body(..., max_length=MAX_BULK_ITEMS),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    _get_record("assets", checkout.asset_id, "Asset not found")
+    return await process_batch(
+        BulkUpdateItem[CheckoutCreate],
+        items,
+        lambda item: _replace_checkout(item.id, item.data, current_user),
+        status.HTTP_200_OK,
+    )
 
-    if _has_active_checkout(checkout.asset_id):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, detail="Asset is already checked out"
-        )
 
-    if not can_transition(None, checkout.status):
-        raise HTTPException(400, "Cannot create checkout with this status")
+@app.get("/checkouts/{checkout_id}", response_model=CheckoutOut)
+async def get_checkout(
+    checkout_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+):
+    etag = await _read_etag(_DB.checkouts, "checkouts", _visible_scope(current_user))
+    checkout = await _get_record(_DB.checkouts, checkout_id, "Checkout not found")
+    ensure_owner_or_admin(checkout["owner_id"], current_user)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(CHECKOUTS_JSON.dump(checkout), {ETAG_HEADER: etag})
 
-    checkout_data = {
-        "id": len(_DB["checkouts"]) + 1,
-        "asset_id": checkout.asset_id,
-        "due_at": checkout.due_at,
-        "status": checkout.status.value,
-        "owner_id": current_user.id,
-    }
 
-    _DB["checkouts"].append(checkout_data)
-    return _serialize_checkout(checkout_data)
+@app.post("/checkouts", response_model=CheckoutOut, status_code=status.HTTP_201_CREATED)
+async def create_checkout(
+    checkout: CheckoutCreate, current_user: CurrentUser = Depends(get_current_user)
+):
+    return _serialize_checkout(await _insert_checkout(checkout, current_user))
 
 
 @app.put("/checkouts/{checkout_id}", response_model=CheckoutOut)
-def update_checkout(
+async def update_checkout(
     checkout_id: int,
     checkout: CheckoutCreate,
     current_user: CurrentUser = Depends(get_current_user),
 ):
-    existing = _get_record("checkouts", checkout_id, "Checkout not found")
-    ensure_owner_or_admin(existing["owner_id"], current_user)
-    _get_record("assets", checkout.asset_id, "Asset not found")
-
-    current_status = CheckoutStatus(existing["status"])
-    if not can_transition(current_status, checkout.status):
-        raise HTTPException(400, "Cannot create checkout with this status")
-
-    existing.update(
-        {
-            "asset_id": checkout.asset_id,
-            "due_at": checkout.due_at,
-            "status": checkout.status.value,
-        }
+    return _serialize_checkout(
+        await _replace_checkout(checkout_id, checkout, current_user)
     )
-    return _serialize_checkout(existing)
 
 
 @app.delete("/checkouts/{checkout_id}")
-def delete_checkout(
+async def delete_checkout(
     checkout_id: int, current_user: CurrentUser = Depends(get_current_user)
 ):
-    checkout = _get_record("checkouts", checkout_id, "Checkout not found")
+    checkout = await _get_record(_DB.checkouts, checkout_id, "Checkout not found")
     ensure_owner_or_admin(checkout["owner_id"], current_user)
-    deleted_checkout = _DB["checkouts"].pop(checkout_id - 1)
-    _reindex("checkouts")
+    deleted_checkout = await _DB.checkouts.delete(checkout_id)
+    _record_change("checkouts", "delete", deleted_checkout)
     return {"message": f"Checkout {deleted_checkout['id']} deleted"}
+
+
+@app.get("/stats", response_model=CheckoutStatsOut)
+async def get_stats(
+    current_user: CurrentUser = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Checkout totals, active counts per asset and owner, due dates per day.
+
+    Served from counters the storage updates on every write, not by
+    scanning the checkout history.
+    """
+    require_admin(current_user)
+    etag = await _read_etag(_DB.checkouts, "stats")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    stats = CheckoutStatsOut.model_validate(await _DB.checkouts.stats())
+    return json_response(stats.model_dump_json().encode(), {ETAG_HEADER: etag})
+
+
+# Change feed
+@app.get("/changes")
+async def get_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Writes after sequence number ``since`` visible to the caller.
+
+    Pass ``next`` as ``since`` on the following call. ``resync: true``
+    means the changes after ``since`` are no longer retained (or ``since``
+    is 0): reload the collections, then continue from ``next``.
+    """
+    changes, next_seq, resync = await _CHANGES.read(
+        since, limit, lambda change: _change_visible(change, current_user)
+    )
+    return json_response(encode_feed(changes, next_seq, resync))
+
+
+@app.get("/events/checkouts", response_class=StreamingResponse)
+async def checkout_events(
+    current_user: CurrentUser = Depends(get_current_user),
+    last_event_id: Optional[int] = Header(None),
+):
+    """Server-sent events for checkout writes the caller may see."""
+    scope = _visible_scope(current_user)
+
+    def accepts(change: Change) -> bool:
+        return change.collection == "checkouts" and scope in (None, change.scope)
+
+    return StreamingResponse(
+        event_stream(
+            _EVENTS, accepts, _CHANGES, last_event_id, settings.event_keepalive
+        ),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+# Exports
+@app.get("/export/assets", response_class=StreamingResponse)
+async def export_assets(
+    accept: str = Header(default=JSON_MEDIA_TYPE),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return export_response(
+        accept,
+        _DB.assets.page,
+        ASSETS_JSON.dump,
+    )
+
+
+@app.get("/export/checkouts", response_class=StreamingResponse)
+async def export_checkouts(
+    accept: str = Header(default=JSON_MEDIA_TYPE),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    require_admin(current_user)
+    return export_response(
+        accept,
+        _DB.checkouts.page,
+        CHECKOUTS_JSON.dump,
+    )
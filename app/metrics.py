@@ -0,0 +1,298 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from time import perf_counter
+from typing import Dict, List, Sequence, Tuple
+
+TEXT_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class CounterSeries:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+
+class GaugeSeries(CounterSeries):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class HistogramSeries:
+    """Per-bucket counts (not cumulative, so ``observe`` is one increment)."""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class Family(ABC):
+    """A metric family: samples sharing a name, help text and label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+    @abstractmethod
+    def render(self) -> Iterator[str]:
+        """Lines of the family in the Prometheus text format."""
+
+
+class Metric(Family):
+    """A family updated in place: one series per combination of label values."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._series: Dict[Labels, object] = {}
+
+    @abstractmethod
+    def _new_series(self):
+        """A fresh series for a label combination seen for the first time."""
+
+    def labels(self, *values: str):
+        series = self._series.get(values)
+        if series is None:
+            series = self._series[values] = self._new_series()
+        return series
+
+    def render(self) -> Iterator[str]:
+        yield from self._header()
+        for values, series in self._series.items():
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}{labels} {_format_value(series.value)}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_series(self) -> CounterSeries:
+        return CounterSeries()
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_series(self) -> GaugeSeries:
+        return GaugeSeries()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_series(self) -> HistogramSeries:
+        return HistogramSeries(self.buckets)
+
+    def render(self) -> Iterator[str]:
+        yield from self._header()
+        names = self.labelnames + ("le",)
+        for values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(names, values + (le,))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(series.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Collected(Family):
+    """Gauge family read from ``collect`` at scrape time (e.g. cache stats)."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Labels, float]]],
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def render(self) -> Iterator[str]:
+        yield from self._header()
+        for values, value in self.collect():
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Registry:
+    """Metric families rendered in the Prometheus text format.
+
+    Series are plain counters without locks: every update happens on the
+    event loop thread (storage calls are timed around the await, not in
+    the worker thread), so increments cannot interleave.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Family] = {}
+
+    def _register(self, metric: Family) -> Family:
+        # Get-or-create, so several storages or apps can share the registry.
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def collected(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Labels, float]]],
+    ) -> Collected:
+        return self._register(Collected(name, help, labelnames, collect))
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        lines.append("")
+        return "\n".join(lines).encode()
+
+
+METRICS = Registry()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, size and status of every request.
+
+    Requests are labelled by route template (``/assets/{asset_id}``), not
+    by raw path, so the number of series stays bounded; paths that match
+    no route share one label. Streaming responses (``/events``, exports)
+    are timed until the last chunk is sent.
+    """
+
+    def __init__(self, app, registry: Registry = METRICS) -> None:
+        self.app = app
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "Requests being served."
+        ).labels()
+        self.latency = registry.histogram(
+            "http_request_duration_seconds",
+            "Time to serve a request, until the last body chunk.",
+            ("method", "route"),
+        )
+        self.sizes = registry.histogram(
+            "http_response_size_bytes",
+            "Response body size.",
+            ("method", "route"),
+            SIZE_BUCKETS,
+        )
+        self.responses = registry.counter(
+            "http_responses_total",
+            "Responses by status code.",
+            ("method", "route", "status"),
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_counting(message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_counting)
+        finally:
+            self.in_flight.dec()
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "<unmatched>"))
+            self.latency.labels(*labels).observe(perf_counter() - started)
+            self.sizes.labels(*labels).observe(size)
+            self.responses.labels(*labels, str(status_code)).inc()
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from enum import Enum
-from typing import Optional
+from typing import Dict, Optional
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 
@@ -64,12 +64,23 @@ class CheckoutOut(BaseModel):
     owner_id: int
 
 
+class CheckoutStatsOut(BaseModel):
+    by_status: Dict[CheckoutStatus, int]
+    total: int
+    active_by_asset: Dict[int, int]
+    active_by_owner: Dict[int, int]
+    due_per_day: Dict[date, int]
+
+
 ALLOWED_STATUS_TRANSITIONS = {
     CheckoutStatus.active: {CheckoutStatus.returned, CheckoutStatus.overdue},
     CheckoutStatus.overdue: {CheckoutStatus.returned},
     CheckoutStatus.returned: set(),
 }
 
+# Statuses in which the checkout still holds the asset.
+ACTIVE_STATUSES = frozenset({CheckoutStatus.active.value, CheckoutStatus.overdue.value})
+
 
 def can_transition(
     current_status: Optional[CheckoutStatus], next_status: CheckoutStatus
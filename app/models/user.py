@@ -79,3 +79,19 @@ class UserOut(BaseModel):
     name: str
     email: EmailStr
     role: UserRole
+
+
+class TokenRequest(BaseModel):
+    email: EmailStr
+    password: str = Field(..., max_length=128)
+
+    @field_validator("email")
+    @classmethod
+    def normalize_email(cls, v: str) -> str:
+        return v.strip().lower()
+
+
+class TokenOut(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import logging
+from collections.abc import Callable, Mapping
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from app.models.checkout import CheckoutStatus
+from app.storage.aio import AsyncCheckoutRepository
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH_SIZE = 500
+ACTIVE = CheckoutStatus.active.value
+OVERDUE = CheckoutStatus.overdue.value
+
+
+class OverdueSweeper:
+    """Moves active checkouts to ``overdue`` once their ``due_at`` passes.
+
+    Active checkouts wait in a min-heap keyed by ``due_at``, so a sweep only
+    touches checkouts that are already due: O(log n) per transition and
+    nothing at all while none are due. Entries are not removed when a
+    checkout changes; a popped entry is checked against the stored record
+    and dropped (returned, deleted) or rescheduled (due date moved).
+
+    ``on_overdue`` is called with every checkout a sweep has marked.
+
+    ``track`` only schedules while ``run`` is running (``running``); with
+    the sweep disabled nothing would ever pop the heap.
+    """
+
+    def __init__(
+        self,
+        checkouts: AsyncCheckoutRepository,
+        on_overdue: Optional[Callable[[Mapping], None]] = None,
+    ) -> None:
+        self._checkouts = checkouts
+        self._on_overdue = on_overdue
+        self._heap: List[Tuple[datetime, int]] = []
+        self.running = False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def track(self, record: Mapping) -> None:
+        """Schedule a checkout that was just written, if it is active."""
+        if self.running and record["status"] == ACTIVE:
+            heapq.heappush(self._heap, (record["due_at"], record["id"]))
+
+    async def load(self) -> None:
+        """Schedule every active checkout already in storage."""
+        heap: List[Tuple[datetime, int]] = []
+        after_id = 0
+        while True:
+            batch = await self._checkouts.query(
+                status=ACTIVE, after_id=after_id, limit=LOAD_BATCH_SIZE
+            )
+            if not batch:
+                break
+            heap.extend((record["due_at"], record["id"]) for record in batch)
+            after_id = batch[-1]["id"]
+        heap.extend(self._heap)
+        heapq.heapify(heap)
+        self._heap = heap
+
+    async def sweep(self, now: Optional[datetime] = None) -> int:
+        """Mark checkouts due by ``now`` overdue; return how many changed."""
+        now = now or datetime.now(timezone.utc)
+        marked = 0
+        while self._heap and self._heap[0][0] <= now:
+            _, checkout_id = heapq.heappop(self._heap)
+            record = await self._checkouts.get(checkout_id)
+            if record is None or record["status"] != ACTIVE:
+                continue
+            if record["due_at"] > now:
+                heapq.heappush(self._heap, (record["due_at"], checkout_id))
+                continue
+            record = await self._checkouts.transition(checkout_id, ACTIVE, OVERDUE)
+            if record is None:
+                continue
+            marked += 1
+            if self._on_overdue is not None:
+                self._on_overdue(record)
+        return marked
+
+    async def run(self, interval: float) -> None:
+        """Load the schedule, then sweep every ``interval`` seconds until cancelled."""
+        # Set before loading, so checkouts written meanwhile are tracked too.
+        self.running = True
+        try:
+            await self.load()
+            while True:
+                try:
+                    await self.sweep()
+                except Exception:
+                    logger.exception("Overdue sweep failed")
+                await asyncio.sleep(interval)
+        finally:
+            self.running = False
+            self._heap.clear()
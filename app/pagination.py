@@ -0,0 +1,34 @@
+from typing import Dict, List, Tuple
+
+from fastapi import Query
+from pydantic import BaseModel
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-After-Id"
+
+
+class Page(BaseModel):
+    """Keyset cursor: return up to ``limit`` records with id > ``after_id``."""
+
+    limit: int
+    after_id: int
+
+
+async def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after_id: int = Query(0, ge=0),
+) -> Page:
+    return Page(limit=limit, after_id=after_id)
+
+
+def paginate(records: List[Dict], page: Page) -> Tuple[List[Dict], Dict[str, str]]:
+    """Cut a page fetched with ``limit + 1`` rows and build the cursor headers.
+
+    The extra row only tells whether another page exists; when it does, the
+    id to pass as ``after_id`` goes into the ``X-Next-After-Id`` header.
+    """
+    if len(records) <= page.limit:
+        return records, {}
+    records = records[: page.limit]
+    return records, {NEXT_CURSOR_HEADER: str(records[-1]["id"])}
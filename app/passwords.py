@@ -0,0 +1,145 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional, Tuple
+
+SCHEME = "scrypt"
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class ScryptCost(NamedTuple):
+    """scrypt work factors: ``n`` (CPU/memory, power of two), ``r``, ``p``.
+
+    Memory per hash is about ``128 * r * n`` bytes: 32 MiB for the defaults,
+    which verify in roughly 120 ms per core.
+    """
+
+    n: int = 2**15
+    r: int = 8
+    p: int = 1
+
+    @property
+    def maxmem(self) -> int:
+        # OpenSSL refuses to run above ``maxmem`` (32 MiB unless raised).
+        return 128 * self.r * (self.n + self.p + 2) + 1024 * 1024
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _derive(password: str, salt: bytes, cost: ScryptCost) -> bytes:
+    return hashlib.scrypt(
+        password.encode(),
+        salt=salt,
+        n=cost.n,
+        r=cost.r,
+        p=cost.p,
+        maxmem=cost.maxmem,
+        dklen=KEY_BYTES,
+    )
+
+
+def hash_password(password: str, cost: ScryptCost = ScryptCost()) -> str:
+    """Encode as ``scrypt$n$r$p$salt$key`` (unpadded base64)."""
+    salt = os.urandom(SALT_BYTES)
+    key = _derive(password, salt, cost)
+    return f"{SCHEME}${cost.n}${cost.r}${cost.p}${_b64(salt)}${_b64(key)}"
+
+
+def dummy_hash(cost: ScryptCost = ScryptCost()) -> str:
+    """An encoded hash at ``cost`` made of random bytes, so no password matches.
+
+    Checking a password against it costs as much as against a real hash.
+    """
+    salt, key = os.urandom(SALT_BYTES), os.urandom(KEY_BYTES)
+    return f"{SCHEME}${cost.n}${cost.r}${cost.p}${_b64(salt)}${_b64(key)}"
+
+
+def parse_hash(encoded: str) -> Optional[Tuple[ScryptCost, bytes, bytes]]:
+    """Cost, salt and key of an encoded hash; ``None`` if it is not one."""
+    parts = encoded.split("$")
+    if len(parts) != 6 or parts[0] != SCHEME:
+        return None
+    n, r, p = (int(part) for part in parts[1:4])
+    return ScryptCost(n, r, p), _unb64(parts[4]), _unb64(parts[5])
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Check ``password`` against a stored value in constant time.
+
+    Values that are not scrypt hashes are plaintext stored before hashing
+    was introduced; they still verify so that the first login can upgrade
+    them (see ``needs_rehash``).
+    """
+    parsed = parse_hash(encoded)
+    if parsed is None:
+        return hmac.compare_digest(password.encode(), encoded.encode())
+    cost, salt, key = parsed
+    return hmac.compare_digest(_derive(password, salt, cost), key)
+
+
+def needs_rehash(encoded: str, cost: ScryptCost) -> bool:
+    parsed = parse_hash(encoded)
+    return parsed is None or parsed[0] != cost
+
+
+class PasswordHasher:
+    """Hash and verify passwords in a pool of ``workers`` processes.
+
+    A KDF call keeps a core busy for the whole hash; running it in worker
+    processes keeps the event loop responsive and lets hashes run in
+    parallel without contending for the GIL. The pool is bounded, so at
+    most ``workers`` hashes run at once and the rest queue. Workers are
+    spawned (not forked) on first use: forking a process that already runs
+    threads can deadlock the child.
+    """
+
+    def __init__(self, cost: ScryptCost = ScryptCost(), workers: int = 1) -> None:
+        self.cost = cost
+        self.workers = workers
+        # Verified in place of a missing account's hash (see ``dummy_hash``).
+        self.dummy = dummy_hash(cost)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def _run(self, func, *args):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.cost)
+
+    async def verify(self, password: str, encoded: str) -> bool:
+        return await self._run(verify_password, password, encoded)
+
+    async def verify_and_update(
+        self, password: str, encoded: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify, and when the stored value is outdated return a new hash.
+
+        The second item is set only after a successful check against a
+        hash made with other cost parameters (or a legacy plaintext); the
+        caller stores it in place of ``encoded``.
+        """
+        if not await self.verify(password, encoded):
+            return False, None
+        if needs_rehash(encoded, self.cost):
+            return True, await self.hash(password)
+        return True, None
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,155 @@
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.datastructures import Headers
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+SORT_KEYS = ("cumulative", "tottime", "calls")
+
+
+class Profile(NamedTuple):
+    id: int
+    method: str
+    route: str
+    status_code: int
+    duration: float
+    created_at: float
+    stats: bytes  # marshalled ``pstats`` data, as written by ``Profile.dump_stats``
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "status_code": self.status_code,
+            "duration_ms": round(self.duration * 1000, 3),
+            "created_at": self.created_at,
+        }
+
+    def render(self, sort: str = "cumulative", limit: int = 40) -> str:
+        """Text report of the ``limit`` top functions, as ``pstats`` prints it."""
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = marshal.loads(self.stats)
+        stats.get_top_level_stats()
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+class ProfileStore:
+    """The last ``keep`` profiles, oldest dropped first."""
+
+    def __init__(self, keep: int) -> None:
+        self._profiles: Deque[Profile] = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, profile: Profile) -> None:
+        self._profiles.append(profile)
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def list(self, route: Optional[str] = None) -> List[Profile]:
+        """Newest first, optionally only those of one route template."""
+        return [p for p in reversed(self._profiles) if route in (None, p.route)]
+
+
+class ProfilingMiddleware:
+    """Run selected requests under ``cProfile`` and keep the result.
+
+    A request is profiled when it carries ``X-Profile: 1`` and ``authorize``
+    accepts its headers (administrators only), or at random with
+    probability ``sample_rate``. Profiles are stored under the route
+    template; an explicitly requested one is announced in
+    ``X-Profile-Id``.
+
+    The profiler covers everything from the start of the request to its
+    last body chunk: validation, handler code and JSON encoding. It hooks
+    the event loop thread, so one request is profiled at a time (others
+    pass through meanwhile), coroutines of concurrent requests that run in
+    between show up in the profile too, and work offloaded to storage
+    threads appears as time awaiting the result.
+
+    Paths starting with one of ``skip`` are never profiled: a streaming
+    response may last indefinitely, and the profiler would stay on (and
+    every other request unprofiled) for as long.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        authorize: Callable[[Headers], Awaitable[bool]],
+        sample_rate: float = 0.0,
+        skip: Tuple[str, ...] = (),
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+        self.sample_rate = sample_rate
+        self.skip = skip
+        self._busy = False
+
+    async def _requested(self, scope) -> bool:
+        headers = Headers(scope=scope)
+        return headers.get(PROFILE_HEADER) == "1" and await self.authorize(headers)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or self._busy or scope["path"].startswith(self.skip):
+            await self.app(scope, receive, send)
+            return
+        requested = await self._requested(scope)
+        if not requested and not random.random() < self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profile_id = self.store.next_id()
+        status_code = 500
+
+        async def send_announcing(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if requested:
+                    header = (
+                        PROFILE_ID_HEADER.lower().encode(),
+                        str(profile_id).encode(),
+                    )
+                    message = {**message, "headers": [*message["headers"], header]}
+            await send(message)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_announcing)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            self._busy = False
+            profiler.create_stats()
+            route = scope.get("route")
+            self.store.add(
+                Profile(
+                    profile_id,
+                    scope["method"],
+                    getattr(route, "path", "<unmatched>"),
+                    status_code,
+                    duration,
+                    time.time(),
+                    marshal.dumps(profiler.stats),
+                )
+            )
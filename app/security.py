@@ -1,7 +1,11 @@
-from fastapi import Header, HTTPException
+from typing import Optional, Union
+
+from fastapi import Header, HTTPException, Request
 from pydantic import BaseModel
 
+from app.config import settings
 from app.models.user import UserRole
+from app.tokens import TokenAuthenticator
 
 
 class CurrentUser(BaseModel):
@@ -9,11 +13,43 @@ class CurrentUser(BaseModel):
     role: UserRole
 
 
-def get_current_user(
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(401, detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+async def resolve_user(
+    tokens: TokenAuthenticator,
+    authorization: Optional[str],
+    user_id: Optional[Union[int, str]],
+    role: Optional[str],
+) -> CurrentUser:
+    """Caller from ``Authorization: Bearer <token>`` (see ``POST /auth/token``).
+
+    Without a token the ``X-User-Id``/``X-User-Role`` values are trusted
+    as before, unless ``HEADER_AUTH`` is off.
+    """
+    if authorization is not None:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer":
+            raise _unauthorized("Unsupported authorization scheme")
+        claims = await tokens.authenticate(token.strip())
+        if claims is None:
+            raise _unauthorized("Invalid or expired token")
+        return CurrentUser(id=claims.user_id, role=claims.role)
+    if not settings.header_auth or user_id is None or role is None:
+        raise _unauthorized("Not authenticated")
+    return CurrentUser(id=user_id, role=role)
+
+
+async def get_current_user(
+    request: Request,
+    authorization: Optional[str] = Header(default=None),
     x_user_id: int = Header(default=None, alias="X-User-Id"),
     x_user_role: UserRole = Header(default=None, alias="X-User-Role"),
 ) -> CurrentUser:
-    return CurrentUser(id=x_user_id, role=x_user_role)
+    return await resolve_user(
+        request.app.state.tokens, authorization, x_user_id, x_user_role
+    )
 
 
 def require_admin(current_user: CurrentUser) -> None:
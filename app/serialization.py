@@ -0,0 +1,69 @@
+from collections.abc import Mapping
+from time import perf_counter
+from typing import Dict, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from app.metrics import METRICS
+from app.models.asset import AssetOut
+from app.models.checkout import CheckoutOut
+from app.models.user import UserOut
+
+SERIALIZE_SECONDS = METRICS.histogram(
+    "serialize_seconds", "Time to encode records to JSON.", ("model", "shape")
+)
+
+
+def output_schema(model: Type[BaseModel]) -> type:
+    """TypedDict with the fields of ``model``.
+
+    Serializing through a TypedDict schema reads plain dicts directly and
+    drops keys the output model does not declare (e.g. ``password``).
+    """
+    fields = {name: field.annotation for name, field in model.model_fields.items()}
+    return TypedDict(f"{model.__name__}Dict", fields)
+
+
+class RecordSerializer:
+    """Dump stored records to JSON bytes in the shape of an output model.
+
+    Records coming from storage were validated on the way in, so building
+    ``UserOut``-style instances only for FastAPI to validate and encode them
+    again is pure overhead; pydantic-core serializes the dicts in one pass.
+    """
+
+    def __init__(self, model: Type[BaseModel]) -> None:
+        schema = output_schema(model)
+        self._one = TypeAdapter(schema)
+        self._many = TypeAdapter(List[schema])
+        self._one_timings = SERIALIZE_SECONDS.labels(model.__name__, "one")
+        self._many_timings = SERIALIZE_SECONDS.labels(model.__name__, "many")
+
+    def dump(self, record: Mapping) -> bytes:
+        started = perf_counter()
+        body = self._one.dump_json(_as_dict(record))
+        self._one_timings.observe(perf_counter() - started)
+        return body
+
+    def dump_many(self, records: List[Mapping]) -> bytes:
+        started = perf_counter()
+        body = self._many.dump_json([_as_dict(record) for record in records])
+        self._many_timings.observe(perf_counter() - started)
+        return body
+
+
+def _as_dict(record: Mapping) -> Dict:
+    # Storage may keep compact record types (``CheckoutRecord``); they
+    # become dicts only here, at the response boundary.
+    return record if type(record) is dict else record.as_dict()
+
+
+USERS_JSON = RecordSerializer(UserOut)
+ASSETS_JSON = RecordSerializer(AssetOut)
+CHECKOUTS_JSON = RecordSerializer(CheckoutOut)
+
+
+def json_response(content: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,46 @@
+from app.config import Settings
+from app.storage.aio import AsyncStorage
+from app.storage.base import (
+    AssetRepository,
+    ChangeStore,
+    CheckoutRepository,
+    DuplicateKeyError,
+    Repository,
+    Storage,
+    StoredChange,
+    UserRepository,
+)
+from app.storage.journal import JournaledStorage
+from app.storage.memory import InMemoryStorage
+from app.storage.sqlite import SQLiteStorage
+
+__all__ = [
+    "AssetRepository",
+    "AsyncStorage",
+    "ChangeStore",
+    "CheckoutRepository",
+    "DuplicateKeyError",
+    "InMemoryStorage",
+    "JournaledStorage",
+    "Repository",
+    "SQLiteStorage",
+    "Storage",
+    "StoredChange",
+    "UserRepository",
+    "create_storage",
+]
+
+
+def create_storage(settings: Settings) -> Storage:
+    """Instantiate the storage engine selected by ``STORAGE_BACKEND``."""
+    if settings.storage_backend == "sqlite":
+        return SQLiteStorage(
+            settings.sqlite_path, settings.sqlite_pool_size, settings.change_log_size
+        )
+    if settings.storage_backend == "journal":
+        return JournaledStorage(
+            settings.journal_dir,
+            settings.journal_commit_interval,
+            settings.journal_snapshot_every,
+        )
+    return InMemoryStorage()
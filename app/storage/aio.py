@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from datetime import datetime
+from functools import partial
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from anyio import CapacityLimiter, to_thread
+
+from app.metrics import Histogram
+from app.storage.base import (
+    AssetRepository,
+    ChangeStore,
+    CheckoutRepository,
+    Repository,
+    Storage,
+    StoredChange,
+    UserRepository,
+)
+
+
+class ThreadOffload:
+    """Run blocking calls in worker threads, at most ``max_threads`` at once.
+
+    The limiter is created on first use so that it belongs to the running
+    event loop rather than to whatever imported the module.
+    """
+
+    def __init__(self, max_threads: int) -> None:
+        self._max_threads = max_threads
+        self._limiter: Optional[CapacityLimiter] = None
+
+    async def __call__(self, func: Callable[[], Any]) -> Any:
+        if self._limiter is None:
+            self._limiter = CapacityLimiter(self._max_threads)
+        return await to_thread.run_sync(func, limiter=self._limiter)
+
+
+class AsyncFacade:
+    """Awaitable calls into a sync part of a storage engine.
+
+    Non-blocking engines are called inline: an in-memory operation never
+    awaits, so it runs atomically with respect to other coroutines on the
+    event loop and needs no ``asyncio.Lock``. Blocking engines (real I/O)
+    go through ``offload`` so the event loop keeps serving other requests.
+
+    With ``timings``, every call is observed under ``(name, operation)``;
+    the time includes waiting for a worker thread, as the handler sees it.
+    """
+
+    def __init__(
+        self,
+        sync: Any,
+        offload: Optional[ThreadOffload],
+        name: str = "",
+        timings: Optional[Histogram] = None,
+    ) -> None:
+        self.sync = sync
+        self.name = name
+        self._offload = offload
+        self._timings = timings
+
+    async def _call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        started = perf_counter()
+        if self._offload is None:
+            result = func(*args, **kwargs)
+        else:
+            result = await self._offload(partial(func, *args, **kwargs))
+        if self._timings is not None:
+            elapsed = perf_counter() - started
+            self._timings.labels(self.name, func.__name__).observe(elapsed)
+        return result
+
+
+class AsyncRepository(AsyncFacade):
+    """Awaitable facade over a sync ``Repository``."""
+
+    sync: Repository
+
+    async def get(self, record_id: int) -> Optional[Dict]:
+        return await self._call(self.sync.get, record_id)
+
+    async def list(self) -> List[Dict]:
+        return await self._call(self.sync.list)
+
+    async def page(self, after_id: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        return await self._call(self.sync.page, after_id, limit)
+
+    async def insert(self, data: Dict) -> Dict:
+        return await self._call(self.sync.insert, data)
+
+    async def update(self, record_id: int, data: Dict) -> Dict:
+        return await self._call(self.sync.update, record_id, data)
+
+    async def replace_if(
+        self, record_id: int, field: str, expected: Any, value: Any
+    ) -> Optional[Dict]:
+        return await self._call(self.sync.replace_if, record_id, field, expected, value)
+
+    async def delete(self, record_id: int) -> Optional[Dict]:
+        return await self._call(self.sync.delete, record_id)
+
+    async def version(self, scope: Any = None) -> str:
+        return await self._call(self.sync.version, scope)
+
+    async def count(self) -> int:
+        return await self._call(self.sync.__len__)
+
+
+class AsyncUserRepository(AsyncRepository):
+    sync: UserRepository
+
+    async def get_by_email(self, email: str) -> Optional[Dict]:
+        return await self._call(self.sync.get_by_email, email)
+
+
+class AsyncAssetRepository(AsyncRepository):
+    sync: AssetRepository
+
+    async def query(
+        self,
+        *,
+        inv_id_prefix: Optional[str] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        return await self._call(
+            self.sync.query, inv_id_prefix=inv_id_prefix, after_id=after_id, limit=limit
+        )
+
+
+class AsyncCheckoutRepository(AsyncRepository):
+    sync: CheckoutRepository
+
+    async def has_active(self, asset_id: int) -> bool:
+        return await self._call(self.sync.has_active, asset_id)
+
+    async def get_active(self, asset_id: int) -> Optional[Dict]:
+        return await self._call(self.sync.get_active, asset_id)
+
+    async def transition(
+        self, checkout_id: int, expected: str, status: str
+    ) -> Optional[Dict]:
+        return await self._call(self.sync.transition, checkout_id, expected, status)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await self._call(self.sync.stats)
+
+    async def list_by_owner(self, owner_id: int) -> List[Dict]:
+        return await self._call(self.sync.list_by_owner, owner_id)
+
+    async def query(
+        self,
+        *,
+        owner_id: Optional[int] = None,
+        status: Optional[str] = None,
+        asset_id: Optional[int] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        return await self._call(
+            self.sync.query,
+            owner_id=owner_id,
+            status=status,
+            asset_id=asset_id,
+            due_after=due_after,
+            due_before=due_before,
+            after_id=after_id,
+            limit=limit,
+        )
+
+
+class AsyncChangeStore(AsyncFacade):
+    sync: ChangeStore
+
+    async def bounds(self) -> Tuple[int, int]:
+        return await self._call(self.sync.bounds)
+
+    async def after(
+        self, since: int, limit: Optional[int] = None
+    ) -> List[StoredChange]:
+        return await self._call(self.sync.after, since, limit)
+
+
+class AsyncStorage:
+    """Async view of a ``Storage`` used by the request handlers.
+
+    ``engine`` stays reachable for synchronous callers (tests, tooling).
+    ``timings`` (labels ``collection``, ``operation``) times every call.
+    """
+
+    def __init__(self, engine: Storage, timings: Optional[Histogram] = None) -> None:
+        self.engine = engine
+        offload = ThreadOffload(engine.max_concurrency) if engine.blocking else None
+        self.users = AsyncUserRepository(engine.users, offload, "users", timings)
+        self.assets = AsyncAssetRepository(engine.assets, offload, "assets", timings)
+        self.checkouts = AsyncCheckoutRepository(
+            engine.checkouts, offload, "checkouts", timings
+        )
+        self.changes = (
+            None
+            if engine.changes is None
+            else AsyncChangeStore(engine.changes, offload, "changes", timings)
+        )
+
+    def reset(self) -> None:
+        self.engine.reset()
+
+    def close(self) -> None:
+        self.engine.close()
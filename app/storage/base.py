@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class DuplicateKeyError(Exception):
+    """Raised when a write would break a uniqueness constraint."""
+
+    def __init__(self, field: str, value: Any) -> None:
+        super().__init__(f"{field}={value!r} is already taken")
+        self.field = field
+        self.value = value
+
+
+class Repository(ABC):
+    """CRUD access to one collection of records keyed by integer ``id``.
+
+    Ids are allocated monotonically and never change or get reused, so they
+    stay valid as references (``checkouts.asset_id``/``owner_id``) after
+    other records are deleted.
+
+    Records are read as mappings with the fields of the output model: plain
+    dicts, or a compact type such as ``CheckoutRecord`` that is converted to
+    a dict only when a response is serialized. Returned records belong to
+    the storage engine: callers must go through ``update`` instead of
+    mutating them in place, otherwise secondary indexes drift out of sync.
+
+    ``version`` tokens let readers tell whether anything changed since they
+    last looked. Collections with a ``scope_field`` also keep a token per
+    value of that field, which changes only with the records in that scope.
+    """
+
+    scope_field: Optional[str] = None
+
+    @abstractmethod
+    def get(self, record_id: int) -> Optional[Dict]:
+        """Return the record with ``record_id`` or ``None``."""
+
+    @abstractmethod
+    def list(self) -> List[Dict]:
+        """Return all records ordered by id."""
+
+    @abstractmethod
+    def page(self, after_id: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Return up to ``limit`` records with id greater than ``after_id``."""
+
+    @abstractmethod
+    def insert(self, data: Dict) -> Dict:
+        """Store ``data`` under a freshly allocated id and return the record.
+
+        Raises ``DuplicateKeyError`` if a unique field is already taken.
+        """
+
+    @abstractmethod
+    def update(self, record_id: int, data: Dict) -> Dict:
+        """Merge ``data`` into an existing record and return it.
+
+        Raises ``DuplicateKeyError`` if a unique field is already taken.
+        """
+
+    @abstractmethod
+    def replace_if(
+        self, record_id: int, field: str, expected: Any, value: Any
+    ) -> Optional[Dict]:
+        """Set ``field`` to ``value`` only if it currently equals ``expected``.
+
+        Returns the updated record, or ``None`` if the record is gone or
+        the field changed meanwhile. The check and the write are atomic.
+        """
+
+    @abstractmethod
+    def delete(self, record_id: int) -> Optional[Dict]:
+        """Remove a record and return it, or ``None`` if it did not exist."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every record and restart id allocation."""
+
+    def compact(self) -> None:
+        """Reclaim space left behind by deleted records."""
+
+    @abstractmethod
+    def version(self, scope: Any = None) -> str:
+        """Opaque token that changes on every write to the collection.
+
+        With ``scope`` it changes on writes to records whose ``scope_field``
+        equals ``scope`` (before or after the write). A token is never
+        handed out again for a different state of the records it covers.
+        """
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+
+class UserRepository(Repository):
+    """Users; ``email`` is unique after ``UserCreate.normalize_email``."""
+
+    @abstractmethod
+    def get_by_email(self, email: str) -> Optional[Dict]:
+        """Return the user registered with ``email``."""
+
+
+class AssetRepository(Repository):
+    """Assets; versions are scoped per asset ``id``."""
+
+    scope_field = "id"
+
+    @abstractmethod
+    def query(
+        self,
+        *,
+        inv_id_prefix: Optional[str] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """Keyset page of assets whose ``inv_id`` starts with the prefix."""
+
+
+class CheckoutRepository(Repository):
+    """Checkouts; at most one per asset may be in ``ACTIVE_STATUSES``.
+
+    ``insert``/``update`` raise ``DuplicateKeyError("asset_id", ...)`` when
+    the write would give an asset a second active checkout. The check is
+    atomic with the write, even for callers on different threads.
+
+    Versions are scoped by owner, matching what a student can see.
+    """
+
+    scope_field = "owner_id"
+
+    @abstractmethod
+    def has_active(self, asset_id: int) -> bool:
+        """Whether ``asset_id`` has a checkout that still holds the asset."""
+
+    @abstractmethod
+    def get_active(self, asset_id: int) -> Optional[Dict]:
+        """Return the checkout in ``ACTIVE_STATUSES`` holding ``asset_id``."""
+
+    @abstractmethod
+    def transition(
+        self, checkout_id: int, expected: str, status: str
+    ) -> Optional[Dict]:
+        """Set ``status`` only if the checkout is currently in ``expected``.
+
+        Returns the updated record, or ``None`` if the checkout is gone or
+        its status changed meanwhile. The check and the write are atomic.
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Checkout counters kept up to date by every write.
+
+        ``by_status`` maps each status to its count and ``total`` counts
+        all checkouts; ``active_by_asset`` and ``active_by_owner`` count
+        checkouts in ``ACTIVE_STATUSES`` per id; ``due_per_day`` counts
+        checkouts per UTC due date. The cost depends on the number of
+        assets, owners and days reported, never on the history size.
+        """
+
+    @abstractmethod
+    def list_by_owner(self, owner_id: int) -> List[Dict]:
+        """Return checkouts owned by ``owner_id`` ordered by id.
+
+        Cost must depend on the owner's checkouts, not on the table size.
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        *,
+        owner_id: Optional[int] = None,
+        status: Optional[str] = None,
+        asset_id: Optional[int] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """Keyset page of checkouts matching every given filter.
+
+        ``due_after`` is inclusive and ``due_before`` exclusive. Filters must
+        be answered from indexes, not by scanning the whole table.
+        """
+
+
+class StoredChange(NamedTuple):
+    """One write as recorded by the engine; ``record`` is the deleted one on delete."""
+
+    seq: int
+    collection: str
+    op: str
+    record: Dict
+
+
+class ChangeStore(ABC):
+    """Log of the last writes to every collection, kept by the engine itself.
+
+    Sequence numbers grow with every write, in commit order, and are shared
+    by all processes using the engine.
+    """
+
+    @abstractmethod
+    def bounds(self) -> Tuple[int, int]:
+        """Sequence numbers of the oldest change retained and of the latest one.
+
+        With nothing retained the oldest is the latest plus one.
+        """
+
+    @abstractmethod
+    def after(self, since: int, limit: Optional[int] = None) -> List[StoredChange]:
+        """Up to ``limit`` retained changes with ``seq > since``, oldest first."""
+
+
+class Storage(ABC):
+    """Bundle of repositories the API works against.
+
+    ``blocking`` engines do I/O and are called from worker threads (at most
+    ``max_concurrency`` at a time) by ``AsyncStorage``.
+
+    Engines that several processes can share record their writes in
+    ``changes``; for the others it is ``None`` and the process keeps the
+    change feed itself.
+    """
+
+    blocking = False
+    max_concurrency = 1
+
+    users: UserRepository
+    assets: AssetRepository
+    checkouts: CheckoutRepository
+    changes: Optional[ChangeStore] = None
+
+    def reset(self) -> None:
+        """Drop all data (used by tests and local tooling)."""
+        self.users.clear()
+        self.assets.clear()
+        self.checkouts.clear()
+
+    def close(self) -> None:
+        """Release connections and other resources held by the engine."""
+
+    def compact(self) -> None:
+        self.users.compact()
+        self.assets.compact()
+        self.checkouts.compact()
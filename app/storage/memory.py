@@ -0,0 +1,745 @@
+from __future__ import annotations
+
+import heapq
+import secrets
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Collection, Iterable, Iterator
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.checkout import ACTIVE_STATUSES
+from app.models.user import UserCreate
+from app.storage.base import (
+    AssetRepository,
+    CheckoutRepository,
+    DuplicateKeyError,
+    Repository,
+    Storage,
+    UserRepository,
+)
+
+# fmt: off
+from app.storage.records import MICROS_PER_DAY, STATUSES, CheckoutRecord, day_from_number, to_micros
+
+# fmt: on
+
+
+class IdAllocator:
+    """Monotonic id source: ids are never reused, even after deletes."""
+
+    def __init__(self, start: int = 1) -> None:
+        self._next = start
+
+    def allocate(self) -> int:
+        allocated = self._next
+        self._next += 1
+        return allocated
+
+    def peek(self) -> int:
+        """Return the id the next ``allocate`` call will hand out."""
+        return self._next
+
+    def observe(self, record_id: int) -> None:
+        """Make sure ids handed out later are greater than ``record_id``."""
+        if record_id >= self._next:
+            self._next = record_id + 1
+
+    def reset(self) -> None:
+        self._next = 1
+
+
+class LockStripes:
+    """Fixed set of locks; a key always maps to the same one.
+
+    Writers for different keys almost never share a lock, so they do not
+    wait on each other, while the number of locks stays bounded no matter
+    how many keys exist.
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def __call__(self, key: Any) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+
+class VersionCounter:
+    """Change counter of one collection, with the last change per scope.
+
+    A scope remembers the counter value of its latest write; scopes never
+    written since the last ``reset`` report the value of that reset. Tokens
+    carry a random epoch, so a counter that restarts with the process does
+    not repeat tokens served by the previous one.
+    """
+
+    def __init__(self) -> None:
+        self._epoch = secrets.token_hex(4)
+        self._current = 0
+        self._floor = 0
+        self._scopes: Dict[Any, int] = {}
+
+    def bump(self, scopes: Iterable[Any] = ()) -> None:
+        self._current += 1
+        for scope in scopes:
+            if scope is not None:
+                self._scopes[scope] = self._current
+
+    def reset(self) -> None:
+        self._current += 1
+        self._floor = self._current
+        self._scopes.clear()
+
+    def token(self, scope: Any = None) -> str:
+        if scope is None:
+            return f"{self._epoch}.{self._current}"
+        return f"{self._epoch}.{self._scopes.get(scope, self._floor)}"
+
+
+class _IndexRange:
+    """Ids of a ``SortedIndex`` slice, sized without materializing it."""
+
+    def __init__(self, entries: List[Tuple[Any, int]], lo: int, hi: int) -> None:
+        self._entries = entries
+        self._lo = lo
+        self._hi = max(lo, hi)
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def __iter__(self) -> Iterator[int]:
+        for pos in range(self._lo, self._hi):
+            yield self._entries[pos][1]
+
+
+class SortedIndex:
+    """Sorted ``(value, id)`` pairs answering range and prefix queries."""
+
+    # Below this many pairs one ``insort`` each beats re-sorting everything.
+    bulk_threshold = 64
+
+    def __init__(self) -> None:
+        self._entries: List[Tuple[Any, int]] = []
+
+    def add(self, value: Any, record_id: int) -> None:
+        insort(self._entries, (value, record_id))
+
+    def extend(self, entries: Iterable[Tuple[Any, int]]) -> None:
+        """Add many pairs; large batches are appended and sorted once."""
+        entries = list(entries)
+        if len(entries) < self.bulk_threshold:
+            for entry in entries:
+                insort(self._entries, entry)
+            return
+        self._entries.extend(entries)
+        self._entries.sort()
+
+    def remove(self, value: Any, record_id: int) -> None:
+        pos = bisect_left(self._entries, (value, record_id))
+        if pos < len(self._entries) and self._entries[pos] == (value, record_id):
+            del self._entries[pos]
+
+    def between(self, low: Any = None, high: Any = None) -> _IndexRange:
+        """Ids with ``low <= value < high``; ``None`` leaves a side open."""
+        lo = 0 if low is None else bisect_left(self._entries, (low,))
+        hi = len(self._entries) if high is None else bisect_left(self._entries, (high,))
+        return _IndexRange(self._entries, lo, hi)
+
+    def prefixed(self, prefix: str) -> _IndexRange:
+        return self.between(prefix, prefix + "\U0010ffff")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class InMemoryRepository(Repository):
+    """Id-keyed dict of records with optional secondary indexes.
+
+    ``indexed_fields`` get hash indexes mapping a value to the ids carrying
+    it, kept ascending so a keyset page of one value is a bisect plus
+    ``limit`` steps; new ids are appended, older ones (a record moving to
+    another value) are inserted in place. ``unique_fields`` map a value to
+    the single id holding it and ``sorted_fields`` get a ``SortedIndex`` for
+    range queries. ``_order`` lists ids ascending for keyset pagination.
+
+    Deleting from a dict leaves a dummy slot behind and CPython never shrinks
+    the table on delete; deleted ids likewise stay in ``_order`` as
+    tombstones. After ``compact_threshold`` deletes (and at least as many
+    deletes as live rows) the tables are rebuilt to release memory.
+
+    The repository may be shared between threads: ``_mutex`` guards the
+    bookkeeping of each write and every index scan. It is held only for
+    those steps, never across a caller's check-then-write sequence.
+
+    Every write bumps ``_versions`` under the mutex, together with the
+    scopes of the records it touched.
+
+    ``on_write`` (if set) is called under the mutex after every successful
+    write as ``on_write(op, record_id, data)``, in the order the writes were
+    applied; ``replay`` applies such a call back, which is how the
+    operation log restores state.
+    """
+
+    indexed_fields: Iterable[str] = ()
+    unique_fields: Iterable[str] = ()
+    sorted_fields: Iterable[str] = ()
+    compact_threshold = 1024
+
+    def __init__(self) -> None:
+        self._ids = IdAllocator()
+        self._rows: Dict[int, Dict] = {}
+        self._order: List[int] = []
+        self._indexes: Dict[str, Dict[Any, List[int]]] = {
+            field: {} for field in self.indexed_fields
+        }
+        self._unique: Dict[str, Dict[Any, int]] = {
+            field: {} for field in self.unique_fields
+        }
+        self._sorted: Dict[str, SortedIndex] = {
+            field: SortedIndex() for field in self.sorted_fields
+        }
+        self._tombstones = 0
+        self._versions = VersionCounter()
+        self._mutex = threading.RLock()
+        self.on_write: Optional[Callable[[str, int, Optional[Dict]], None]] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, record_id: int) -> Optional[Dict]:
+        return self._rows.get(record_id)
+
+    def version(self, scope: Any = None) -> str:
+        return self._versions.token(scope)
+
+    def list(self) -> List[Dict]:
+        return list(self._rows.values())
+
+    def page(self, after_id: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        return self._select([], None, after_id, limit)
+
+    def insert(self, data: Dict) -> Dict:
+        with self._mutex:
+            self._check_unique(data)
+            record = self._new_record({**data, "id": self._ids.allocate()})
+            self._order.append(record["id"])
+            self._store(record)
+            self._versions.bump([self._scope_of(record)])
+            if self.on_write is not None:
+                self.on_write("insert", record["id"], record)
+            return record
+
+    def update(self, record_id: int, data: Dict) -> Dict:
+        with self._mutex:
+            record = self._rows[record_id]
+            self._check_unique(data, record_id)
+            scope = self._scope_of(record)
+            self._unindex(record)
+            record.update(data)
+            record["id"] = record_id
+            self._index(record)
+            self._versions.bump([scope, self._scope_of(record)])
+            if self.on_write is not None:
+                self.on_write("update", record_id, data)
+            return record
+
+    def replace_if(
+        self, record_id: int, field: str, expected: Any, value: Any
+    ) -> Optional[Dict]:
+        with self._mutex:
+            record = self._rows.get(record_id)
+            if record is None or record[field] != expected:
+                return None
+            return InMemoryRepository.update(self, record_id, {field: value})
+
+    def delete(self, record_id: int) -> Optional[Dict]:
+        with self._mutex:
+            deleted = self._rows.pop(record_id, None)
+            if deleted is None:
+                return None
+            self._unindex(deleted)
+            self._versions.bump([self._scope_of(deleted)])
+            self._tombstones += 1
+            if self._tombstones >= max(self.compact_threshold, len(self._rows)):
+                self.compact()
+            if self.on_write is not None:
+                self.on_write("delete", record_id, None)
+            return deleted
+
+    def clear(self) -> None:
+        with self._mutex:
+            self._rows.clear()
+            self._order.clear()
+            for index in self._indexes.values():
+                index.clear()
+            for unique in self._unique.values():
+                unique.clear()
+            for sorted_index in self._sorted.values():
+                sorted_index.clear()
+            self._ids.reset()
+            self._tombstones = 0
+            self._versions.reset()
+            if self.on_write is not None:
+                self.on_write("clear", 0, None)
+
+    def dump(self) -> Tuple[List[Dict], int]:
+        """Return the live records and the next id to allocate (for snapshots)."""
+        with self._mutex:
+            return list(self._rows.values()), self._ids.peek()
+
+    def load(self, records: Iterable[Dict], next_id: int) -> None:
+        """Replace the contents in bulk, building each index in one pass."""
+        with self._mutex:
+            self.clear()
+            self.replay_inserts(records)
+            self._ids.observe(next_id - 1)
+
+    def replay_inserts(self, records: Iterable[Dict]) -> None:
+        """Bulk ``replay`` of consecutive inserts; records carry their ids."""
+        with self._mutex:
+            fresh: List[Dict] = []
+            scopes: List[Any] = []
+            for record in map(self._new_record, records):
+                current = self._rows.get(record["id"])
+                scopes.append(self._scope_of(record))
+                if current is None:
+                    fresh.append(record)
+                else:
+                    scopes.append(self._scope_of(current))
+                    self._unindex(current)
+                    self._store(record)
+            self._versions.bump(scopes)
+            if not fresh:
+                return
+            for record in fresh:
+                self._rows[record["id"]] = record
+            self._order.extend(record["id"] for record in fresh)
+            self._order.sort()
+            self._index_many(fresh)
+            self._ids.observe(self._order[-1])
+
+    def replay(self, op: str, record_id: int, data: Optional[Dict]) -> None:
+        """Re-apply a write reported through ``on_write``, skipping checks.
+
+        Replaying on top of a snapshot taken while writes were running is
+        safe: an insert overwrites the record, an update of a missing record
+        and a delete of a missing record are no-ops.
+        """
+        with self._mutex:
+            if op == "clear":
+                self.clear()
+                return
+            self._ids.observe(record_id)
+            record = self._rows.get(record_id)
+            if op == "insert":
+                scopes = [self._scope_of(data)]
+                if record is not None:
+                    scopes.append(self._scope_of(record))
+                    self._unindex(record)
+                elif not self._order or record_id > self._order[-1]:
+                    self._order.append(record_id)
+                else:
+                    insort(self._order, record_id)
+                self._store(self._new_record(data))
+                self._versions.bump(scopes)
+            elif record is None:
+                return
+            elif op == "update":
+                scope = self._scope_of(record)
+                self._unindex(record)
+                record.update(data)
+                self._index(record)
+                self._versions.bump([scope, self._scope_of(record)])
+            elif op == "delete":
+                del self._rows[record_id]
+                self._unindex(record)
+                self._versions.bump([self._scope_of(record)])
+                self._tombstones += 1
+
+    def compact(self) -> None:
+        with self._mutex:
+            self._rows = dict(self._rows)
+            self._order = [
+                record_id for record_id in self._order if record_id in self._rows
+            ]
+            self._indexes = {
+                field: dict(index) for field, index in self._indexes.items()
+            }
+            self._unique = {
+                field: dict(unique) for field, unique in self._unique.items()
+            }
+            self._tombstones = 0
+
+    def _ids_by(self, field: str, value: Any) -> Collection[int]:
+        return self._indexes[field].get(value, [])
+
+    def _select(
+        self,
+        sources: List[Collection[int]],
+        predicate: Optional[Callable[[Dict], bool]],
+        after_id: int,
+        limit: Optional[int],
+    ) -> List[Dict]:
+        """Keyset page of records with id > ``after_id`` matching ``predicate``.
+
+        ``sources`` are index lookups that every match belongs to, and
+        ``predicate`` must check their conditions as well. Hash
+        index buckets (lists) are id-ordered: the smallest one is walked
+        from ``after_id`` like ``_order`` is without sources, stopping as
+        soon as the page is full. A ``SortedIndex`` range is ordered by
+        value instead, so it is only sorted by id when that is cheaper than
+        walking until ``limit`` of its ids turn up.
+        """
+        with self._mutex:
+            return self._scan(sources, predicate, after_id, limit)
+
+    def _scan(
+        self,
+        sources: List[Collection[int]],
+        predicate: Optional[Callable[[Dict], bool]],
+        after_id: int,
+        limit: Optional[int],
+    ) -> List[Dict]:
+        rows = self._rows
+        ordered = [source for source in sources if isinstance(source, list)]
+        walked = min(ordered, key=len) if ordered else self._order
+        smallest = min(sources, key=len, default=walked)
+        # Walking finds a match about every len(walked) / len(smallest) ids.
+        if smallest is not walked and (
+            limit is None or limit * len(walked) > len(smallest) ** 2
+        ):
+            if len(sources) == 1:
+                predicate = None
+            candidates = (
+                record_id
+                for record_id in smallest
+                if record_id > after_id
+                and (predicate is None or predicate(rows[record_id]))
+            )
+            if limit is None:
+                ids = sorted(candidates)
+            else:
+                ids = heapq.nsmallest(limit, candidates)
+            return [rows[record_id] for record_id in ids]
+
+        if len(sources) == 1 and sources[0] is walked:
+            predicate = None
+        page: List[Dict] = []
+        for pos in range(bisect_right(walked, after_id), len(walked)):
+            record = rows.get(walked[pos])
+            if record is None or (predicate is not None and not predicate(record)):
+                continue
+            page.append(record)
+            if limit is not None and len(page) >= limit:
+                break
+        return page
+
+    def _scope_of(self, record: Dict) -> Any:
+        return None if self.scope_field is None else record[self.scope_field]
+
+    def _new_record(self, data: Dict) -> Dict:
+        """Turn a complete record dict into the form kept in ``_rows``."""
+        return data
+
+    def _unique_key(self, field: str, value: Any) -> Any:
+        return value
+
+    def _sorted_value(self, field: str, record: Dict) -> Any:
+        return record[field]
+
+    def _check_unique(self, data: Dict, record_id: Optional[int] = None) -> None:
+        for field, unique in self._unique.items():
+            if field not in data:
+                continue
+            holder = unique.get(self._unique_key(field, data[field]))
+            if holder is not None and holder != record_id:
+                raise DuplicateKeyError(field, data[field])
+
+    def _store(self, record: Dict) -> None:
+        self._rows[record["id"]] = record
+        self._index(record)
+
+    def _index(self, record: Dict) -> None:
+        record_id = record["id"]
+        for field, index in self._indexes.items():
+            bucket = index.setdefault(record.get(field), [])
+            if not bucket or bucket[-1] < record_id:
+                bucket.append(record_id)
+            else:
+                insort(bucket, record_id)
+        for field, unique in self._unique.items():
+            unique[self._unique_key(field, record.get(field))] = record["id"]
+        for field, sorted_index in self._sorted.items():
+            sorted_index.add(self._sorted_value(field, record), record["id"])
+
+    def _index_many(self, records: Collection[Dict]) -> None:
+        """Bulk ``_index``: each index and bucket is sorted once, not per record."""
+        for field, index in self._indexes.items():
+            touched = {}
+            for record in records:
+                bucket = index.setdefault(record.get(field), [])
+                bucket.append(record["id"])
+                touched[id(bucket)] = bucket
+            for bucket in touched.values():
+                bucket.sort()
+        for field, unique in self._unique.items():
+            for record in records:
+                unique[self._unique_key(field, record.get(field))] = record["id"]
+        for field, sorted_index in self._sorted.items():
+            sorted_index.extend(
+                (self._sorted_value(field, record), record["id"]) for record in records
+            )
+
+    def _unindex(self, record: Dict) -> None:
+        for field, index in self._indexes.items():
+            bucket = index.get(record.get(field))
+            if bucket is None:
+                continue
+            pos = bisect_left(bucket, record["id"])
+            if pos < len(bucket) and bucket[pos] == record["id"]:
+                del bucket[pos]
+            if not bucket:
+                del index[record.get(field)]
+        for field, unique in self._unique.items():
+            unique.pop(self._unique_key(field, record.get(field)), None)
+        for field, sorted_index in self._sorted.items():
+            sorted_index.remove(self._sorted_value(field, record), record["id"])
+
+
+class InMemoryUserRepository(InMemoryRepository, UserRepository):
+    unique_fields = ("email",)
+
+    def get_by_email(self, email: str) -> Optional[Dict]:
+        user_id = self._unique["email"].get(UserCreate.normalize_email(email))
+        return None if user_id is None else self._rows[user_id]
+
+    def _unique_key(self, field: str, value: Any) -> Any:
+        if field == "email":
+            return UserCreate.normalize_email(value)
+        return value
+
+
+class InMemoryAssetRepository(InMemoryRepository, AssetRepository):
+    sorted_fields = ("inv_id",)
+
+    def query(
+        self,
+        *,
+        inv_id_prefix: Optional[str] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        if not inv_id_prefix:
+            return self._select([], None, after_id, limit)
+        return self._select(
+            [self._sorted["inv_id"].prefixed(inv_id_prefix)],
+            lambda record: record["inv_id"].startswith(inv_id_prefix),
+            after_id,
+            limit,
+        )
+
+
+class InMemoryCheckoutRepository(InMemoryRepository, CheckoutRepository):
+    """Checkouts with an ``asset_id -> checkout id`` index of active ones.
+
+    A checkout enters the active index when stored in one of
+    ``ACTIVE_STATUSES`` and leaves it on the transition to ``returned`` or on
+    delete, so conflict checks do not depend on history size. Per-owner
+    active counts and per-day due counts for ``stats`` are kept the same
+    way; status totals come from the ``status`` index.
+
+    Writes that could claim an asset hold that asset's stripe of
+    ``_asset_locks`` from the conflict check until the record is indexed, so
+    two threads cannot both take the same asset while checkouts of other
+    assets go ahead in parallel.
+    """
+
+    indexed_fields = ("asset_id", "owner_id", "status")
+    sorted_fields = ("due_at",)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._active_by_asset: Dict[int, int] = {}
+        self._active_by_owner: Dict[int, int] = {}
+        self._due_days: Dict[int, int] = {}
+        self._asset_locks = LockStripes()
+        self._ints: Dict[int, int] = {}
+
+    def insert(self, data: Dict) -> Dict:
+        with self._asset_locks(data["asset_id"]):
+            self._check_active(data["asset_id"], data["status"])
+            return super().insert(data)
+
+    def update(self, record_id: int, data: Dict) -> Dict:
+        current = self._rows[record_id]
+        asset_id = data.get("asset_id", current["asset_id"])
+        with self._asset_locks(asset_id):
+            self._check_active(
+                asset_id, data.get("status", current["status"]), record_id
+            )
+            return super().update(record_id, data)
+
+    def has_active(self, asset_id: int) -> bool:
+        return asset_id in self._active_by_asset
+
+    def get_active(self, asset_id: int) -> Optional[Dict]:
+        checkout_id = self._active_by_asset.get(asset_id)
+        return None if checkout_id is None else self._rows[checkout_id]
+
+    def transition(
+        self, checkout_id: int, expected: str, status: str
+    ) -> Optional[Dict]:
+        record = self._rows.get(checkout_id)
+        if record is None:
+            return None
+        asset_id = record["asset_id"]
+        with self._asset_locks(asset_id), self._mutex:
+            if (
+                self._rows.get(checkout_id) is not record
+                or record["asset_id"] != asset_id
+                or record["status"] != expected
+            ):
+                return None
+            self._check_active(asset_id, status, checkout_id)
+            return InMemoryRepository.update(self, checkout_id, {"status": status})
+
+    def replace_if(
+        self, record_id: int, field: str, expected: Any, value: Any
+    ) -> Optional[Dict]:
+        if field == "status":
+            return self.transition(record_id, expected, value)
+        if field == "asset_id":
+            # The active check would need the new asset's lock as well.
+            raise ValueError("asset_id can only be changed through update")
+        return super().replace_if(record_id, field, expected, value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._mutex:
+            return {
+                "by_status": {
+                    status: len(self._indexes["status"].get(status, ()))
+                    for status in STATUSES
+                },
+                "total": len(self._rows),
+                "active_by_asset": dict.fromkeys(self._active_by_asset, 1),
+                "active_by_owner": dict(self._active_by_owner),
+                "due_per_day": {
+                    day_from_number(day): count
+                    for day, count in sorted(self._due_days.items())
+                },
+            }
+
+    def list_by_owner(self, owner_id: int) -> List[Dict]:
+        return self._select([self._ids_by("owner_id", owner_id)], None, 0, None)
+
+    def query(
+        self,
+        *,
+        owner_id: Optional[int] = None,
+        status: Optional[str] = None,
+        asset_id: Optional[int] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        sources: List[Collection[int]] = []
+        checks: List[Callable[[Dict], bool]] = []
+        for field, value in (
+            ("owner_id", owner_id),
+            ("status", status),
+            ("asset_id", asset_id),
+        ):
+            if value is not None:
+                sources.append(self._ids_by(field, value))
+                checks.append(
+                    lambda record, field=field, value=value: record[field] == value
+                )
+        if due_after is not None or due_before is not None:
+            low = None if due_after is None else to_micros(due_after)
+            high = None if due_before is None else to_micros(due_before)
+            sources.append(self._sorted["due_at"].between(low, high))
+            if low is not None:
+                checks.append(lambda record: record.due_us >= low)
+            if high is not None:
+                checks.append(lambda record: record.due_us < high)
+
+        def predicate(record: Dict) -> bool:
+            return all(check(record) for check in checks)
+
+        return self._select(sources, predicate if checks else None, after_id, limit)
+
+    def clear(self) -> None:
+        with self._mutex:
+            super().clear()
+            self._active_by_asset.clear()
+            self._active_by_owner.clear()
+            self._due_days.clear()
+            self._ints.clear()
+
+    def compact(self) -> None:
+        with self._mutex:
+            super().compact()
+            self._active_by_asset = dict(self._active_by_asset)
+
+    def _check_active(
+        self, asset_id: int, status: str, record_id: Optional[int] = None
+    ) -> None:
+        if status not in ACTIVE_STATUSES:
+            return
+        holder = self._active_by_asset.get(asset_id)
+        if holder is not None and holder != record_id:
+            raise DuplicateKeyError("asset_id", asset_id)
+
+    def _index(self, record: Dict) -> None:
+        super()._index(record)
+        self._count(record, 1)
+        if record["status"] in ACTIVE_STATUSES:
+            self._active_by_asset[record["asset_id"]] = record["id"]
+
+    def _count(self, record: CheckoutRecord, delta: int) -> None:
+        _add(self._due_days, record.due_us // MICROS_PER_DAY, delta)
+        if record.status in ACTIVE_STATUSES:
+            _add(self._active_by_owner, record.owner_id, delta)
+
+    def _new_record(self, data: Dict) -> CheckoutRecord:
+        record = CheckoutRecord.from_dict(data)
+        # History repeats the same assets and owners: share one int per value.
+        record.asset_id = self._ints.setdefault(record.asset_id, record.asset_id)
+        record.owner_id = self._ints.setdefault(record.owner_id, record.owner_id)
+        return record
+
+    def _sorted_value(self, field: str, record: CheckoutRecord) -> Any:
+        if field == "due_at":
+            return record.due_us
+        return record[field]
+
+    def _index_many(self, records: Collection[Dict]) -> None:
+        super()._index_many(records)
+        for record in records:
+            self._count(record, 1)
+            if record["status"] in ACTIVE_STATUSES:
+                self._active_by_asset[record["asset_id"]] = record["id"]
+
+    def _unindex(self, record: Dict) -> None:
+        super()._unindex(record)
+        self._count(record, -1)
+        if self._active_by_asset.get(record["asset_id"]) == record["id"]:
+            del self._active_by_asset[record["asset_id"]]
+
+
+def _add(counter: Dict[Any, int], key: Any, delta: int) -> None:
+    count = counter.get(key, 0) + delta
+    if count:
+        counter[key] = count
+    else:
+        del counter[key]
+
+
+class InMemoryStorage(Storage):
+    """Process-local storage; state lives as long as the process does."""
+
+    def __init__(self) -> None:
+        self.users = InMemoryUserRepository()
+        self.assets = InMemoryAssetRepository()
+        self.checkouts = InMemoryCheckoutRepository()
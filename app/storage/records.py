@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Tuple
+
+from app.models.checkout import CheckoutStatus
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+STATUSES: Tuple[str, ...] = tuple(status.value for status in CheckoutStatus)
+STATUS_CODES: Dict[str, int] = {status: code for code, status in enumerate(STATUSES)}
+
+
+MICROS_PER_DAY = 86_400_000_000
+
+
+def to_micros(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def from_micros(value: int) -> datetime:
+    return _EPOCH + value * _MICROSECOND
+
+
+def day_from_number(day: int) -> date:
+    """UTC date of a day number (``due_us // MICROS_PER_DAY``)."""
+    return (_EPOCH + timedelta(days=day)).date()
+
+
+class CheckoutRecord(Mapping):
+    """Stored checkout in ``__slots__`` instead of a per-record dict.
+
+    ``due_at`` is kept as integer epoch microseconds and ``status`` as an
+    index into ``STATUSES``, so a record holds no ``datetime`` or string of
+    its own. It reads like the dict shape (same keys, ``datetime`` and
+    ``str`` values); ``as_dict`` converts it at the response boundary.
+    """
+
+    __slots__ = ("id", "asset_id", "due_us", "status_code", "owner_id")
+
+    FIELDS = ("id", "asset_id", "due_at", "status", "owner_id")
+
+    def __init__(
+        self, id: int, asset_id: int, due_us: int, status_code: int, owner_id: int
+    ) -> None:
+        self.id = id
+        self.asset_id = asset_id
+        self.due_us = due_us
+        self.status_code = status_code
+        self.owner_id = owner_id
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> CheckoutRecord:
+        return cls(
+            data["id"],
+            data["asset_id"],
+            to_micros(data["due_at"]),
+            STATUS_CODES[data["status"]],
+            data["owner_id"],
+        )
+
+    @property
+    def status(self) -> str:
+        return STATUSES[self.status_code]
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "due_at":
+            return from_micros(self.due_us)
+        if key == "status":
+            return STATUSES[self.status_code]
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "due_at":
+            self.due_us = to_micros(value)
+        elif key == "status":
+            self.status_code = STATUS_CODES[value]
+        elif key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "asset_id": self.asset_id,
+            "due_at": _EPOCH + self.due_us * _MICROSECOND,
+            "status": STATUSES[self.status_code],
+            "owner_id": self.owner_id,
+        }
+
+    def update(self, data: Mapping) -> None:
+        for key, value in data.items():
+            self[key] = value
+
+    def keys(self) -> Tuple[str, ...]:  # type: ignore[override]
+        return self.FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __repr__(self) -> str:
+        return f"CheckoutRecord({dict(self)!r})"
@@ -0,0 +1,611 @@
+from __future__ import annotations
+
+import json
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.models.checkout import ACTIVE_STATUSES
+from app.models.user import UserCreate
+from app.storage.base import (
+    AssetRepository,
+    ChangeStore,
+    CheckoutRepository,
+    DuplicateKeyError,
+    Repository,
+    Storage,
+    StoredChange,
+    UserRepository,
+)
+
+# fmt: off
+from app.storage.records import MICROS_PER_DAY, STATUSES, day_from_number, from_micros, to_micros
+
+# fmt: on
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    inv_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assets_inv_id ON assets (inv_id);
+CREATE TABLE IF NOT EXISTS checkouts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    asset_id INTEGER NOT NULL,
+    due_at INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    owner_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS checkouts_owner_id ON checkouts (owner_id, id);
+CREATE INDEX IF NOT EXISTS checkouts_asset_id ON checkouts (asset_id, id);
+CREATE INDEX IF NOT EXISTS checkouts_status ON checkouts (status, id);
+CREATE INDEX IF NOT EXISTS checkouts_due_at ON checkouts (due_at);
+CREATE UNIQUE INDEX IF NOT EXISTS checkouts_active_asset_id
+    ON checkouts (asset_id) WHERE status IN ('active', 'overdue');
+CREATE TABLE IF NOT EXISTS versions (
+    tbl TEXT NOT NULL,
+    scope INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (tbl, scope)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    op TEXT NOT NULL,
+    row TEXT NOT NULL
+);
+"""
+
+# Row of ``versions`` counting every write to a table; ids start at 1.
+TABLE_SCOPE = 0
+# ``versions`` entry holding a random epoch picked when the database is
+# created. Tokens carry it, so a recreated or restored file whose counters
+# start over does not hand out the tokens of the previous one.
+EPOCH_TABLE = "epoch"
+
+
+def version_triggers(table: str, scope_field: Optional[str] = None) -> str:
+    """Triggers bumping ``table``'s row in ``versions`` on every write.
+
+    The counter lives in the database, so every worker process sees the
+    same versions. With ``scope_field`` the scopes of the old and new row
+    are set to the new table version as well.
+    """
+    triggers = []
+    for event, rows in (
+        ("INSERT", ("NEW",)),
+        ("UPDATE", ("OLD", "NEW")),
+        ("DELETE", ("OLD",)),
+    ):
+        statements = [
+            f"INSERT INTO versions VALUES ('{table}', {TABLE_SCOPE}, 1)"
+            " ON CONFLICT DO UPDATE SET version = version + 1;"
+        ]
+        if scope_field is not None:
+            statements.extend(
+                f"INSERT INTO versions SELECT '{table}', {row}.{scope_field}, version"
+                f" FROM versions WHERE tbl = '{table}' AND scope = {TABLE_SCOPE}"
+                " ON CONFLICT DO UPDATE SET version = excluded.version;"
+                for row in rows
+            )
+        triggers.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}"
+            f" AFTER {event} ON {table} BEGIN {' '.join(statements)} END;"
+        )
+    return "\n".join(triggers)
+
+
+def change_triggers(table: str, columns: Iterable[str], retention: int) -> List[str]:
+    """Statements (re)creating the triggers logging writes to ``table``.
+
+    Every write appends the row (the old one on delete) as JSON of ``id``
+    and ``columns`` to ``changes`` and drops what falls out of the last
+    ``retention`` changes. Like ``versions``, the log lives in the database,
+    so every worker process reads the same sequence.
+    """
+    fields = ("id", *columns)
+    statements = []
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        name = f"{table}_changes_{event.lower()}"
+        values = ", ".join(f"'{field}', {row}.{field}" for field in fields)
+        statements += [
+            f"DROP TRIGGER IF EXISTS {name}",
+            f"CREATE TRIGGER {name} AFTER {event} ON {table} BEGIN"
+            " INSERT INTO changes (tbl, op, row)"
+            f" VALUES ('{table}', '{event.lower()}', json_object({values}));"
+            " DELETE FROM changes"
+            f" WHERE seq <= (SELECT MAX(seq) FROM changes) - {retention}; END",
+        ]
+    return statements
+
+
+_ACTIVE_LIST = ", ".join(f"'{status}'" for status in sorted(ACTIVE_STATUSES))
+
+
+def _stats_delta(row: str, sign: str) -> str:
+    active = f"{row}.status IN ({_ACTIVE_LIST})"
+    upsert = " ON CONFLICT DO UPDATE SET n = n + excluded.n;"
+    return " ".join(
+        [
+            f"INSERT INTO checkout_stats VALUES ('status', {row}.status, {sign}1){upsert}",
+            f"INSERT INTO checkout_stats"
+            f" VALUES ('day', {row}.due_at / {MICROS_PER_DAY}, {sign}1){upsert}",
+            f"INSERT INTO checkout_stats SELECT 'asset', {row}.asset_id, {sign}1"
+            f" WHERE {active}{upsert}",
+            f"INSERT INTO checkout_stats SELECT 'owner', {row}.owner_id, {sign}1"
+            f" WHERE {active}{upsert}",
+        ]
+    )
+
+
+# Counters behind ``SQLiteCheckoutRepository.stats``: the table, the triggers
+# keeping it current and a backfill from the checkouts already stored.
+CHECKOUT_STATS_SETUP = (
+    "CREATE TABLE checkout_stats ("
+    " kind TEXT NOT NULL, key NOT NULL, n INTEGER NOT NULL, PRIMARY KEY (kind, key)"
+    ") WITHOUT ROWID",
+    "CREATE TRIGGER checkouts_stats_insert AFTER INSERT ON checkouts"
+    f" BEGIN {_stats_delta('NEW', '+')} END",
+    "CREATE TRIGGER checkouts_stats_update AFTER UPDATE ON checkouts"
+    f" BEGIN {_stats_delta('OLD', '-')} {_stats_delta('NEW', '+')} END",
+    "CREATE TRIGGER checkouts_stats_delete AFTER DELETE ON checkouts"
+    f" BEGIN {_stats_delta('OLD', '-')} END",
+    "INSERT INTO checkout_stats"
+    " SELECT 'status', status, COUNT(*) FROM checkouts GROUP BY status",
+    "INSERT INTO checkout_stats SELECT 'day', due_at / "
+    f"{MICROS_PER_DAY}, COUNT(*) FROM checkouts GROUP BY 2",
+    "INSERT INTO checkout_stats SELECT 'asset', asset_id, COUNT(*) FROM checkouts"
+    f" WHERE status IN ({_ACTIVE_LIST}) GROUP BY asset_id",
+    "INSERT INTO checkout_stats SELECT 'owner', owner_id, COUNT(*) FROM checkouts"
+    f" WHERE status IN ({_ACTIVE_LIST}) GROUP BY owner_id",
+)
+
+
+@contextmanager
+def _immediate(conn: sqlite3.Connection) -> Iterator[None]:
+    """Transaction holding the write lock from the start.
+
+    Workers starting together run their setup one after the other.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by request threads.
+
+    Connections are opened lazily up to ``size``; once all are checked out,
+    callers block for up to ``timeout`` seconds. Every connection runs in
+    WAL mode so readers never wait for the writer, and keeps its own cache
+    of prepared statements.
+    """
+
+    timeout = 30.0
+    cached_statements = 256
+
+    def __init__(self, path: str, size: int) -> None:
+        self._path = path
+        self._size = size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+            self._idle = queue.LifoQueue()
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._opened) < self._size:
+                conn = self._connect()
+                self._opened.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("No SQLite connection available") from None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+
+class SQLiteRepository(Repository):
+    """One table; ``columns`` lists every stored field except ``id``.
+
+    SQL is built only from ``table``/``columns``, so statement text is stable
+    and served from each connection's prepared-statement cache.
+    """
+
+    table: str
+    columns: Tuple[str, ...]
+    # Columns left out of the ``changes`` log.
+    private_columns: Tuple[str, ...] = ()
+
+    def __init__(self, pool: ConnectionPool) -> None:
+        self._pool = pool
+
+    def __len__(self) -> int:
+        return self._scalar(f"SELECT COUNT(*) FROM {self.table}")
+
+    def get(self, record_id: int) -> Optional[Dict]:
+        rows = self._fetch(f"SELECT * FROM {self.table} WHERE id = ?", (record_id,))
+        return rows[0] if rows else None
+
+    def version(self, scope: Any = None) -> str:
+        scope = TABLE_SCOPE if scope is None else scope
+        with self._pool.connection() as conn:
+            epoch, version = conn.execute(
+                "SELECT (SELECT version FROM versions WHERE tbl = ? AND scope = ?),"
+                " (SELECT version FROM versions WHERE tbl = ? AND scope = ?)",
+                (EPOCH_TABLE, TABLE_SCOPE, self.table, scope),
+            ).fetchone()
+        return f"{epoch:08x}.{version or 0}"
+
+    def list(self) -> List[Dict]:
+        return self.page()
+
+    def page(self, after_id: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        return self._select([], [], after_id, limit)
+
+    def insert(self, data: Dict) -> Dict:
+        values = self._encode(data)
+        fields = [column for column in self.columns if column in values]
+        sql = (
+            f"INSERT INTO {self.table} ({', '.join(fields)})"
+            f" VALUES ({', '.join('?' for _ in fields)})"
+        )
+        _, record_id = self._write(sql, [values[field] for field in fields], values)
+        return self._decode({**values, "id": record_id})
+
+    def update(self, record_id: int, data: Dict) -> Dict:
+        values = self._encode(data)
+        fields = [column for column in self.columns if column in values]
+        if not fields:
+            record = self.get(record_id)
+            if record is None:
+                raise KeyError(record_id)
+            return record
+        sql = (
+            f"UPDATE {self.table} SET {', '.join(f'{field} = ?' for field in fields)}"
+            " WHERE id = ? RETURNING *"
+        )
+        rows, _ = self._write(
+            sql, [values[field] for field in fields] + [record_id], values
+        )
+        if not rows:
+            raise KeyError(record_id)
+        return self._decode(dict(rows[0]))
+
+    def replace_if(
+        self, record_id: int, field: str, expected: Any, value: Any
+    ) -> Optional[Dict]:
+        if field not in self.columns:
+            raise ValueError(f"{self.table} has no column {field!r}")
+        new, old = self._encode({field: value}), self._encode({field: expected})
+        rows, _ = self._write(
+            f"UPDATE {self.table} SET {field} = ? WHERE id = ? AND {field} = ?"
+            " RETURNING *",
+            (new[field], record_id, old[field]),
+            new,
+        )
+        return self._decode(dict(rows[0])) if rows else None
+
+    def delete(self, record_id: int) -> Optional[Dict]:
+        sql = f"DELETE FROM {self.table} WHERE id = ? RETURNING *"
+        rows, _ = self._write(sql, (record_id,))
+        return self._decode(dict(rows[0])) if rows else None
+
+    def clear(self) -> None:
+        with self._pool.connection() as conn, conn:
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (self.table,))
+
+    def compact(self) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("VACUUM")
+
+    def _encode(self, data: Dict) -> Dict:
+        return data
+
+    def _decode(self, values: Dict) -> Dict:
+        return values
+
+    def _select(
+        self,
+        conditions: List[str],
+        params: List[Any],
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        where = " AND ".join(["id > ?", *conditions])
+        sql = f"SELECT * FROM {self.table} WHERE {where} ORDER BY id LIMIT ?"
+        return self._fetch(sql, [after_id, *params, -1 if limit is None else limit])
+
+    def _fetch(self, sql: str, params: Sequence[Any]) -> List[Dict]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._decode(dict(row)) for row in rows]
+
+    def _scalar(self, sql: str, params: Sequence[Any] = ()) -> Any:
+        with self._pool.connection() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def _write(
+        self, sql: str, params: Sequence[Any], values: Optional[Dict] = None
+    ) -> Tuple[List[sqlite3.Row], Optional[int]]:
+        """Run one statement in its own transaction; return rows and lastrowid."""
+        with self._pool.connection() as conn:
+            try:
+                with conn:
+                    cursor = conn.execute(sql, params)
+                    return cursor.fetchall(), cursor.lastrowid
+            except sqlite3.IntegrityError as exc:
+                # "UNIQUE constraint failed: users.email"
+                message = str(exc)
+                if not message.startswith("UNIQUE"):
+                    raise
+                field = message.rpartition(".")[2]
+                raise DuplicateKeyError(field, (values or {}).get(field)) from exc
+
+
+class SQLiteUserRepository(SQLiteRepository, UserRepository):
+    table = "users"
+    columns = ("name", "email", "password", "role")
+    private_columns = ("password",)
+
+    def get_by_email(self, email: str) -> Optional[Dict]:
+        rows = self._select(["email = ?"], [UserCreate.normalize_email(email)], limit=1)
+        return rows[0] if rows else None
+
+    def _encode(self, data: Dict) -> Dict:
+        if "email" not in data:
+            return data
+        return {**data, "email": UserCreate.normalize_email(data["email"])}
+
+
+class SQLiteAssetRepository(SQLiteRepository, AssetRepository):
+    table = "assets"
+    columns = ("title", "inv_id")
+
+    def query(
+        self,
+        *,
+        inv_id_prefix: Optional[str] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        if not inv_id_prefix:
+            return self.page(after_id, limit)
+        # A range instead of LIKE keeps the inv_id index usable.
+        return self._select(
+            ["inv_id >= ?", "inv_id < ?"],
+            [inv_id_prefix, inv_id_prefix + "\U0010ffff"],
+            after_id,
+            limit,
+        )
+
+
+class SQLiteCheckoutRepository(SQLiteRepository, CheckoutRepository):
+    """Checkouts; ``due_at`` is stored as integer microseconds since the epoch.
+
+    The partial unique index on ``asset_id`` for active statuses lets the
+    database itself reject a second active checkout, even across workers.
+    """
+
+    table = "checkouts"
+    columns = ("asset_id", "due_at", "status", "owner_id")
+
+    def has_active(self, asset_id: int) -> bool:
+        return self.get_active(asset_id) is not None
+
+    def get_active(self, asset_id: int) -> Optional[Dict]:
+        rows = self._select(
+            ["asset_id = ?", f"status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})"],
+            [asset_id, *sorted(ACTIVE_STATUSES)],
+            limit=1,
+        )
+        return rows[0] if rows else None
+
+    def transition(
+        self, checkout_id: int, expected: str, status: str
+    ) -> Optional[Dict]:
+        return self.replace_if(checkout_id, "status", expected, status)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT kind, key, n FROM checkout_stats WHERE n != 0 ORDER BY kind, key"
+            ).fetchall()
+        stats: Dict[str, Any] = {
+            "by_status": dict.fromkeys(STATUSES, 0),
+            "active_by_asset": {},
+            "active_by_owner": {},
+            "due_per_day": {},
+        }
+        sections = {
+            "status": stats["by_status"],
+            "asset": stats["active_by_asset"],
+            "owner": stats["active_by_owner"],
+        }
+        for kind, key, count in rows:
+            if kind == "day":
+                stats["due_per_day"][day_from_number(key)] = count
+            else:
+                sections[kind][key] = count
+        stats["total"] = sum(stats["by_status"].values())
+        return stats
+
+    def list_by_owner(self, owner_id: int) -> List[Dict]:
+        return self.query(owner_id=owner_id)
+
+    def query(
+        self,
+        *,
+        owner_id: Optional[int] = None,
+        status: Optional[str] = None,
+        asset_id: Optional[int] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        after_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        conditions: List[str] = []
+        params: List[Any] = []
+        for column, value in (
+            ("owner_id", owner_id),
+            ("status", status),
+            ("asset_id", asset_id),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if due_after is not None:
+            conditions.append("due_at >= ?")
+            params.append(to_micros(due_after))
+        if due_before is not None:
+            conditions.append("due_at < ?")
+            params.append(to_micros(due_before))
+        return self._select(conditions, params, after_id, limit)
+
+    def _encode(self, data: Dict) -> Dict:
+        if "due_at" not in data:
+            return data
+        return {**data, "due_at": to_micros(data["due_at"])}
+
+    def _decode(self, values: Dict) -> Dict:
+        return {**values, "due_at": from_micros(values["due_at"])}
+
+
+class SQLiteChangeStore(ChangeStore):
+    """The ``changes`` table written by the triggers of ``change_triggers``."""
+
+    def __init__(self, pool: ConnectionPool, repos: Iterable[SQLiteRepository]) -> None:
+        self._pool = pool
+        self._repos = {repo.table: repo for repo in repos}
+
+    def bounds(self) -> Tuple[int, int]:
+        with self._pool.connection() as conn:
+            oldest, latest = conn.execute(
+                "SELECT (SELECT MIN(seq) FROM changes),"
+                " (SELECT seq FROM sqlite_sequence WHERE name = 'changes')"
+            ).fetchone()
+        return latest + 1 if oldest is None else oldest, latest
+
+    def after(self, since: int, limit: Optional[int] = None) -> List[StoredChange]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT seq, tbl, op, row FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, -1 if limit is None else limit),
+            ).fetchall()
+        return [
+            StoredChange(seq, table, op, self._repos[table]._decode(json.loads(row)))
+            for seq, table, op, row in rows
+        ]
+
+
+class SQLiteStorage(Storage):
+    """Storage in a SQLite file, shareable between worker processes.
+
+    The last ``change_log_size`` writes are kept in the ``changes`` table.
+    """
+
+    blocking = True
+
+    def __init__(
+        self, path: str, pool_size: int = 8, change_log_size: int = 10_000
+    ) -> None:
+        self.max_concurrency = pool_size
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(path, pool_size)
+        self.users = SQLiteUserRepository(self.pool)
+        self.assets = SQLiteAssetRepository(self.pool)
+        self.checkouts = SQLiteCheckoutRepository(self.pool)
+        repos = (self.users, self.assets, self.checkouts)
+        self.changes = SQLiteChangeStore(self.pool, repos)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+            with conn:
+                conn.execute(
+                    "INSERT INTO versions VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+                    (EPOCH_TABLE, TABLE_SCOPE, secrets.randbits(32)),
+                )
+            for repo in repos:
+                conn.executescript(version_triggers(repo.table, repo.scope_field))
+            self._install_checkout_stats(conn)
+            self._install_changes(conn, repos, change_log_size)
+
+    def close(self) -> None:
+        self.pool.close()
+
+    @staticmethod
+    def _install_checkout_stats(conn: sqlite3.Connection) -> None:
+        # Workers starting together must not both run the backfill.
+        with _immediate(conn):
+            installed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'checkout_stats'"
+            ).fetchone()
+            if not installed:
+                for statement in CHECKOUT_STATS_SETUP:
+                    conn.execute(statement)
+
+    @staticmethod
+    def _install_changes(
+        conn: sqlite3.Connection, repos: Iterable[SQLiteRepository], retention: int
+    ) -> None:
+        with _immediate(conn):
+            # A new database numbers changes from the current time in
+            # microseconds, so cursors into a replaced file ask to resync.
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT 'changes', ?"
+                " WHERE NOT EXISTS"
+                " (SELECT 1 FROM sqlite_sequence WHERE name = 'changes')",
+                (time.time_ns() // 1000,),
+            )
+            # Recreated every start, so a changed retention takes effect.
+            for repo in repos:
+                columns = [c for c in repo.columns if c not in repo.private_columns]
+                for statement in change_triggers(repo.table, columns, retention):
+                    conn.execute(statement)
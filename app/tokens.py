@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+
+class TokenClaims(NamedTuple):
+    user_id: int
+    role: str
+    expires_at: int
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class TokenSigner:
+    """Issue and check ``<claims>.<HMAC-SHA256>`` bearer tokens.
+
+    Claims are ``user_id:role:expires_at`` (Unix seconds), URL-safe base64
+    like the signature. Checking a token is one HMAC over a few dozen bytes.
+    """
+
+    def __init__(self, secret: bytes, ttl: int) -> None:
+        self._secret = secret
+        self.ttl = ttl
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()
+
+    def issue(self, user_id: int, role: str, now: Optional[float] = None) -> str:
+        expires_at = int(time.time() if now is None else now) + self.ttl
+        payload = f"{user_id}:{role}:{expires_at}".encode()
+        return f"{_b64(payload)}.{_b64(self._sign(payload))}"
+
+    def verify(self, token: str, now: Optional[float] = None) -> Optional[TokenClaims]:
+        """Claims of a well-signed, unexpired token; ``None`` otherwise."""
+        try:
+            payload_b64, signature_b64 = token.split(".")
+            payload, signature = _unb64(payload_b64), _unb64(signature_b64)
+            if not hmac.compare_digest(self._sign(payload), signature):
+                return None
+            user_id, role, expires_at = payload.decode().split(":")
+            claims = TokenClaims(int(user_id), role, int(expires_at))
+        except ValueError:
+            return None
+        if claims.expires_at <= (time.time() if now is None else now):
+            return None
+        return claims
+
+
+class TokenAuthenticator:
+    """Bearer-token check with an LRU cache of tokens already verified.
+
+    A token is verified once: its signature and expiry are checked and
+    ``lookup`` confirms the user still exists with the signed role. The
+    claims are then cached under the SHA-256 of the token (the token itself
+    is not kept) until the token expires or ``cache_ttl`` seconds pass,
+    whichever comes first, so later requests of the session cost one hash
+    and a dict lookup. ``forget_user`` drops a user's entries when it is
+    changed or deleted here; ``cache_ttl`` bounds how long a change made by
+    another worker goes unnoticed. Invalid tokens are never cached.
+
+    Used from the event loop only, so it takes no locks.
+    """
+
+    def __init__(
+        self,
+        signer: TokenSigner,
+        lookup: Callable[[int], Awaitable[Optional[Dict]]],
+        cache_size: int,
+        cache_ttl: float,
+    ) -> None:
+        self.signer = signer
+        self.lookup = lookup
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Tuple[TokenClaims, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def authenticate(self, token: str) -> Optional[TokenClaims]:
+        digest = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        entry = self._entries.get(digest)
+        if entry is not None:
+            claims, valid_until = entry
+            if valid_until > now:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return claims
+            self._discard(digest)
+        self.misses += 1
+        claims = self.signer.verify(token, now)
+        if claims is None:
+            return None
+        record = await self.lookup(claims.user_id)
+        if record is None or record["role"] != claims.role:
+            return None
+        if self.cache_size:
+            self._entries[digest] = (
+                claims,
+                min(claims.expires_at, now + self.cache_ttl),
+            )
+            self._by_user.setdefault(claims.user_id, set()).add(digest)
+            while len(self._entries) > self.cache_size:
+                self._discard(next(iter(self._entries)))
+        return claims
+
+    def forget_user(self, user_id: int) -> None:
+        for digest in self._by_user.pop(user_id, ()):
+            self._entries.pop(digest, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _discard(self, digest: bytes) -> None:
+        claims, _ = self._entries.pop(digest)
+        digests = self._by_user.get(claims.user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[claims.user_id]
@@ -0,0 +1,49 @@
+"""Throughput of bulk vs single-item asset creation through the HTTP stack.
+
+    python -m benchmarks.bench_bulk [assets]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from app.bulk import MAX_BULK_ITEMS
+from app.main import _DB, app
+
+ADMIN_HEADERS = {"X-User-Id": "1", "X-User-Role": "admin"}
+
+
+def _payloads(count: int) -> list:
+    return [{"title": f"Asset {i}", "inv_id": f"INV-{i:06}"} for i in range(count)]
+
+
+def single(client: TestClient, payloads: list) -> None:
+    for payload in payloads:
+        client.post("/assets", json=payload, headers=ADMIN_HEADERS)
+
+
+def bulk(client: TestClient, payloads: list) -> None:
+    for start in range(0, len(payloads), MAX_BULK_ITEMS):
+        batch = payloads[start : start + MAX_BULK_ITEMS]
+        client.post("/assets/bulk", json=batch, headers=ADMIN_HEADERS)
+
+
+def main(count: int = 5000) -> None:
+    client = TestClient(app)
+    payloads = _payloads(count)
+    rates = {}
+    for name, func in (("single", single), ("bulk", bulk)):
+        _DB.reset()
+        started = time.perf_counter()
+        func(client, payloads)
+        rates[name] = count / (time.perf_counter() - started)
+        print(f"{name:>7}: {rates[name]:10.0f} assets/s")
+    print(f"speedup: {rates['bulk'] / rates['single']:.1f}x")
+    _DB.reset()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,86 @@
+"""Bytes per stored checkout: plain dicts vs ``CheckoutRecord``.
+
+Reports the records alone and the whole in-memory repository (records plus
+id order and indexes), measured with ``tracemalloc``. The history spreads
+over ``ASSETS`` assets and ``OWNERS`` owners.
+
+    python -m benchmarks.bench_checkout_memory [records]
+"""
+
+from __future__ import annotations
+
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Type
+
+from app.storage.memory import InMemoryCheckoutRepository
+from app.storage.records import CheckoutRecord
+
+STATUSES = ("active", "returned", "returned", "overdue")
+ASSETS = 2000
+OWNERS = 5000
+
+
+class DictCheckoutRepository(InMemoryCheckoutRepository):
+    """The previous layout: every checkout stored as a plain dict."""
+
+    def _new_record(self, data: Dict) -> Dict:
+        return data
+
+    def _sorted_value(self, field: str, record: Dict) -> Any:
+        return record[field]
+
+    def _count(self, record: Dict, delta: int) -> None:
+        super()._count(CheckoutRecord.from_dict(record), delta)
+
+
+def _checkouts(count: int) -> List[dict]:
+    # Distinct due dates, as in real history: one datetime per record.
+    start = datetime.now(timezone.utc)
+    return [
+        {
+            "id": i,
+            "asset_id": 1000 + i % ASSETS,
+            "due_at": start + timedelta(seconds=i),
+            "status": STATUSES[i % len(STATUSES)],
+            "owner_id": 1000 + i % OWNERS,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()  # noqa: F841 - must stay alive while measuring
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used
+
+
+def _repository(repo_type: Type[InMemoryCheckoutRepository], count: int) -> object:
+    repo = repo_type()
+    for data in _checkouts(count):
+        del data["id"]
+        data["status"] = "returned"  # one asset may hold one active checkout
+        repo.insert(data)
+    return repo
+
+
+def main(count: int = 100_000) -> None:
+    dicts = measure(lambda: _checkouts(count))
+    records = measure(
+        lambda: [CheckoutRecord.from_dict(data) for data in _checkouts(count)]
+    )
+    print(f"{'records':>12} {'dict':>8} {'compact':>8}  B/record")
+    print(f"{'alone':>12} {dicts / count:8.1f} {records / count:8.1f}")
+    with_indexes = [
+        measure(lambda: _repository(repo_type, count)) / count
+        for repo_type in (DictCheckoutRepository, InMemoryCheckoutRepository)
+    ]
+    print(f"{'repository':>12} {with_indexes[0]:8.1f} {with_indexes[1]:8.1f}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,83 @@
+"""Requests/sec of ``GET /assets`` under many concurrent clients.
+
+Compares the async application with the previous threadpool model, where
+the same route is a plain ``def`` that FastAPI runs on its worker threads.
+Both sides share one storage engine and serialize the same records.
+
+    python -m benchmarks.bench_concurrency [clients] [requests] [memory|sqlite]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app import main as app_main
+from app.pagination import Page, page_params, paginate
+from app.serialization import ASSETS_JSON, json_response
+from app.storage import AsyncStorage, InMemoryStorage, SQLiteStorage, Storage
+
+ASSETS = 1000
+
+
+def threadpool_app(engine: Storage) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/assets")
+    def get_assets(page: Page = Depends(page_params)):
+        assets = engine.assets.page(page.after_id, page.limit + 1)
+        assets, headers = paginate(assets, page)
+        return json_response(ASSETS_JSON.dump_many(assets), headers)
+
+    return app
+
+
+async def _client(client: httpx.AsyncClient, requests: int) -> None:
+    for _ in range(requests):
+        response = await client.get("/assets")
+        response.raise_for_status()
+
+
+async def run(app: FastAPI, clients: int, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(_client(client, requests) for _ in range(clients)))
+        return clients * requests / (time.perf_counter() - started)
+
+
+def _engine(backend: str, directory: str) -> Storage:
+    if backend == "sqlite":
+        return SQLiteStorage(str(Path(directory) / "bench.db"))
+    return InMemoryStorage()
+
+
+def main(clients: int = 500, requests: int = 10, backend: str = "sqlite") -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = _engine(backend, directory)
+        for i in range(ASSETS):
+            engine.assets.insert({"title": f"Asset {i}", "inv_id": f"INV-{i:06}"})
+        app_main._DB = AsyncStorage(engine)
+
+        print(f"{backend}, {clients} clients x {requests} requests")
+        rates = {}
+        for name, app in (
+            ("threadpool", threadpool_app(engine)),
+            ("async", app_main.app),
+        ):
+            rates[name] = asyncio.run(run(app, clients, requests))
+            print(f"{name:>10}: {rates[name]:8.0f} req/s")
+        print(f"   speedup: {rates['async'] / rates['threadpool']:.2f}x")
+        engine.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]), *sys.argv[3:4])
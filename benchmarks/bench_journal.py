@@ -0,0 +1,71 @@
+"""Write throughput and recovery time of the journaled in-memory storage.
+
+Inserts ``records`` checkouts into plain and journaled in-memory storage,
+then restarts the journaled one twice: replaying the whole log, and
+loading a snapshot.
+
+    python -m benchmarks.bench_journal [records]
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.storage import InMemoryStorage, JournaledStorage, Storage
+
+
+def _fill(engine: Storage, count: int) -> float:
+    due_at = datetime.now(timezone.utc) + timedelta(days=7)
+    started = time.perf_counter()
+    for i in range(count):
+        engine.checkouts.insert(
+            {
+                "asset_id": i + 1,
+                "due_at": due_at + timedelta(seconds=i % 3600),
+                "status": "active" if i % 10 else "returned",
+                "owner_id": i % 5000,
+            }
+        )
+    return time.perf_counter() - started
+
+
+def _reopen(directory: str, count: int) -> float:
+    started = time.perf_counter()
+    engine = JournaledStorage(directory, snapshot_every=count * 2)
+    elapsed = time.perf_counter() - started
+    assert len(engine.checkouts) == count
+    engine.close()
+    return elapsed
+
+
+def main(count: int = 1_000_000) -> None:
+    elapsed = _fill(InMemoryStorage(), count)
+    print(f"{'memory':>18}: {count / elapsed:10.0f} writes/s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = JournaledStorage(directory, snapshot_every=count * 2)
+        elapsed = _fill(engine, count)
+        started = time.perf_counter()
+        engine.sync()
+        synced = time.perf_counter() - started
+        print(f"{'journal':>18}: {count / elapsed:10.0f} writes/s")
+        print(f"{'final sync':>18}: {synced * 1e3:10.1f} ms")
+
+        started = time.perf_counter()
+        engine.snapshot()
+        print(f"{'snapshot':>18}: {time.perf_counter() - started:10.2f} s")
+        engine.close()
+        print(f"{'recover snapshot':>18}: {_reopen(directory, count):10.2f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = JournaledStorage(directory, snapshot_every=count * 2)
+        _fill(engine, count)
+        engine.close()
+        print(f"{'replay log':>18}: {_reopen(directory, count):10.2f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
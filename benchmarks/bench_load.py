@@ -0,0 +1,235 @@
+"""Load test of the CRUD endpoints against a local uvicorn server.
+
+Starts ``uvicorn app.main:app`` in a subprocess, seeds ``assets`` assets
+and ``checkouts`` active checkouts through the bulk endpoints, then runs
+``clients`` concurrent httpx clients for ``seconds``. Each client is a
+student who mostly reads (asset pages, single assets, own checkouts) and
+every tenth request checks its own asset out or returns it. Reports
+requests/s and p50/p95/p99 latency per operation, and exits with status
+1 if any request failed or any p95 exceeds the 500 ms CRUD budget
+(NFR-008), so it can gate a deploy.
+
+    python -m benchmarks.bench_load [clients] [seconds] [assets] [checkouts] [memory|sqlite]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+P95_BUDGET = 0.5
+STUDENTS = 100
+BULK = 1000
+ADMIN = {"X-User-Id": "1", "X-User-Role": "admin"}
+DUE_AT = "2030-01-01T00:00:00Z"
+
+
+def _student(user_id: int) -> Dict[str, str]:
+    return {"X-User-Id": str(user_id), "X-User-Role": "student"}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, backend: str, directory: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "STORAGE_BACKEND": backend,
+        "SQLITE_PATH": str(Path(directory) / "load.db"),
+        "JOURNAL_DIR": str(Path(directory) / "journal"),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.1)
+
+
+async def seed(client: httpx.AsyncClient, assets: int, checkouts: int) -> None:
+    for start in range(0, assets, BULK):
+        batch = [
+            {"title": f"Asset {i}", "inv_id": f"INV-{i:07}"}
+            for i in range(start, min(start + BULK, assets))
+        ]
+        response = await client.post("/assets/bulk", json=batch, headers=ADMIN)
+        response.raise_for_status()
+    by_student: Dict[int, List[dict]] = defaultdict(list)
+    for i in range(min(checkouts, assets)):
+        by_student[i % STUDENTS + 2].append({"asset_id": i + 1, "due_at": DUE_AT})
+    for user_id, items in by_student.items():
+        for start in range(0, len(items), BULK):
+            response = await client.post(
+                "/checkouts/bulk",
+                json=items[start : start + BULK],
+                headers=_student(user_id),
+            )
+            response.raise_for_status()
+
+
+async def run_client(
+    client: httpx.AsyncClient,
+    user_id: int,
+    own_asset: int,
+    assets: int,
+    deadline: float,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    headers = _student(user_id)
+    checkout_id = None
+    rng = random.Random(user_id)
+    step = 0
+    while time.perf_counter() < deadline:
+        step += 1
+        if step % 10 == 0 and checkout_id is None:
+            name, request = "POST /checkouts", client.post(
+                "/checkouts",
+                json={"asset_id": own_asset, "due_at": DUE_AT},
+                headers=headers,
+            )
+        elif step % 10 == 0:
+            name, request = "PUT /checkouts/{id}", client.put(
+                f"/checkouts/{checkout_id}",
+                json={"asset_id": own_asset, "due_at": DUE_AT, "status": "returned"},
+                headers=headers,
+            )
+        elif step % 3 == 0:
+            name, request = "GET /checkouts", client.get("/checkouts", headers=headers)
+        elif step % 3 == 1:
+            after_id = rng.randrange(max(assets - 100, 1))
+            name, request = "GET /assets", client.get(f"/assets?after_id={after_id}")
+        else:
+            name, request = "GET /assets/{id}", client.get(
+                f"/assets/{rng.randrange(1, assets + 1)}"
+            )
+        started = time.perf_counter()
+        response = await request
+        latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors[name] += 1
+        elif name == "POST /checkouts":
+            checkout_id = response.json()["id"]
+        elif name == "PUT /checkouts/{id}":
+            checkout_id = None
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return sorted_values[max(math.ceil(q * len(sorted_values)) - 1, 0)]
+
+
+async def run(
+    base_url: str, clients: int, seconds: float, assets: int, checkouts: int
+) -> bool:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30.0
+    ) as client:
+        await wait_ready(client)
+        started = time.perf_counter()
+        # One asset per client, past the seeded checkouts, for check-out/return.
+        await seed(client, assets + clients, checkouts)
+        print(f"seeded in {time.perf_counter() - started:.1f} s")
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        started = time.perf_counter()
+        deadline = started + seconds
+        await asyncio.gather(
+            *(
+                run_client(
+                    client,
+                    i % STUDENTS + 2,
+                    assets + i + 1,
+                    assets,
+                    deadline,
+                    latencies,
+                    errors,
+                )
+                for i in range(clients)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total / elapsed:.0f} req/s over {elapsed:.1f} s ({total} requests)")
+    print(
+        f"{'operation':>20} {'count':>7} {'errors':>7}"
+        f" {'p50, ms':>8} {'p95, ms':>8} {'p99, ms':>8}"
+    )
+    within_budget = True
+    for name in sorted(latencies):
+        values = sorted(latencies[name])
+        p95 = percentile(values, 0.95)
+        within_budget &= p95 <= P95_BUDGET and not errors[name]
+        print(
+            f"{name:>20} {len(values):>7} {errors[name]:>7}"
+            f" {percentile(values, 0.5) * 1e3:>8.1f} {p95 * 1e3:>8.1f}"
+            f" {percentile(values, 0.99) * 1e3:>8.1f}"
+        )
+    return within_budget
+
+
+def main(
+    clients: int = 50,
+    seconds: float = 10.0,
+    assets: int = 10_000,
+    checkouts: int = 5_000,
+    backend: str = "memory",
+) -> None:
+    port = _free_port()
+    print(f"{backend}, {clients} clients for {seconds:.0f} s")
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(port, backend, directory)
+        try:
+            ok = asyncio.run(
+                run(f"http://127.0.0.1:{port}", clients, seconds, assets, checkouts)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+    if not ok:
+        print(f"failed requests, or p95 over the {P95_BUDGET * 1e3:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:5]), *sys.argv[5:6])
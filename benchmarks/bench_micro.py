@@ -0,0 +1,125 @@
+"""Microbenchmarks of the per-request building blocks, in us per call.
+
+Seeds ``assets`` assets and ``checkouts`` active checkouts spread over 100
+students in the in-memory engine, then times the helpers the CRUD routes
+are made of: the active-checkout check, visibility-scoped listing,
+serialization of a page, and input validation. Each figure is the best
+of five runs, so background noise inflates it as little as possible.
+
+    python -m benchmarks.bench_micro [assets] [checkouts]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.main import _DB, _has_active_checkout, _visible_checkouts
+from app.models.asset import AssetCreate
+from app.models.checkout import CheckoutCreate
+from app.models.user import UserCreate
+from app.security import CurrentUser
+from app.serialization import ASSETS_JSON, CHECKOUTS_JSON
+
+STUDENTS = 100
+PAGE = 100
+ADMIN = CurrentUser(id=1, role="admin")
+STUDENT = CurrentUser(id=2, role="student")
+
+
+def seed(assets: int, checkouts: int) -> None:
+    _DB.reset()
+    engine = _DB.engine
+    for i in range(assets):
+        engine.assets.insert({"title": f"Asset {i}", "inv_id": f"INV-{i:06}"})
+    due_at = datetime.now(timezone.utc) + timedelta(days=7)
+    for i in range(min(checkouts, assets)):
+        engine.checkouts.insert(
+            {
+                "asset_id": i + 1,
+                "owner_id": i % STUDENTS + 2,
+                "due_at": due_at,
+                "status": "active",
+            }
+        )
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """Best time per call of ``func()`` in us, over ``repeat`` runs."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - started > 0.2:
+            break
+        number *= 2
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        runs.append((time.perf_counter() - started) / number)
+    return min(runs) * 1e6
+
+
+def best_of_async(make_coro, repeat: int = 5, number: int = 1000) -> float:
+    async def run() -> float:
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                await make_coro()
+            runs.append((time.perf_counter() - started) / number)
+        return min(runs) * 1e6
+
+    return asyncio.run(run())
+
+
+def main(assets: int = 20_000, checkouts: int = 10_000) -> None:
+    seed(assets, checkouts)
+    asset_page = _DB.engine.assets.page(0, PAGE)
+    checkout_page = _DB.engine.checkouts.page(0, PAGE)
+    user = {
+        "name": "Bench User",
+        "email": "bench@example.com",
+        "password": "password123",
+        "role": "student",
+    }
+    checkout = {"asset_id": 1, "due_at": "2030-01-01T00:00:00Z", "status": "active"}
+    cases = [
+        ("_has_active_checkout", best_of_async(lambda: _has_active_checkout(1))),
+        (
+            f"_visible_checkouts student ({PAGE})",
+            best_of_async(lambda: _visible_checkouts(STUDENT, limit=PAGE)),
+        ),
+        (
+            f"_visible_checkouts admin ({PAGE})",
+            best_of_async(lambda: _visible_checkouts(ADMIN, limit=PAGE)),
+        ),
+        (
+            f"ASSETS_JSON.dump_many ({PAGE})",
+            best_of(lambda: ASSETS_JSON.dump_many(asset_page)),
+        ),
+        (
+            f"CHECKOUTS_JSON.dump_many ({PAGE})",
+            best_of(lambda: CHECKOUTS_JSON.dump_many(checkout_page)),
+        ),
+        ("CHECKOUTS_JSON.dump", best_of(lambda: CHECKOUTS_JSON.dump(checkout_page[0]))),
+        ("UserCreate validation", best_of(lambda: UserCreate(**user))),
+        (
+            "AssetCreate validation",
+            best_of(lambda: AssetCreate(title="Laptop", inv_id="INV-000001")),
+        ),
+        ("CheckoutCreate validation", best_of(lambda: CheckoutCreate(**checkout))),
+    ]
+    print(f"{assets} assets, {checkouts} active checkouts, {STUDENTS} students")
+    for name, micros in cases:
+        print(f"{name:>36} {micros:>10.2f} us")
+    _DB.reset()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,72 @@
+"""Sustained password hashes/sec through ``PasswordHasher`` per pool size.
+
+Keeps every worker busy with ``hashes`` concurrent requests and reports
+throughput, throughput per worker (a worker holds one core while it
+hashes) and the latency a request sees, including queueing. Also checks
+that the event loop stays responsive: the worst delay of a 10 ms ticker
+running next to the hashes must stay near 10 ms.
+
+    python -m benchmarks.bench_passwords [hashes] [n]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+
+from app.passwords import PasswordHasher, ScryptCost
+
+
+async def _ticker(stop: asyncio.Event, delays: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        delays.append(time.perf_counter() - started)
+
+
+async def _timed_hash(hasher: PasswordHasher, password: str) -> float:
+    started = time.perf_counter()
+    await hasher.hash(password)
+    return time.perf_counter() - started
+
+
+async def run(workers: int, hashes: int, cost: ScryptCost) -> tuple:
+    hasher = PasswordHasher(cost, workers)
+    try:
+        # Warm up: spawn every worker before timing.
+        await asyncio.gather(*(hasher.hash("warmup") for _ in range(workers)))
+        stop, delays = asyncio.Event(), []
+        ticker = asyncio.create_task(_ticker(stop, delays))
+        started = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(_timed_hash(hasher, f"password{i}") for i in range(hashes))
+        )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticker
+    finally:
+        hasher.close()
+    latencies.sort()
+    return elapsed, latencies[len(latencies) // 2], latencies[-1], max(delays)
+
+
+def main(hashes: int = 40, n: int = ScryptCost().n) -> None:
+    cost = ScryptCost(n=n)
+    print(f"scrypt n={cost.n} r={cost.r} p={cost.p}, {hashes} hashes")
+    print(
+        f"{'workers':>8} {'hashes/s':>9} {'per worker':>11}"
+        f" {'p50, ms':>8} {'max, ms':>8} {'loop lag, ms':>13}"
+    )
+    for workers in sorted({1, os.cpu_count() or 1}):
+        elapsed, p50, worst, lag = asyncio.run(run(workers, hashes, cost))
+        rate = hashes / elapsed
+        print(
+            f"{workers:>8} {rate:>9.1f} {rate / workers:>11.1f}"
+            f" {p50 * 1e3:>8.0f} {worst * 1e3:>8.0f} {lag * 1e3:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""Per-item cost of serializing list responses, before and after.
+
+"model path" is what list endpoints used to do: build ``CheckoutOut``
+instances, let FastAPI validate them against ``response_model`` and encode
+them with ``jsonable_encoder`` + ``json.dumps``. "direct path" dumps the
+stored dicts with ``CHECKOUTS_JSON``.
+
+    python -m benchmarks.bench_serialization [items]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.checkout import CheckoutOut
+from app.serialization import CHECKOUTS_JSON
+
+RESPONSE_MODEL = TypeAdapter(List[CheckoutOut])
+
+
+def _records(count: int) -> list:
+    due_at = datetime.now(timezone.utc) + timedelta(days=7)
+    return [
+        {"id": i, "asset_id": i, "due_at": due_at, "status": "active", "owner_id": 2}
+        for i in range(1, count + 1)
+    ]
+
+
+def model_path(records: list) -> bytes:
+    models = [CheckoutOut(**record) for record in records]
+    validated = RESPONSE_MODEL.validate_python(models)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def direct_path(records: list) -> bytes:
+    return CHECKOUTS_JSON.dump_many(records)
+
+
+def main(items: int = 1000, repeats: int = 50) -> None:
+    records = _records(items)
+    assert json.loads(model_path(records)) == json.loads(direct_path(records))
+    for name, func in (("model path", model_path), ("direct path", direct_path)):
+        elapsed = min(timeit.repeat(lambda: func(records), number=1, repeat=repeats))
+        print(f"{name:>12}: {elapsed / items * 1e6:8.2f} us/item")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
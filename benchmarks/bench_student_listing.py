@@ -0,0 +1,64 @@
+"""Time a student's ``GET /checkouts`` while the global table grows.
+
+The student always owns the same number of checkouts; thanks to the
+owner index the listing latency must stay flat as other owners' history
+piles up.
+
+    python -m benchmarks.bench_student_listing [max_checkouts]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.main import _DB, _serialize_checkout, _visible_checkouts
+from app.security import CurrentUser
+
+STUDENT = CurrentUser(id=1, role="student")
+OWN_CHECKOUTS = 20
+REPEATS = 200
+
+
+def _seed(total: int) -> None:
+    _DB.reset()
+    due_at = datetime.now(timezone.utc) + timedelta(days=7)
+    for i in range(total):
+        owner_id = STUDENT.id if i % (total // OWN_CHECKOUTS) == 0 else 2 + i % 500
+        _DB.engine.checkouts.insert(
+            {
+                "asset_id": i + 1,
+                "due_at": due_at,
+                "status": "returned",
+                "owner_id": owner_id,
+            }
+        )
+
+
+async def _sample() -> list:
+    samples = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        checkouts = await _visible_checkouts(STUDENT, limit=100)
+        [_serialize_checkout(co) for co in checkouts]
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def measure(total: int) -> float:
+    _seed(total)
+    return statistics.median(asyncio.run(_sample()))
+
+
+def main(max_checkouts: int = 500_000) -> None:
+    print(f"{'checkouts':>10} {'median, us':>12}")
+    for total in (max_checkouts // 100, max_checkouts // 10, max_checkouts):
+        print(f"{total:>10} {measure(total) * 1e6:>12.1f}")
+    _DB.reset()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
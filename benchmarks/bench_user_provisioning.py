@@ -0,0 +1,58 @@
+"""Provision users through ``create_user`` and report per-user cost.
+
+With the email index a uniqueness check is O(1), so the per-user time
+must stay flat as the table grows (linear total time). Passwords are
+hashed at the cheapest scrypt cost so the KDF does not hide the storage
+cost; ``bench_passwords`` measures hashing itself.
+
+    python -m benchmarks.bench_user_provisioning [max_users]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("PASSWORD_SCRYPT_N", "2")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "1")
+
+from app.main import _DB, create_user  # noqa: E402
+from app.models.user import UserCreate  # noqa: E402
+from app.security import CurrentUser  # noqa: E402
+
+ADMIN = CurrentUser(id=1, role="admin")
+
+
+async def _create_all(payloads: list) -> None:
+    for payload in payloads:
+        await create_user(payload, ADMIN)
+
+
+def provision(count: int) -> float:
+    _DB.reset()
+    payloads = [
+        UserCreate(
+            name=f"User {i}",
+            email=f"user{i}@example.com",
+            password="password123",
+            role="student",
+        )
+        for i in range(count)
+    ]
+    started = time.perf_counter()
+    asyncio.run(_create_all(payloads))
+    return time.perf_counter() - started
+
+
+def main(max_users: int = 100_000) -> None:
+    print(f"{'users':>8} {'total, s':>10} {'per user, us':>14}")
+    for count in (max_users // 4, max_users // 2, max_users):
+        elapsed = provision(count)
+        print(f"{count:>8} {elapsed:>10.3f} {elapsed / count * 1e6:>14.2f}")
+    _DB.reset()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
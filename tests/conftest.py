@@ -1,12 +1,21 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
-from app.main import app
+# Set before ``app.config`` is first imported: the tests check behaviour,
+# not hashing strength, so new password hashes use the cheapest cost, and
+# most of them identify the caller with X-User-* headers.
+os.environ.setdefault("PASSWORD_SCRYPT_N", "16")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "1")
+os.environ.setdefault("HEADER_AUTH", "true")
 
 
 @pytest.fixture
 def client():
     """Фикстура для тестового клиента"""
+    from app.main import app
+
     return TestClient(app)
 
 
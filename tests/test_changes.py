@@ -0,0 +1,54 @@
+import json
+
+from app.changes import ChangeLog, encode_feed
+
+
+class TestChangeLog:
+    """Тесты журнала изменений"""
+
+    def test_reads_after_cursor(self):
+        log = ChangeLog(retention=10)
+        start = log.latest
+        assert not log.covers(0)
+        assert log.covers(start)
+        for record_id in (1, 2, 3):
+            log.append("assets", "insert", record_id, data=b"{}")
+        assert [change.id for change in log.after(start + 1)] == [2, 3]
+        assert list(log.after(log.latest)) == []
+
+    def test_old_cursor_needs_resync(self):
+        """Курсор старше хранимого окна требует полной синхронизации"""
+        log = ChangeLog(retention=3)
+        start = log.latest
+        for record_id in range(1, 6):
+            log.append("assets", "insert", record_id)
+        assert not log.covers(start)
+        assert log.covers(log.latest - 3)
+        assert [change.id for change in log.after(log.latest - 3)] == [3, 4, 5]
+        assert not log.covers(log.latest + 1)
+
+    def test_restart_invalidates_cursors(self):
+        """После перезапуска номера продолжают расти, старый курсор устаревает"""
+        before = ChangeLog(retention=3)
+        before.append("assets", "insert", 1)
+        after = ChangeLog(retention=3)
+        assert after.latest >= before.latest
+        assert not after.covers(before.latest - 1)
+
+    def test_encode_feed(self):
+        log = ChangeLog(retention=3)
+        changes = [
+            log.append("checkouts", "update", 7, scope=2, data=b'{"id":7}'),
+            log.append("checkouts", "delete", 7, scope=2),
+        ]
+        feed = json.loads(encode_feed(changes, log.latest, False))
+        assert feed["next"] == log.latest
+        assert feed["resync"] is False
+        assert feed["changes"][0] == {
+            "seq": changes[0].seq,
+            "collection": "checkouts",
+            "op": "update",
+            "id": 7,
+            "data": {"id": 7},
+        }
+        assert feed["changes"][1]["data"] is None
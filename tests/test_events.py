@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+from app.changes import ChangeLog
+from app.events import RESYNC_EVENT, Broadcaster, event_stream
+
+
+class TestBroadcaster:
+    """Тесты рассылки событий подписчикам"""
+
+    def _changes(self, count, scope=2):
+        log = ChangeLog(retention=100)
+        return log, [
+            log.append("checkouts", "update", record_id, scope, b"{}")
+            for record_id in range(1, count + 1)
+        ]
+
+    def test_fan_out_with_filter(self):
+        async def scenario():
+            broadcaster = Broadcaster(queue_size=10)
+            everything = broadcaster.subscribe(lambda change: True)
+            own = broadcaster.subscribe(lambda change: change.scope == 3)
+            _, changes = self._changes(2)
+            for change in changes:
+                broadcaster.publish(change)
+            return everything.queue.qsize(), own.queue.qsize()
+
+        assert asyncio.run(scenario()) == (2, 0)
+
+    def test_slow_subscriber_is_dropped(self):
+        """Отстающий подписчик отключается, не задерживая остальных"""
+
+        async def scenario():
+            broadcaster = Broadcaster(queue_size=2)
+            slow = broadcaster.subscribe(lambda change: True)
+            fast = broadcaster.subscribe(lambda change: True)
+            _, changes = self._changes(3)
+            received = []
+            for change in changes:
+                broadcaster.publish(change)
+                received.append(fast.queue.get_nowait())
+            return slow.lagged, len(broadcaster), received, broadcaster.dropped
+
+        lagged, subscribers, received, dropped = asyncio.run(scenario())
+        assert lagged
+        assert subscribers == 1
+        assert [change.id for change in received] == [1, 2, 3]
+        assert dropped == 1
+
+    def test_resync_ends_every_stream(self):
+        """Потерянные изменения завершают все потоки событием resync"""
+
+        async def scenario():
+            broadcaster = Broadcaster()
+            log, _ = self._changes(0)
+            stream = event_stream(broadcaster, lambda change: True, log)
+            first = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            broadcaster.resync()
+            return await first, len(broadcaster)
+
+        assert asyncio.run(scenario()) == (RESYNC_EVENT, 0)
+
+    def test_stream_ends_with_resync_when_lagging(self):
+        async def scenario():
+            broadcaster = Broadcaster(queue_size=2)
+            log, changes = self._changes(3)
+            stream = event_stream(broadcaster, lambda change: True, log)
+            first = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0)
+            for change in changes:
+                broadcaster.publish(change)
+            events = [await first]
+            async for event in stream:
+                events.append(event)
+            return events, len(broadcaster)
+
+        events, subscribers = asyncio.run(scenario())
+        assert events[0].startswith(b"id: ")
+        assert b"event: checkouts" in events[0]
+        assert events[-1] == RESYNC_EVENT
+        assert len(events) == 3
+        assert subscribers == 0
+
+    def test_replay_after_last_event_id(self):
+        """Переподключение с Last-Event-ID досылает пропущенные события"""
+
+        async def scenario(last_event_id):
+            broadcaster = Broadcaster()
+            log, changes = self._changes(3)
+            stream = event_stream(
+                broadcaster,
+                lambda change: change.id != 2,
+                log,
+                last_event_id(changes),
+                keepalive=0.01,
+            )
+            events = [await stream.__anext__() for _ in range(2)]
+            await stream.aclose()
+            return events, len(broadcaster)
+
+        events, subscribers = asyncio.run(scenario(lambda changes: changes[0].seq - 1))
+        assert [json.loads(event.split(b"data: ")[1])["id"] for event in events] == [
+            1,
+            3,
+        ]
+        assert subscribers == 0
+
+        events, _ = asyncio.run(scenario(lambda changes: 1))
+        assert events == [RESYNC_EVENT, b": keepalive\n\n"]
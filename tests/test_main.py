@@ -1,4 +1,9 @@
-from datetime import datetime, timedelta
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
 
 
 class TestHealthEndpoint:
@@ -22,6 +27,18 @@ class TestUserCRUD:
         assert data["email"] == test_user_data["email"]
         assert "id" in data
 
+    def test_password_stored_hashed(self, client, admin_headers, test_user_data):
+        """Пароль хранится только в виде хеша"""
+        from app.main import _DB
+        from app.passwords import verify_password
+
+        payload = {**test_user_data, "email": "hashed@example.com"}
+        user = client.post("/users", json=payload, headers=admin_headers).json()
+        assert "password" not in user
+        stored = _DB.engine.users.get(user["id"])["password"]
+        assert stored.startswith("scrypt$")
+        assert verify_password(test_user_data["password"], stored)
+
     def test_create_user_duplicate_email(self, client, admin_headers, test_user_data):
         """Нельзя создать пользователя с существующим email"""
         # Первый пользователь
@@ -48,12 +65,42 @@ class TestUserCRUD:
         users = response.json()
         assert len(users) > 0
         assert users[0]["email"] == test_user_data["email"]
+        assert "password" not in users[0]
 
     def test_get_users_as_user(self, client, user_headers):
         """Не-админ не может получить список пользователей"""
         response = client.get("/users", headers=user_headers)
         assert response.status_code == 403
 
+    def test_update_user_to_taken_email(self, client, admin_headers):
+        """Нельзя сменить email на уже занятый"""
+        first = {
+            "name": "First User",
+            "email": "first@example.com",
+            "password": "password123",
+            "role": "student",
+        }
+        second = {**first, "name": "Second User", "email": "second@example.com"}
+        client.post("/users", json=first, headers=admin_headers)
+        second_id = client.post("/users", json=second, headers=admin_headers).json()[
+            "id"
+        ]
+
+        response = client.put(
+            f"/users/{second_id}",
+            json={**second, "email": "FIRST@example.com"},
+            headers=admin_headers,
+        )
+        assert response.status_code == 400
+
+        response = client.put(
+            f"/users/{second_id}",
+            json={**second, "name": "Renamed"},
+            headers=admin_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["name"] == "Renamed"
+
     def test_get_nonexistent_user(self, client, admin_headers):
         """Получение несуществующего пользователя"""
         response = client.get("/users/999", headers=admin_headers)
@@ -123,6 +170,50 @@ class TestAssetCRUD:
         get_response = client.get(f"/assets/{asset_id}")
         assert get_response.status_code == 404
 
+    def test_get_assets_paginated(self, client, admin_headers):
+        """Постраничная выдача активов с фильтром по префиксу inv_id"""
+        for i in range(3):
+            client.post(
+                "/assets",
+                json={"title": f"Page {i}", "inv_id": f"PAGE-{i}"},
+                headers=admin_headers,
+            )
+
+        response = client.get("/assets", params={"inv_id_prefix": "page-", "limit": 2})
+        assert response.status_code == 200
+        first_page = response.json()
+        assert [a["inv_id"] for a in first_page] == ["PAGE-0", "PAGE-1"]
+        cursor = response.headers["X-Next-After-Id"]
+        assert cursor == str(first_page[-1]["id"])
+
+        response = client.get(
+            "/assets", params={"inv_id_prefix": "PAGE-", "limit": 2, "after_id": cursor}
+        )
+        assert [a["inv_id"] for a in response.json()] == ["PAGE-2"]
+        assert "X-Next-After-Id" not in response.headers
+
+    def test_get_assets_invalid_limit(self, client):
+        assert client.get("/assets", params={"limit": 0}).status_code == 422
+
+    def test_delete_asset_keeps_other_ids(self, client, admin_headers):
+        """Удаление не сдвигает id остальных активов"""
+        first = client.post(
+            "/assets",
+            json={"title": "First", "inv_id": "INV-A1"},
+            headers=admin_headers,
+        ).json()
+        second = client.post(
+            "/assets",
+            json={"title": "Second", "inv_id": "INV-A2"},
+            headers=admin_headers,
+        ).json()
+
+        client.delete(f"/assets/{first['id']}", headers=admin_headers)
+
+        response = client.get(f"/assets/{second['id']}")
+        assert response.status_code == 200
+        assert response.json()["inv_id"] == "INV-A2"
+
 
 class TestCheckoutCRUD:
     """Тесты CRUD операций для аренд"""
@@ -132,9 +223,7 @@ class TestCheckoutCRUD:
         # Очищаем базу данных
         from app.main import _DB
 
-        _DB["assets"].clear()
-        _DB["checkouts"].clear()
-        _DB["users"].clear()
+        _DB.reset()
 
     def test_create_checkout(
         self, client, user_headers, test_asset_data, test_checkout_data
@@ -361,3 +450,969 @@ class TestCheckoutCRUD:
             f"/checkouts/{checkout_id}", json=update_data, headers=user_headers
         )
         assert response.status_code == 400
+
+    def test_checkout_again_after_return(self, client, user_headers, test_asset_data):
+        """После возврата актив снова можно взять"""
+        asset_response = client.post(
+            "/assets",
+            json=test_asset_data,
+            headers={"X-User-Id": "1", "X-User-Role": "admin"},
+        )
+        asset_id = asset_response.json()["id"]
+        checkout_data = {
+            "asset_id": asset_id,
+            "due_at": (datetime.utcnow() + timedelta(days=7)).isoformat(),
+            "status": "active",
+        }
+        checkout_id = client.post(
+            "/checkouts", json=checkout_data, headers=user_headers
+        ).json()["id"]
+
+        client.put(
+            f"/checkouts/{checkout_id}",
+            json={**checkout_data, "status": "returned"},
+            headers=user_headers,
+        )
+
+        response = client.post("/checkouts", json=checkout_data, headers=user_headers)
+        assert response.status_code == 201
+
+    def test_filter_checkouts_by_status(self, client, user_headers, admin_headers):
+        """Фильтрация аренд по статусу"""
+        checkout_ids, asset_ids = [], []
+        for inv_id in ("FLT-1", "FLT-2"):
+            asset_id = client.post(
+                "/assets",
+                json={"title": inv_id, "inv_id": inv_id},
+                headers=admin_headers,
+            ).json()["id"]
+            checkout_data = {
+                "asset_id": asset_id,
+                "due_at": (datetime.utcnow() + timedelta(days=7)).isoformat(),
+                "status": "active",
+            }
+            response = client.post(
+                "/checkouts", json=checkout_data, headers=user_headers
+            )
+            checkout_ids.append(response.json()["id"])
+            asset_ids.append(asset_id)
+        client.put(
+            f"/checkouts/{checkout_ids[0]}",
+            json={**checkout_data, "asset_id": asset_ids[0], "status": "returned"},
+            headers=user_headers,
+        )
+
+        response = client.get(
+            "/checkouts", params={"status": "active"}, headers=user_headers
+        )
+        assert [c["id"] for c in response.json()] == [checkout_ids[1]]
+
+        response = client.get(
+            "/checkouts",
+            params={"due_before": (datetime.utcnow() + timedelta(days=1)).isoformat()},
+            headers=user_headers,
+        )
+        assert response.json() == []
+
+    def test_concurrent_checkouts_of_one_asset(
+        self, client, admin_headers, test_asset_data, test_checkout_data
+    ):
+        """Параллельные запросы на один актив: одна аренда, остальные 409"""
+        asset_id = client.post(
+            "/assets", json=test_asset_data, headers=admin_headers
+        ).json()["id"]
+        checkout_data = {**test_checkout_data, "asset_id": asset_id}
+
+        def attempt(user_id):
+            headers = {"X-User-Id": str(user_id), "X-User-Role": "student"}
+            return client.post("/checkouts", json=checkout_data, headers=headers)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            codes = [r.status_code for r in pool.map(attempt, range(2, 42))]
+
+        assert codes.count(201) == 1
+        assert codes.count(409) == len(codes) - 1
+
+
+class TestConditionalGet:
+    """Тесты ETag и If-None-Match"""
+
+    def setup_method(self):
+        from app.main import _DB
+
+        _DB.reset()
+
+    def test_unchanged_assets_not_modified(self, client, admin_headers):
+        client.post(
+            "/assets", json={"title": "A", "inv_id": "INV-A1"}, headers=admin_headers
+        )
+        response = client.get("/assets")
+        etag = response.headers["ETag"]
+
+        cached = client.get("/assets", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+        assert (
+            client.get("/assets", headers={"If-None-Match": f"W/{etag}"}).status_code
+            == 304
+        )
+        assert (
+            client.get("/assets", headers={"If-None-Match": f'"x", {etag}'}).status_code
+            == 304
+        )
+
+        client.post(
+            "/assets", json={"title": "B", "inv_id": "INV-B1"}, headers=admin_headers
+        )
+        fresh = client.get("/assets", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert len(fresh.json()) == 2
+        assert fresh.headers["ETag"] != etag
+
+    def test_asset_by_id(self, client, admin_headers):
+        asset = client.post(
+            "/assets", json={"title": "A", "inv_id": "INV-A1"}, headers=admin_headers
+        ).json()
+        response = client.get(f"/assets/{asset['id']}")
+        assert response.json() == asset
+        etag = response.headers["ETag"]
+        headers = {"If-None-Match": etag}
+        assert client.get(f"/assets/{asset['id']}", headers=headers).status_code == 304
+
+        client.put(
+            f"/assets/{asset['id']}",
+            json={"title": "New", "inv_id": "INV-A1"},
+            headers=admin_headers,
+        )
+        response = client.get(f"/assets/{asset['id']}", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["title"] == "New"
+
+    def test_checkouts_scoped_by_owner(self, client, admin_headers, user_headers):
+        """Чужие аренды не меняют ETag студента, но меняют ETag администратора"""
+        due_at = (datetime.now() + timedelta(days=1)).isoformat()
+        for inv_id in ("INV-A1", "INV-A2"):
+            client.post(
+                "/assets",
+                json={"title": inv_id, "inv_id": inv_id},
+                headers=admin_headers,
+            )
+        client.post(
+            "/checkouts", json={"asset_id": 1, "due_at": due_at}, headers=user_headers
+        )
+        student = client.get("/checkouts", headers=user_headers).headers["ETag"]
+        admin = client.get("/checkouts", headers=admin_headers).headers["ETag"]
+        assert student != admin
+
+        other_headers = {"X-User-Id": "3", "X-User-Role": "student"}
+        client.post(
+            "/checkouts", json={"asset_id": 2, "due_at": due_at}, headers=other_headers
+        )
+        response = client.get(
+            "/checkouts", headers={**user_headers, "If-None-Match": student}
+        )
+        assert response.status_code == 304
+        response = client.get(
+            "/checkouts", headers={**admin_headers, "If-None-Match": admin}
+        )
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+    def test_checkout_by_id_checks_owner(self, client, admin_headers, user_headers):
+        client.post(
+            "/assets", json={"title": "A", "inv_id": "INV-A1"}, headers=admin_headers
+        )
+        due_at = (datetime.now() + timedelta(days=1)).isoformat()
+        checkout = client.post(
+            "/checkouts", json={"asset_id": 1, "due_at": due_at}, headers=user_headers
+        ).json()
+        response = client.get(f"/checkouts/{checkout['id']}", headers=user_headers)
+        etag = response.headers["ETag"]
+        response = client.get(
+            f"/checkouts/{checkout['id']}",
+            headers={**user_headers, "If-None-Match": etag},
+        )
+        assert response.status_code == 304
+
+        other_headers = {"X-User-Id": "3", "X-User-Role": "student"}
+        response = client.get(
+            f"/checkouts/{checkout['id']}",
+            headers={**other_headers, "If-None-Match": "*"},
+        )
+        assert response.status_code == 403
+
+    def test_missing_record_not_modified_is_404(self, client, admin_headers):
+        """If-None-Match: * не скрывает отсутствие записи"""
+        headers = {"If-None-Match": "*"}
+        assert client.get("/assets/999", headers=headers).status_code == 404
+        response = client.get("/users/999", headers={**admin_headers, **headers})
+        assert response.status_code == 404
+
+    def test_users_require_admin(self, client, admin_headers, user_headers):
+        response = client.get("/users", headers=admin_headers)
+        etag = response.headers["ETag"]
+        response = client.get("/users", headers={**user_headers, "If-None-Match": etag})
+        assert response.status_code == 403
+
+
+class TestMetrics:
+    """Тесты эндпоинта /metrics"""
+
+    def test_requests_and_storage_recorded(self, client, admin_headers):
+        client.post(
+            "/assets",
+            json={"title": "Asset", "inv_id": "INV-M1"},
+            headers=admin_headers,
+        )
+        client.get("/assets/999")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert (
+            'http_responses_total{method="GET",route="/assets/{asset_id}",status="404"}'
+            in text
+        )
+        assert (
+            'http_request_duration_seconds_bucket{method="POST",route="/assets",le="+Inf"}'
+            in text
+        )
+        assert 'http_response_size_bytes_count{method="POST",route="/assets"}' in text
+        assert (
+            'storage_operation_seconds_count{collection="assets",operation="insert"}'
+            in text
+        )
+        assert 'serialize_seconds_count{model="AssetOut",shape="one"}' in text
+        assert 'cache_stat{cache="responses",stat="hits"}' in text
+        assert "http_requests_in_flight 1" in text
+
+    def test_unmatched_paths_share_label(self, client):
+        client.get("/no/such/path/1")
+        client.get("/no/such/path/2")
+        text = client.get("/metrics").text
+        assert 'route="<unmatched>",status="404"}' in text
+        assert "/no/such/path" not in text
+
+
+class TestProfiling:
+    """Тесты профилирования отдельных запросов"""
+
+    def test_admin_requests_profile(self, client, admin_headers):
+        import marshal
+
+        response = client.get("/assets", headers={**admin_headers, "X-Profile": "1"})
+        assert response.status_code == 200
+        profile_id = int(response.headers["X-Profile-Id"])
+
+        profiles = client.get("/profiles?route=/assets", headers=admin_headers).json()
+        assert profiles[0]["id"] == profile_id
+        assert profiles[0]["method"] == "GET"
+        assert profiles[0]["status_code"] == 200
+
+        report = client.get(
+            f"/profiles/{profile_id}?sort=tottime&limit=5", headers=admin_headers
+        )
+        assert "function calls" in report.text
+        assert "Ordered by: internal time" in report.text
+        raw = client.get(f"/profiles/{profile_id}?format=pstats", headers=admin_headers)
+        assert isinstance(marshal.loads(raw.content), dict)
+
+    def test_only_admin_can_profile(self, client, user_headers):
+        """Студент не может включить профилирование или читать профили"""
+        response = client.get("/assets", headers={**user_headers, "X-Profile": "1"})
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert client.get("/profiles", headers=user_headers).status_code == 403
+
+    def test_streams_not_profiled(self, client, admin_headers):
+        """Потоковые ответы не профилируются даже по запросу администратора"""
+        headers = {**admin_headers, "X-Profile": "1"}
+        response = client.get("/export/assets", headers=headers)
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert (
+            client.get("/profiles?route=/export/assets", headers=admin_headers).json()
+            == []
+        )
+
+    def test_unknown_profile(self, client, admin_headers):
+        assert client.get("/profiles/0", headers=admin_headers).status_code == 404
+
+
+class TestTokenAuth:
+    """Тесты аутентификации по токену"""
+
+    def setup_method(self):
+        from app.main import _DB
+
+        _DB.reset()
+
+    def _login(self, client, email="token@example.com", password="testpassword2"):
+        return client.post("/auth/token", json={"email": email, "password": password})
+
+    def _create(self, client, admin_headers, test_user_data, role="student"):
+        payload = {**test_user_data, "email": "token@example.com", "role": role}
+        return client.post("/users", json=payload, headers=admin_headers).json()
+
+    def test_bearer_token_identifies_user(self, client, admin_headers, test_user_data):
+        user = self._create(client, admin_headers, test_user_data, role="admin")
+        response = self._login(client, email="TOKEN@example.com")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["token_type"] == "bearer"
+        headers = {"Authorization": f"Bearer {body['access_token']}"}
+        assert client.get(f"/users/{user['id']}", headers=headers).json() == user
+
+    def test_wrong_credentials(self, client, admin_headers, test_user_data):
+        self._create(client, admin_headers, test_user_data)
+        assert self._login(client, password="wrongpassword1").status_code == 401
+        assert self._login(client, email="nobody@example.com").status_code == 401
+
+    def test_unknown_email_still_verifies(self, client, monkeypatch):
+        """Неизвестный email проверяется по подставному хешу, как и известный"""
+        from app.main import _PASSWORDS
+
+        verified = []
+
+        async def verify(password, encoded):
+            verified.append((password, encoded))
+            return False
+
+        monkeypatch.setattr(_PASSWORDS, "verify", verify)
+        assert self._login(client, email="nobody@example.com").status_code == 401
+        assert verified == [("testpassword2", _PASSWORDS.dummy)]
+        assert _PASSWORDS.dummy.startswith(f"scrypt${_PASSWORDS.cost.n}$")
+
+    def test_invalid_token_rejected(self, client):
+        for value in ("Bearer not-a-token", "Basic dXNlcjpwYXNz"):
+            response = client.get("/checkouts", headers={"Authorization": value})
+            assert response.status_code == 401
+            assert response.headers["WWW-Authenticate"] == "Bearer"
+
+    def test_missing_identity_rejected(self, client):
+        """Без токена и без X-User-* заголовков запрос получает 401, а не 500"""
+        for headers in ({}, {"X-User-Id": "1"}, {"X-User-Role": "admin"}):
+            response = client.get("/checkouts", headers=headers)
+            assert response.status_code == 401
+            assert response.headers["WWW-Authenticate"] == "Bearer"
+
+    def test_headers_off_by_default(self, client, admin_headers, monkeypatch):
+        """Без HEADER_AUTH заголовки X-User-* не дают доступа, в том числе к профилям"""
+        from app.config import Settings, settings
+
+        assert not Settings.from_env({}).header_auth
+        monkeypatch.setattr(settings, "header_auth", False)
+        for path in ("/checkouts", "/users", "/profiles"):
+            assert client.get(path, headers=admin_headers).status_code == 401
+        response = client.get("/assets", headers={**admin_headers, "X-Profile": "1"})
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+    def test_deleted_user_token_rejected(self, client, admin_headers, test_user_data):
+        """После удаления пользователя его токен перестаёт действовать"""
+        user = self._create(client, admin_headers, test_user_data)
+        token = self._login(client).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/checkouts", headers=headers).status_code == 200
+        client.delete(f"/users/{user['id']}", headers=admin_headers)
+        assert client.get("/checkouts", headers=headers).status_code == 401
+
+    def test_legacy_password_rehashed_on_login(self, client):
+        """Пароль, сохранённый открытым текстом, заменяется хешем при входе"""
+        from app.main import _DB
+
+        user = _DB.engine.users.insert(
+            {
+                "name": "Legacy",
+                "email": "token@example.com",
+                "password": "testpassword2",
+                "role": "student",
+            }
+        )
+        assert self._login(client).status_code == 200
+        stored = _DB.engine.users.get(user["id"])["password"]
+        assert stored.startswith("scrypt$")
+        assert self._login(client).status_code == 200
+
+    def test_rehash_skipped_after_concurrent_change(self, client, monkeypatch):
+        """Перехеширование не затирает новый пароль и не падает на удалённом"""
+        from app.main import _DB, _PASSWORDS
+
+        legacy = {"name": "Legacy", "email": "token@example.com", "role": "student"}
+        user = _DB.engine.users.insert({**legacy, "password": "testpassword2"})
+        verify = _PASSWORDS.verify_and_update
+        meanwhile = []
+
+        async def verify_then_write(password, encoded):
+            result = await verify(password, encoded)
+            meanwhile.pop()()
+            return result
+
+        monkeypatch.setattr(_PASSWORDS, "verify_and_update", verify_then_write)
+        meanwhile.append(
+            lambda: _DB.engine.users.update(user["id"], {"password": "changed"})
+        )
+        assert self._login(client).status_code == 200
+        assert _DB.engine.users.get(user["id"])["password"] == "changed"
+
+        user = _DB.engine.users.insert(
+            {**legacy, "email": "other@example.com", "password": "testpassword2"}
+        )
+        meanwhile.append(lambda: _DB.engine.users.delete(user["id"]))
+        assert self._login(client, email="other@example.com").status_code == 200
+        assert _DB.engine.users.get(user["id"]) is None
+
+
+class TestAssetResponseCache:
+    """Тесты кэша ответов для чтения активов"""
+
+    def setup_method(self):
+        from app.main import _DB, _RESPONSES
+
+        _DB.reset()
+        _RESPONSES.clear()
+
+    def _create(self, client, admin_headers, inv_id):
+        return client.post(
+            "/assets", json={"title": "Asset", "inv_id": inv_id}, headers=admin_headers
+        ).json()
+
+    def test_repeated_reads_hit(self, client, admin_headers):
+        from app.main import _RESPONSES
+
+        asset = self._create(client, admin_headers, "INV-1")
+        first = client.get("/assets")
+        hits = _RESPONSES.hits
+        second = client.get("/assets")
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert _RESPONSES.hits == hits + 1
+
+        client.get(f"/assets/{asset['id']}")
+        assert client.get(f"/assets/{asset['id']}").json() == asset
+        assert _RESPONSES.hits == hits + 2
+
+    def test_writes_invalidate_precisely(self, client, admin_headers):
+        """Изменение актива сбрасывает его запись и списки, но не другие активы"""
+        from app.main import _RESPONSES
+
+        first = self._create(client, admin_headers, "INV-1")
+        second = self._create(client, admin_headers, "INV-2")
+        client.get("/assets")
+        client.get(f"/assets/{first['id']}")
+        client.get(f"/assets/{second['id']}")
+
+        client.put(
+            f"/assets/{first['id']}",
+            json={"title": "Renamed", "inv_id": "INV-1"},
+            headers=admin_headers,
+        )
+        assert len(_RESPONSES) == 1
+        hits = _RESPONSES.hits
+        assert client.get(f"/assets/{second['id']}").json() == second
+        assert _RESPONSES.hits == hits + 1
+        assert client.get(f"/assets/{first['id']}").json()["title"] == "Renamed"
+        assert client.get("/assets").json()[0]["title"] == "Renamed"
+
+        client.delete(f"/assets/{second['id']}", headers=admin_headers)
+        assert client.get(f"/assets/{second['id']}").status_code == 404
+        assert len(client.get("/assets").json()) == 1
+
+    def test_writes_past_handlers_not_served_stale(self, client, admin_headers):
+        from app.main import _DB
+
+        asset = self._create(client, admin_headers, "INV-1")
+        client.get("/assets")
+        client.get(f"/assets/{asset['id']}")
+        _DB.engine.assets.update(asset["id"], {"title": "Direct"})
+        assert client.get("/assets").json()[0]["title"] == "Direct"
+        assert client.get(f"/assets/{asset['id']}").json()["title"] == "Direct"
+
+
+class TestChangeFeed:
+    """Тесты ленты изменений /changes"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_log(self, monkeypatch):
+        from app.changes import ChangeLog
+        from app.main import _DB
+
+        _DB.reset()
+        log = ChangeLog(retention=100)
+        monkeypatch.setattr("app.main._CHANGES", log)
+        return log
+
+    def _feed(self, client, headers, since, **params):
+        response = client.get(
+            "/changes", params={"since": since, **params}, headers=headers
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    def test_first_call_asks_for_resync(self, client, admin_headers, fresh_log):
+        feed = self._feed(client, admin_headers, 0)
+        assert feed == {"next": fresh_log.latest, "resync": True, "changes": []}
+
+    def test_admin_sees_every_write(
+        self, client, admin_headers, user_headers, test_user_data, fresh_log
+    ):
+        since = fresh_log.latest
+        user = client.post("/users", json=test_user_data, headers=admin_headers).json()
+        asset = client.post(
+            "/assets", json={"title": "Asset", "inv_id": "INV-1"}, headers=admin_headers
+        ).json()
+        due_at = (datetime.now() + timedelta(days=1)).isoformat()
+        checkout = client.post(
+            "/checkouts",
+            json={"asset_id": asset["id"], "due_at": due_at},
+            headers=user_headers,
+        ).json()
+        client.delete(f"/assets/{asset['id']}", headers=admin_headers)
+
+        feed = self._feed(client, admin_headers, since)
+        assert feed["resync"] is False
+        assert feed["next"] == fresh_log.latest
+        assert [(c["collection"], c["op"], c["id"]) for c in feed["changes"]] == [
+            ("users", "insert", user["id"]),
+            ("assets", "insert", asset["id"]),
+            ("checkouts", "insert", checkout["id"]),
+            ("assets", "delete", asset["id"]),
+        ]
+        assert feed["changes"][0]["data"] == user
+        assert "password" not in feed["changes"][0]["data"]
+        assert feed["changes"][2]["data"] == checkout
+        assert feed["changes"][3]["data"] is None
+        assert self._feed(client, admin_headers, feed["next"])["changes"] == []
+
+    def test_student_sees_assets_and_own_checkouts(
+        self, client, admin_headers, user_headers, test_user_data, fresh_log
+    ):
+        """Студент видит активы и свои аренды, но не пользователей и чужие аренды"""
+        since = fresh_log.latest
+        client.post("/users", json=test_user_data, headers=admin_headers)
+        due_at = (datetime.now() + timedelta(days=1)).isoformat()
+        other_headers = {"X-User-Id": "3", "X-User-Role": "student"}
+        for inv_id, headers in (("INV-1", user_headers), ("INV-2", other_headers)):
+            asset = client.post(
+                "/assets", json={"title": "A", "inv_id": inv_id}, headers=admin_headers
+            ).json()
+            client.post(
+                "/checkouts",
+                json={"asset_id": asset["id"], "due_at": due_at},
+                headers=headers,
+            )
+
+        feed = self._feed(client, user_headers, since)
+        assert [(c["collection"], c["op"]) for c in feed["changes"]] == [
+            ("assets", "insert"),
+            ("checkouts", "insert"),
+            ("assets", "insert"),
+        ]
+        assert feed["changes"][1]["data"]["owner_id"] == 2
+        assert feed["next"] == fresh_log.latest
+
+    def test_limit_pages_through_changes(self, client, admin_headers, fresh_log):
+        since = fresh_log.latest
+        for number in range(5):
+            client.post(
+                "/assets",
+                json={"title": "A", "inv_id": f"INV-{number}"},
+                headers=admin_headers,
+            )
+        ids = []
+        while True:
+            feed = self._feed(client, admin_headers, since, limit=2)
+            if not feed["changes"]:
+                break
+            ids.extend(change["id"] for change in feed["changes"])
+            since = feed["next"]
+        assert ids == [1, 2, 3, 4, 5]
+
+    def test_expired_cursor_asks_for_resync(self, client, admin_headers, monkeypatch):
+        from app.changes import ChangeLog
+
+        log = ChangeLog(retention=2)
+        monkeypatch.setattr("app.main._CHANGES", log)
+        since = log.latest
+        for number in range(3):
+            client.post(
+                "/assets",
+                json={"title": "A", "inv_id": f"INV-{number}"},
+                headers=admin_headers,
+            )
+        feed = self._feed(client, admin_headers, since)
+        assert feed == {"next": log.latest, "resync": True, "changes": []}
+
+    def test_overdue_sweep_is_recorded(self, client, admin_headers, user_headers):
+        from app.main import _SWEEPER
+
+        asset = client.post(
+            "/assets", json={"title": "A", "inv_id": "INV-1"}, headers=admin_headers
+        ).json()
+        due_at = datetime.now(timezone.utc) + timedelta(days=1)
+        checkout = client.post(
+            "/checkouts",
+            json={"asset_id": asset["id"], "due_at": due_at.isoformat()},
+            headers=user_headers,
+        ).json()
+        feed = self._feed(client, user_headers, 0)
+        asyncio.run(_SWEEPER.load())
+        assert asyncio.run(_SWEEPER.sweep(due_at + timedelta(seconds=1))) == 1
+
+        change = self._feed(client, user_headers, feed["next"])["changes"][-1]
+        assert (change["op"], change["id"]) == ("update", checkout["id"])
+        assert change["data"]["status"] == "overdue"
+
+
+class TestCheckoutEvents:
+    """Тесты потока событий аренд (SSE)"""
+
+    def setup_method(self):
+        from app.main import _DB
+
+        _DB.reset()
+
+    def test_events_scoped_to_caller(self, client, admin_headers, user_headers):
+        """Студент получает события только своих аренд, администратор — все"""
+        from app.main import _DB, _record_change, checkout_events
+        from app.models.user import UserRole
+        from app.security import CurrentUser
+
+        for number in (1, 2):
+            client.post(
+                "/assets",
+                json={"title": "A", "inv_id": f"INV-{number}"},
+                headers=admin_headers,
+            )
+        due_at = datetime.now(timezone.utc) + timedelta(days=1)
+
+        async def scenario():
+            streams = [
+                (
+                    await checkout_events(
+                        CurrentUser(id=user_id, role=role), last_event_id=None
+                    )
+                ).body_iterator
+                for user_id, role in ((2, UserRole.student), (1, UserRole.admin))
+            ]
+            waiting = [asyncio.ensure_future(stream.__anext__()) for stream in streams]
+            await asyncio.sleep(0)
+            for asset_id, owner_id in ((2, 3), (1, 2)):
+                record = await _DB.checkouts.insert(
+                    {
+                        "asset_id": asset_id,
+                        "due_at": due_at,
+                        "status": "active",
+                        "owner_id": owner_id,
+                    }
+                )
+                _record_change("checkouts", "insert", record)
+            student = [await waiting[0]]
+            admin = [await waiting[1], await streams[1].__anext__()]
+            for stream in streams:
+                await stream.aclose()
+            return student, admin
+
+        student, admin = asyncio.run(scenario())
+
+        def payload(event):
+            assert event.startswith(b"id: ")
+            return json.loads(event.split(b"data: ")[1])
+
+        assert [payload(event)["data"]["owner_id"] for event in student] == [2]
+        assert [payload(event)["data"]["owner_id"] for event in admin] == [3, 2]
+        assert payload(student[0])["op"] == "insert"
+
+
+class TestStats:
+    """Тесты эндпоинта статистики"""
+
+    def setup_method(self):
+        from app.main import _DB
+
+        _DB.reset()
+
+    def test_stats_follow_checkouts(self, client, admin_headers, user_headers):
+        for number in (1, 2):
+            client.post(
+                "/assets",
+                json={"title": "A", "inv_id": f"INV-{number}"},
+                headers=admin_headers,
+            )
+        due_at = datetime(2030, 1, 2, 10, tzinfo=timezone.utc)
+        checkouts = [
+            client.post(
+                "/checkouts",
+                json={"asset_id": asset_id, "due_at": due_at.isoformat()},
+                headers=user_headers,
+            ).json()
+            for asset_id in (1, 2)
+        ]
+        client.put(
+            f"/checkouts/{checkouts[0]['id']}",
+            json={"asset_id": 1, "due_at": due_at.isoformat(), "status": "returned"},
+            headers=user_headers,
+        )
+
+        response = client.get("/stats", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json() == {
+            "by_status": {"active": 1, "returned": 1, "overdue": 0},
+            "total": 2,
+            "active_by_asset": {"2": 1},
+            "active_by_owner": {"2": 1},
+            "due_per_day": {"2030-01-02": 2},
+        }
+        etag = response.headers["ETag"]
+        cached = client.get("/stats", headers={**admin_headers, "If-None-Match": etag})
+        assert cached.status_code == 304
+
+    def test_stats_require_admin(self, client, user_headers):
+        assert client.get("/stats", headers=user_headers).status_code == 403
+
+
+class TestOverdueSweeper:
+    """Тесты фонового перевода аренд в overdue"""
+
+    def setup_method(self):
+        from app.main import _DB
+
+        _DB.reset()
+
+    @pytest.fixture
+    def sweeper(self, monkeypatch):
+        from app.main import _DB
+        from app.overdue import OverdueSweeper
+
+        sweeper = OverdueSweeper(_DB.checkouts)
+        sweeper.running = True  # as if ``run`` had started; tests sweep by hand
+        monkeypatch.setattr("app.main._SWEEPER", sweeper)
+        return sweeper
+
+    def _checkout(self, client, admin_headers, user_headers, days):
+        asset = client.post(
+            "/assets",
+            json={"title": "Asset", "inv_id": f"INV-{days}"},
+            headers=admin_headers,
+        ).json()
+        due_at = datetime.now(timezone.utc) + timedelta(days=days)
+        return client.post(
+            "/checkouts",
+            json={"asset_id": asset["id"], "due_at": due_at.isoformat()},
+            headers=user_headers,
+        ).json()
+
+    def test_sweep_marks_only_due(self, client, sweeper, admin_headers, user_headers):
+        """Просроченными становятся только активные аренды с прошедшим сроком"""
+        first, second, third = (
+            self._checkout(client, admin_headers, user_headers, days)
+            for days in (1, 2, 3)
+        )
+        client.put(
+            f"/checkouts/{second['id']}",
+            json={**second, "status": "returned"},
+            headers=user_headers,
+        )
+        now = datetime.now(timezone.utc)
+
+        assert asyncio.run(sweeper.sweep(now + timedelta(days=2.5))) == 1
+        assert asyncio.run(sweeper.sweep(now + timedelta(days=2.5))) == 0
+        statuses = {
+            c["id"]: c["status"]
+            for c in client.get("/checkouts", headers=user_headers).json()
+        }
+        assert statuses == {
+            first["id"]: "overdue",
+            second["id"]: "returned",
+            third["id"]: "active",
+        }
+        assert len(sweeper) == 1
+
+        assert asyncio.run(sweeper.sweep(now + timedelta(days=4))) == 1
+        response = client.get(f"/checkouts/{third['id']}", headers=user_headers)
+        assert response.json()["status"] == "overdue"
+
+    def test_load_schedules_stored_checkouts(
+        self, client, sweeper, admin_headers, user_headers
+    ):
+        from app.main import _DB
+        from app.overdue import OverdueSweeper
+
+        checkout = self._checkout(client, admin_headers, user_headers, 1)
+        restarted = OverdueSweeper(_DB.checkouts)
+        asyncio.run(restarted.load())
+        assert len(restarted) == 1
+        assert asyncio.run(restarted.sweep(datetime.now(timezone.utc))) == 0
+        later = datetime.now(timezone.utc) + timedelta(days=2)
+        assert asyncio.run(restarted.sweep(later)) == 1
+        assert _DB.engine.checkouts.get(checkout["id"])["status"] == "overdue"
+
+    def test_track_needs_running_sweeper(
+        self, client, sweeper, admin_headers, user_headers
+    ):
+        """Без запущенного sweeper аренды не копятся в очереди"""
+        sweeper.running = False
+        self._checkout(client, admin_headers, user_headers, 1)
+        assert len(sweeper) == 0
+
+    def test_runs_with_app_lifespan(self):
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        with TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+
+
+class TestExport:
+    """Тесты потоковой выгрузки"""
+
+    def setup_method(self):
+        from app.main import _DB
+
+        _DB.reset()
+
+    def test_export_assets_ndjson(self, client, admin_headers, monkeypatch):
+        """NDJSON-выгрузка проходит по всем батчам"""
+        monkeypatch.setattr("app.export.EXPORT_BATCH_SIZE", 2)
+        for i in range(5):
+            client.post(
+                "/assets",
+                json={"title": f"Export {i}", "inv_id": f"EXP-{i}"},
+                headers=admin_headers,
+            )
+
+        response = client.get(
+            "/export/assets",
+            headers={**admin_headers, "Accept": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [a["inv_id"] for a in lines] == [f"EXP-{i}" for i in range(5)]
+
+    def test_export_checkouts_json_array(
+        self, client, admin_headers, user_headers, test_checkout_data
+    ):
+        asset_id = client.post(
+            "/assets",
+            json={"title": "Export", "inv_id": "EXP-1"},
+            headers=admin_headers,
+        ).json()["id"]
+        test_checkout_data["asset_id"] = asset_id
+        client.post("/checkouts", json=test_checkout_data, headers=user_headers)
+
+        response = client.get("/export/checkouts", headers=admin_headers)
+        assert response.status_code == 200
+        assert [c["asset_id"] for c in response.json()] == [asset_id]
+
+    def test_export_empty(self, client, admin_headers):
+        assert client.get("/export/assets", headers=admin_headers).json() == []
+
+    def test_export_requires_admin(self, client, user_headers):
+        assert client.get("/export/checkouts", headers=user_headers).status_code == 403
+
+
+class TestBulk:
+    """Тесты пакетного создания и обновления"""
+
+    def setup_method(self):
+        from app.main import _DB
+
+        _DB.reset()
+
+    def test_bulk_create_assets_per_item_results(self, client, admin_headers):
+        """Невалидные элементы не мешают остальным"""
+        response = client.post(
+            "/assets/bulk",
+            json=[
+                {"title": "Laptop", "inv_id": "LAP-001"},
+                {"title": "Broken", "inv_id": "x"},
+                {"title": "Projector", "inv_id": "PRJ-001"},
+            ],
+            headers=admin_headers,
+        )
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status_code"] for r in results] == [201, 422, 201]
+        assert results[1]["detail"][0]["loc"] == ["inv_id"]
+        assert len(client.get("/assets").json()) == 2
+
+    def test_bulk_create_users_duplicate_email(
+        self, client, admin_headers, test_user_data
+    ):
+        response = client.post(
+            "/users/bulk",
+            json=[test_user_data, {**test_user_data, "email": "TEST@example.com"}],
+            headers=admin_headers,
+        )
+        assert [r["status_code"] for r in response.json()] == [201, 400]
+
+    def test_bulk_users_stored_hashed(self, client, admin_headers, test_user_data):
+        from app.main import _DB
+
+        users = [{**test_user_data, "email": f"bulk{i}@example.com"} for i in range(3)]
+        results = client.post("/users/bulk", json=users, headers=admin_headers).json()
+        stored = [_DB.engine.users.get(r["id"])["password"] for r in results]
+        assert all(password.startswith("scrypt$") for password in stored)
+        assert len(set(stored)) == 3
+
+    def test_bulk_update_assets(self, client, admin_headers):
+        asset_id = client.post(
+            "/assets", json={"title": "Old", "inv_id": "OLD-001"}, headers=admin_headers
+        ).json()["id"]
+
+        response = client.put(
+            "/assets/bulk",
+            json=[
+                {"id": asset_id, "data": {"title": "New", "inv_id": "NEW-001"}},
+                {"id": 999, "data": {"title": "Missing", "inv_id": "MIS-001"}},
+            ],
+            headers=admin_headers,
+        )
+        assert [r["status_code"] for r in response.json()] == [200, 404]
+        assert client.get(f"/assets/{asset_id}").json()["title"] == "New"
+
+    def test_bulk_checkouts_conflict(
+        self, client, admin_headers, user_headers, test_checkout_data
+    ):
+        """Конфликт по активу проверяется и внутри пакета"""
+        asset_id = client.post(
+            "/assets",
+            json={"title": "Asset", "inv_id": "AST-001"},
+            headers=admin_headers,
+        ).json()["id"]
+        test_checkout_data["asset_id"] = asset_id
+
+        response = client.post(
+            "/checkouts/bulk",
+            json=[test_checkout_data, test_checkout_data],
+            headers=user_headers,
+        )
+        results = response.json()
+        assert [r["status_code"] for r in results] == [201, 409]
+
+        response = client.put(
+            "/checkouts/bulk",
+            json=[
+                {
+                    "id": results[0]["id"],
+                    "data": {**test_checkout_data, "status": "returned"},
+                }
+            ],
+            headers=user_headers,
+        )
+        assert response.json()[0]["status_code"] == 200
+
+    def test_bulk_requires_admin(self, client, user_headers, test_asset_data):
+        response = client.post(
+            "/assets/bulk", json=[test_asset_data], headers=user_headers
+        )
+        assert response.status_code == 403
+
+    def test_bulk_size_limit(self, client, admin_headers, test_asset_data):
+        response = client.post(
+            "/assets/bulk", json=[test_asset_data] * 1001, headers=admin_headers
+        )
+        assert response.status_code == 422
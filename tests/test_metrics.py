@@ -0,0 +1,50 @@
+import pytest
+
+from app.metrics import Metric, Registry
+
+
+class TestMetricsRegistry:
+    """Тесты метрик в текстовом формате Prometheus"""
+
+    def test_histogram_buckets_cumulative(self):
+        registry = Registry()
+        latency = registry.histogram(
+            "latency_seconds", "Latency.", ("route",), (0.1, 1)
+        )
+        series = latency.labels("/a")
+        for value in (0.05, 0.1, 0.5, 2):
+            series.observe(value)
+        assert series.count == 4
+        lines = registry.render().decode().splitlines()
+        assert lines[:2] == [
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+        ]
+        assert lines[2:] == [
+            'latency_seconds_bucket{route="/a",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a",le="1"} 3',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a"} 2.65',
+            'latency_seconds_count{route="/a"} 4',
+        ]
+
+    def test_counters_gauges_and_collected(self):
+        registry = Registry()
+        requests = registry.counter("requests_total", "Requests.", ("path",))
+        requests.labels('say "hi"\n').inc()
+        assert registry.counter("requests_total", "Requests.", ("path",)) is requests
+        gauge = registry.gauge("in_flight", "In flight.").labels()
+        gauge.inc(3)
+        gauge.dec()
+        registry.collected("size", "Size.", ("cache",), lambda: [(("a",), 7)])
+        text = registry.render().decode()
+        assert 'requests_total{path="say \\"hi\\"\\n"} 1' in text
+        assert "in_flight 2" in text
+        assert 'size{cache="a"} 7' in text
+
+    def test_only_series_metrics_have_labels(self):
+        """У вычисляемой метрики нет labels(), а Metric нельзя создать без типа серии"""
+        collected = Registry().collected("size", "Size.", ("cache",), list)
+        assert not hasattr(collected, "labels")
+        with pytest.raises(TypeError):
+            Metric("untyped", "Untyped.")
@@ -1,5 +1,13 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.cache import ResponseCache
 from app.main import _DB, _has_active_checkout
-from app.models.checkout import CheckoutStatus, can_transition
+from app.models.checkout import CheckoutOut, CheckoutStatus, can_transition
+from app.models.user import UserOut
+from app.serialization import CHECKOUTS_JSON, USERS_JSON
+from app.storage.records import CheckoutRecord
 
 
 class TestCheckoutLogic:
@@ -33,22 +41,120 @@ class TestCheckoutLogic:
 class TestHelperFunctions:
     """Тесты вспомогательных функций"""
 
+    @staticmethod
+    def _checkout(asset_id, status, owner_id=2):
+        return {
+            "asset_id": asset_id,
+            "due_at": datetime.now(timezone.utc) + timedelta(days=7),
+            "status": status,
+            "owner_id": owner_id,
+        }
+
     def test_has_active_checkout_empty(self):
         """Проверка на пустом списке аренд"""
-        _DB["checkouts"] = []
-        assert not _has_active_checkout(1)
+        _DB.reset()
+        assert not asyncio.run(_has_active_checkout(1))
 
     def test_has_active_checkout_active(self):
         """Проверка при активной аренде"""
-        _DB["checkouts"] = [
-            {"asset_id": 1, "status": "active"},
-            {"asset_id": 2, "status": "returned"},
-        ]
+        _DB.reset()
+        _DB.engine.checkouts.insert(self._checkout(1, "active"))
+        _DB.engine.checkouts.insert(self._checkout(2, "returned"))
 
-        assert _has_active_checkout(1)
-        assert not _has_active_checkout(2)
+        assert asyncio.run(_has_active_checkout(1))
+        assert not asyncio.run(_has_active_checkout(2))
 
     def test_has_active_checkout_overdue(self):
         """Проверка при просроченной аренде"""
-        _DB["checkouts"] = [{"asset_id": 1, "status": "overdue"}]
-        assert _has_active_checkout(1)
+        _DB.reset()
+        _DB.engine.checkouts.insert(self._checkout(1, "overdue"))
+        assert asyncio.run(_has_active_checkout(1))
+
+
+class TestSerialization:
+    """Тесты прямой сериализации записей"""
+
+    def test_checkout_matches_model(self):
+        record = {
+            "id": 1,
+            "asset_id": 2,
+            "due_at": datetime.now(timezone.utc),
+            "status": "overdue",
+            "owner_id": 3,
+        }
+        assert json.loads(CHECKOUTS_JSON.dump(record)) == json.loads(
+            CheckoutOut(**record).model_dump_json()
+        )
+
+    def test_user_drops_password(self):
+        """Пароль не попадает в ответ"""
+        record = {
+            "id": 1,
+            "name": "Test",
+            "email": "t@example.com",
+            "password": "secret123",
+            "role": "admin",
+        }
+        dumped = json.loads(USERS_JSON.dump_many([record]))
+        assert dumped == [json.loads(UserOut(**record).model_dump_json())]
+
+    def test_compact_checkout_record(self):
+        """Компактная запись аренды читается и сериализуется как словарь"""
+        data = {
+            "id": 7,
+            "asset_id": 2,
+            "due_at": datetime(2030, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            "status": "returned",
+            "owner_id": 3,
+        }
+        record = CheckoutRecord.from_dict(data)
+        assert dict(record) == data
+        assert record["status"] == "returned"
+        assert CHECKOUTS_JSON.dump_many([record]) == CHECKOUTS_JSON.dump_many([data])
+
+        record.update({"status": "active", "due_at": data["due_at"] + timedelta(1)})
+        assert record["status"] == "active"
+        assert record["due_at"] == data["due_at"] + timedelta(days=1)
+        assert CheckoutOut(**record).status == CheckoutStatus.active
+
+
+class TestResponseCache:
+    """Тесты LRU-кэша закодированных ответов"""
+
+    def test_hit_requires_same_version(self):
+        cache = ResponseCache(max_bytes=10_000)
+        cache.put("a", "v1", b"body", {"X-Next-After-Id": "5"})
+        assert cache.get("a", "v1").body == b"body"
+        assert cache.get("a", "v1").headers == {"X-Next-After-Id": "5"}
+        assert cache.get("a", "v2") is None
+        assert cache.get("b", "v1") is None
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_evicts_least_recently_used(self):
+        """При превышении бюджета вытесняются давно не читавшиеся записи"""
+        cache = ResponseCache(max_bytes=3 * (ResponseCache.entry_overhead + 10))
+        for key in "abc":
+            cache.put(key, "v", b"x" * 10)
+        cache.get("a", "v")
+        cache.put("d", "v", b"x" * 10)
+        assert cache.get("b", "v") is None
+        assert all(cache.get(key, "v") for key in "acd")
+        assert cache.evictions == 1
+        assert cache.size <= cache.max_bytes
+
+    def test_oversized_body_not_stored(self):
+        cache = ResponseCache(max_bytes=100)
+        entry = cache.put("a", "v", b"x" * 100)
+        assert entry.body == b"x" * 100
+        assert len(cache) == 0
+        assert ResponseCache(max_bytes=0).put("a", "v", b"").body == b""
+
+    def test_invalidate_by_tag(self):
+        cache = ResponseCache(max_bytes=10_000)
+        cache.put("list", "v", b"[]", tags=("assets",))
+        cache.put("one", "v", b"{}", tags=(("assets", 1),))
+        cache.put("two", "v", b"{}", tags=(("assets", 2),))
+        cache.invalidate("assets", ("assets", 1))
+        assert [key for key in ("list", "one", "two") if cache.get(key, "v")] == ["two"]
+        assert cache.invalidations == 2
+        assert cache.stats()["entries"] == 1
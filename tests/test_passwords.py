@@ -0,0 +1,57 @@
+import asyncio
+
+from app.passwords import (
+    PasswordHasher,
+    ScryptCost,
+    dummy_hash,
+    hash_password,
+    needs_rehash,
+    verify_password,
+)
+
+
+class TestPasswords:
+    """Тесты хеширования паролей"""
+
+    cost = ScryptCost(n=16, r=1, p=1)
+
+    def test_hash_and_verify(self):
+        encoded = hash_password("secret123", self.cost)
+        assert encoded.startswith("scrypt$16$1$1$")
+        assert "secret123" not in encoded
+        assert verify_password("secret123", encoded)
+        assert not verify_password("secret124", encoded)
+        assert hash_password("secret123", self.cost) != encoded
+
+    def test_needs_rehash(self):
+        """Хеш со старыми параметрами или открытый пароль требуют перехеширования"""
+        encoded = hash_password("secret123", self.cost)
+        assert not needs_rehash(encoded, self.cost)
+        assert needs_rehash(encoded, self.cost._replace(n=32))
+        assert needs_rehash("secret123", self.cost)
+        assert verify_password("secret123", "secret123")
+
+    def test_dummy_hash_matches_nothing(self):
+        """Подставной хеш имеет текущие параметры, но не подходит ни к какому паролю"""
+        encoded = dummy_hash(self.cost)
+        assert encoded.startswith("scrypt$16$1$1$")
+        assert not needs_rehash(encoded, self.cost)
+        assert not verify_password("", encoded)
+        assert dummy_hash(self.cost) != encoded
+
+    def test_verify_and_update_in_pool(self):
+        async def scenario():
+            hasher = PasswordHasher(self.cost._replace(n=32), workers=1)
+            try:
+                old = hash_password("secret123", self.cost)
+                ok, upgraded = await hasher.verify_and_update("secret123", old)
+                current = await hasher.verify_and_update("secret123", upgraded)
+                wrong = await hasher.verify_and_update("secret124", old)
+                return ok, upgraded, current, wrong
+            finally:
+                hasher.close()
+
+        ok, upgraded, current, wrong = asyncio.run(scenario())
+        assert ok and upgraded.startswith("scrypt$32$1$1$")
+        assert current == (True, None)
+        assert wrong == (False, None)
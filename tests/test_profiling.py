@@ -0,0 +1,18 @@
+from app.profiling import Profile, ProfileStore
+
+
+class TestProfileStore:
+    """Тесты хранилища профилей"""
+
+    def _profile(self, store, route):
+        return Profile(store.next_id(), "GET", route, 200, 0.01, 0.0, b"")
+
+    def test_keeps_latest(self):
+        store = ProfileStore(keep=2)
+        profiles = [self._profile(store, route) for route in ("/a", "/b", "/a")]
+        for profile in profiles:
+            store.add(profile)
+        assert store.list() == [profiles[2], profiles[1]]
+        assert store.list("/a") == [profiles[2]]
+        assert store.get(profiles[0].id) is None
+        assert store.get(profiles[1].id) == profiles[1]
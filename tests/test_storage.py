@@ -0,0 +1,685 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import Settings
+from app.storage import (
+    AsyncStorage,
+    DuplicateKeyError,
+    InMemoryStorage,
+    JournaledStorage,
+    SQLiteStorage,
+    create_storage,
+)
+
+
+@pytest.fixture(params=["memory", "journal", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryStorage()
+        return
+    if request.param == "journal":
+        engine = JournaledStorage(str(tmp_path / "journal"))
+    else:
+        engine = SQLiteStorage(str(tmp_path / "test.db"), pool_size=2)
+    yield engine
+    engine.close()
+
+
+def _user(name, email):
+    return {"name": name, "email": email, "password": "password123", "role": "student"}
+
+
+def _checkout(asset_id, owner_id, status="active"):
+    return {
+        "asset_id": asset_id,
+        "due_at": datetime.now(timezone.utc) + timedelta(days=7),
+        "status": status,
+        "owner_id": owner_id,
+    }
+
+
+class TestStorage:
+    """Тесты движков хранения и их индексов"""
+
+    def test_insert_and_get(self, storage):
+        record = storage.assets.insert({"title": "Projector", "inv_id": "INV-001"})
+        assert record["id"] == 1
+        assert storage.assets.get(1) == record
+        assert storage.assets.get(2) is None
+
+    def test_user_email_index(self, storage):
+        """Индекс email обновляется при изменении и удалении"""
+        user = storage.users.insert(_user("A", "a@example.com"))
+        assert storage.users.get_by_email("a@example.com") == user
+
+        storage.users.update(user["id"], {"email": "b@example.com"})
+        assert storage.users.get_by_email("a@example.com") is None
+        assert storage.users.get_by_email("b@example.com")["id"] == user["id"]
+
+        storage.users.delete(user["id"])
+        assert storage.users.get_by_email("b@example.com") is None
+
+    def test_user_email_unique(self, storage):
+        """Email уникален с учётом нормализации"""
+        first = storage.users.insert(_user("A", "a@example.com"))
+        second = storage.users.insert(_user("B", "b@example.com"))
+
+        with pytest.raises(DuplicateKeyError):
+            storage.users.insert(_user("C", " A@Example.com"))
+        with pytest.raises(DuplicateKeyError):
+            storage.users.update(second["id"], {"email": "a@example.com"})
+
+        storage.users.update(first["id"], {"name": "A2", "email": "a@example.com"})
+        assert storage.users.get_by_email("A@EXAMPLE.COM")["name"] == "A2"
+        assert storage.users.get_by_email("b@example.com")["id"] == second["id"]
+
+    def test_checkouts_by_owner(self, storage):
+        storage.checkouts.insert(_checkout(1, owner_id=2))
+        storage.checkouts.insert(_checkout(2, owner_id=3))
+        storage.checkouts.insert(_checkout(3, owner_id=2))
+
+        assert [c["asset_id"] for c in storage.checkouts.list_by_owner(2)] == [1, 3]
+        assert storage.checkouts.list_by_owner(99) == []
+
+    def test_owner_index_follows_changes(self, storage):
+        """Индекс владельца обновляется при изменении и удалении"""
+        first = storage.checkouts.insert(_checkout(1, owner_id=2))
+        second = storage.checkouts.insert(_checkout(2, owner_id=2))
+
+        storage.checkouts.update(first["id"], {"owner_id": 3})
+        storage.checkouts.delete(second["id"])
+
+        assert storage.checkouts.list_by_owner(2) == []
+        assert [c["id"] for c in storage.checkouts.list_by_owner(3)] == [first["id"]]
+
+    def test_has_active_follows_status(self, storage):
+        """Индекс активных аренд следует переходам статусов"""
+        checkout = storage.checkouts.insert(_checkout(1, owner_id=2))
+        assert storage.checkouts.has_active(1)
+
+        storage.checkouts.update(checkout["id"], {"status": "overdue"})
+        assert storage.checkouts.get_active(1)["id"] == checkout["id"]
+
+        storage.checkouts.update(checkout["id"], {"status": "returned"})
+        assert not storage.checkouts.has_active(1)
+        assert storage.checkouts.get_active(1) is None
+
+    def test_transition_compares_status(self, storage):
+        """Переход статуса срабатывает только из ожидаемого статуса"""
+        checkout = storage.checkouts.insert(_checkout(1, owner_id=2))
+
+        changed = storage.checkouts.transition(checkout["id"], "active", "overdue")
+        assert changed["status"] == "overdue"
+        assert storage.checkouts.get_active(1)["id"] == checkout["id"]
+        assert storage.checkouts.transition(checkout["id"], "active", "overdue") is None
+        assert storage.checkouts.transition(42, "active", "overdue") is None
+        assert storage.checkouts.query(status="overdue") == [changed]
+
+        storage.checkouts.transition(checkout["id"], "overdue", "returned")
+        storage.checkouts.insert(_checkout(1, owner_id=3))
+        with pytest.raises(DuplicateKeyError):
+            storage.checkouts.transition(checkout["id"], "returned", "active")
+
+    def test_replace_if_compares_value(self, storage):
+        """replace_if пишет, только если поле не изменилось"""
+        user = storage.users.insert(_user("A", "a@example.com"))
+        changed = storage.users.replace_if(user["id"], "password", "password123", "x")
+        assert changed["password"] == "x"
+        stale = storage.users.replace_if(user["id"], "password", "password123", "y")
+        assert stale is None
+        assert storage.users.get(user["id"])["password"] == "x"
+        assert storage.users.replace_if(42, "password", "x", "y") is None
+
+        checkout = storage.checkouts.insert(_checkout(1, owner_id=2))
+        storage.checkouts.replace_if(checkout["id"], "status", "active", "returned")
+        assert not storage.checkouts.has_active(1)
+        moved = storage.checkouts.replace_if(checkout["id"], "owner_id", 2, 3)
+        assert moved["owner_id"] == 3
+
+    def test_versions_follow_writes(self, storage):
+        """Версия меняется при записи, а версия владельца — только при его записях"""
+        empty, assets = storage.checkouts.version(), storage.assets.version()
+        first = storage.checkouts.insert(_checkout(1, owner_id=2))
+        table, owner = storage.checkouts.version(), storage.checkouts.version(2)
+        assert table != empty
+
+        storage.checkouts.insert(_checkout(2, owner_id=3))
+        assert storage.checkouts.version() != table
+        assert storage.checkouts.version(2) == owner
+
+        storage.checkouts.transition(first["id"], "active", "returned")
+        assert storage.checkouts.version(2) != owner
+        assert storage.assets.version() == assets
+
+        seen = {storage.checkouts.version(), storage.checkouts.version(3)}
+        storage.checkouts.delete(first["id"])
+        storage.reset()
+        assert storage.checkouts.version() not in seen
+        assert storage.checkouts.version(3) not in seen
+
+    def test_stats_follow_writes(self, storage):
+        """Счётчики статистики совпадают с пересчётом по всем арендам"""
+        due_at = datetime(2030, 1, 1, 12, tzinfo=timezone.utc)
+        for i in range(6):
+            storage.checkouts.insert(
+                {
+                    **_checkout(i + 1, owner_id=2 + i % 2),
+                    "due_at": due_at + timedelta(i % 3),
+                }
+            )
+        storage.checkouts.transition(1, "active", "overdue")
+        storage.checkouts.transition(2, "active", "returned")
+        storage.checkouts.update(3, {"due_at": due_at + timedelta(days=10)})
+        storage.checkouts.delete(4)
+
+        stats = storage.checkouts.stats()
+        assert stats == _recount(storage.checkouts.list())
+        assert stats["by_status"] == {"active": 3, "overdue": 1, "returned": 1}
+        assert stats["active_by_owner"] == {2: 3, 3: 1}
+
+        storage.reset()
+        assert storage.checkouts.stats() == _recount([])
+
+    def test_active_index_moves_with_asset(self, storage):
+        checkout = storage.checkouts.insert(_checkout(1, owner_id=2))
+        storage.checkouts.update(checkout["id"], {"asset_id": 2})
+        assert not storage.checkouts.has_active(1)
+        assert storage.checkouts.has_active(2)
+
+        storage.checkouts.delete(checkout["id"])
+        assert not storage.checkouts.has_active(2)
+
+    def test_history_does_not_block_asset(self, storage):
+        for _ in range(100):
+            storage.checkouts.insert(_checkout(1, owner_id=2, status="returned"))
+        assert not storage.checkouts.has_active(1)
+
+    def test_delete_keeps_ids_stable(self, storage):
+        """Удаление не перенумеровывает записи и не переиспользует id"""
+        for inv_id in ("INV-001", "INV-002", "INV-003"):
+            storage.assets.insert({"title": inv_id, "inv_id": inv_id})
+
+        deleted = storage.assets.delete(1)
+        assert deleted["inv_id"] == "INV-001"
+        assert [a["id"] for a in storage.assets.list()] == [2, 3]
+        assert storage.assets.get(1) is None
+        assert storage.assets.get(2)["inv_id"] == "INV-002"
+        assert storage.assets.delete(42) is None
+
+        created = storage.assets.insert({"title": "New", "inv_id": "INV-004"})
+        assert created["id"] == 4
+
+    def test_compaction_preserves_data(self):
+        repo = InMemoryStorage().checkouts
+        repo.compact_threshold = 4
+        for asset_id in range(1, 11):
+            repo.insert(_checkout(asset_id, owner_id=asset_id % 2))
+        for checkout_id in range(1, 9):
+            repo.delete(checkout_id)
+
+        assert repo._tombstones < 8
+        assert [c["id"] for c in repo.list()] == [9, 10]
+        assert [c["id"] for c in repo.list_by_owner(0)] == [10]
+        assert repo.has_active(9)
+        assert not repo.has_active(1)
+
+    def test_one_active_checkout_under_threads(self, storage):
+        """Из многих потоков один актив получает ровно одна аренда"""
+
+        def attempt(owner_id):
+            try:
+                return storage.checkouts.insert(_checkout(1, owner_id=owner_id))
+            except DuplicateKeyError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            created = [c for c in pool.map(attempt, range(200)) if c is not None]
+
+        assert len(created) == 1
+        assert storage.checkouts.get_active(1) == created[0]
+        assert len(storage.checkouts) == 1
+
+    def test_reactivation_under_threads(self, storage):
+        """Возврат в active через update тоже не занимает актив дважды"""
+        ids = [
+            storage.checkouts.insert(_checkout(1, owner_id=i, status="returned"))["id"]
+            for i in range(50)
+        ]
+
+        def attempt(checkout_id):
+            try:
+                storage.checkouts.update(checkout_id, {"status": "active"})
+                return checkout_id
+            except DuplicateKeyError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            winners = [i for i in pool.map(attempt, ids) if i is not None]
+
+        assert len(winners) == 1
+        assert storage.checkouts.get_active(1)["id"] == winners[0]
+        assert len(storage.checkouts.query(status="active")) == 1
+
+    def test_different_assets_in_parallel(self, storage):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            created = list(
+                pool.map(
+                    lambda i: storage.checkouts.insert(_checkout(i, i)), range(1, 101)
+                )
+            )
+
+        assert sorted(c["id"] for c in created) == list(range(1, 101))
+        assert all(storage.checkouts.has_active(i) for i in range(1, 101))
+
+
+class TestStorageQueries:
+    """Тесты keyset-пагинации и фильтров по индексам"""
+
+    def test_page_skips_deleted(self, storage):
+        for i in range(1, 8):
+            storage.assets.insert({"title": f"A{i}", "inv_id": f"INV-{i:03}"})
+        storage.assets.delete(3)
+
+        assert [a["id"] for a in storage.assets.page(0, 3)] == [1, 2, 4]
+        assert [a["id"] for a in storage.assets.page(4, 3)] == [5, 6, 7]
+        assert storage.assets.page(7, 3) == []
+
+    def test_inv_id_prefix(self, storage):
+        for inv_id in ("LAP-001", "LAP-002", "PRJ-001", "LAPTOP-9"):
+            storage.assets.insert({"title": inv_id, "inv_id": inv_id})
+
+        found = storage.assets.query(inv_id_prefix="LAP-")
+        assert [a["inv_id"] for a in found] == ["LAP-001", "LAP-002"]
+        assert len(storage.assets.query(inv_id_prefix="LAP", after_id=1)) == 2
+
+    def test_checkout_filters(self, storage):
+        now = datetime.now(timezone.utc)
+        for day in range(1, 7):
+            record = _checkout(asset_id=day % 2 + 1, owner_id=day % 3)
+            record["due_at"] = now + timedelta(days=day)
+            record["status"] = "active" if day > 4 else "returned"
+            storage.checkouts.insert(record)
+
+        returned = storage.checkouts.query(status="returned")
+        assert [c["id"] for c in returned] == [1, 2, 3, 4]
+
+        window = storage.checkouts.query(
+            due_after=now + timedelta(days=2), due_before=now + timedelta(days=5)
+        )
+        assert [c["id"] for c in window] == [2, 3, 4]
+
+        combined = storage.checkouts.query(status="returned", asset_id=2, limit=1)
+        assert [c["id"] for c in combined] == [1]
+        assert [c["id"] for c in storage.checkouts.query(owner_id=1, after_id=1)] == [4]
+
+    def test_filtered_pages_in_id_order(self, storage):
+        """Страницы по статусу и сроку идут по id, даже после смены статуса"""
+        now = datetime.now(timezone.utc)
+        for i in range(1, 21):
+            record = _checkout(asset_id=i, owner_id=1, status="returned")
+            record["due_at"] = now + timedelta(days=21 - i)
+            storage.checkouts.insert(record)
+        for checkout_id in (12, 3, 7):
+            storage.checkouts.update(checkout_id, {"status": "active"})
+        storage.checkouts.update(3, {"status": "returned"})
+
+        def walk(**filters):
+            ids, after_id = [], 0
+            while page := storage.checkouts.query(
+                after_id=after_id, limit=2, **filters
+            ):
+                ids += [c["id"] for c in page]
+                after_id = ids[-1]
+            return ids
+
+        assert walk(status="active") == [7, 12]
+        assert walk(status="returned") == [i for i in range(1, 21) if i not in (7, 12)]
+        wide = {
+            "due_after": now + timedelta(days=2),
+            "due_before": now + timedelta(days=20),
+        }
+        assert walk(**wide) == list(range(2, 20))
+        narrow = {
+            "due_after": now + timedelta(days=5),
+            "due_before": now + timedelta(days=8),
+        }
+        assert walk(**narrow) == [14, 15, 16]
+        assert walk(status="active", **wide) == [7, 12]
+
+
+class TestSQLiteStorage:
+    """Тесты SQLite-хранилища"""
+
+    def test_survives_reopen(self, tmp_path):
+        """Данные переживают перезапуск, id не переиспользуются"""
+        path = str(tmp_path / "app.db")
+        engine = SQLiteStorage(path)
+        engine.assets.insert({"title": "Projector", "inv_id": "INV-001"})
+        engine.assets.insert({"title": "Laptop", "inv_id": "INV-002"})
+        engine.assets.delete(2)
+        engine.close()
+
+        engine = SQLiteStorage(path)
+        assert [a["inv_id"] for a in engine.assets.list()] == ["INV-001"]
+        assert engine.assets.insert({"title": "Camera", "inv_id": "INV-003"})["id"] == 3
+        engine.close()
+
+    def test_stats_backfilled_for_existing_database(self, tmp_path):
+        """Статистика достраивается по уже сохранённым арендам"""
+        path = str(tmp_path / "db.sqlite")
+        engine = SQLiteStorage(path)
+        engine.checkouts.insert(_checkout(1, owner_id=2))
+        engine.checkouts.insert(_checkout(2, owner_id=2, status="returned"))
+        with engine.pool.connection() as conn:
+            conn.executescript(
+                "DROP TABLE checkout_stats;"
+                " DROP TRIGGER checkouts_stats_insert;"
+                " DROP TRIGGER checkouts_stats_update;"
+                " DROP TRIGGER checkouts_stats_delete;"
+            )
+        engine.close()
+
+        engine = SQLiteStorage(path)
+        assert engine.checkouts.stats() == _recount(engine.checkouts.list())
+        engine.checkouts.insert(_checkout(3, owner_id=2))
+        assert engine.checkouts.stats()["active_by_owner"] == {2: 2}
+        engine.close()
+
+    def test_second_active_checkout_rejected(self, tmp_path):
+        """Частичный уникальный индекс не даёт занять актив дважды"""
+        engine = SQLiteStorage(str(tmp_path / "app.db"))
+        engine.checkouts.insert(_checkout(1, owner_id=2))
+        with pytest.raises(DuplicateKeyError):
+            engine.checkouts.insert(_checkout(1, owner_id=3))
+        engine.checkouts.insert(_checkout(1, owner_id=3, status="returned"))
+        engine.close()
+
+    def test_create_storage_from_settings(self, tmp_path):
+        settings = Settings.from_env(
+            {
+                "STORAGE_BACKEND": "sqlite",
+                "SQLITE_PATH": str(tmp_path / "db" / "app.db"),
+            }
+        )
+        engine = create_storage(settings)
+        assert isinstance(engine, SQLiteStorage)
+        engine.close()
+        assert isinstance(create_storage(Settings.from_env({})), InMemoryStorage)
+        engine = create_storage(
+            Settings.from_env(
+                {"STORAGE_BACKEND": "journal", "JOURNAL_DIR": str(tmp_path / "j")}
+            )
+        )
+        assert isinstance(engine, JournaledStorage)
+        engine.close()
+
+    def test_api_on_sqlite(self, tmp_path, monkeypatch, client, admin_headers):
+        engine = SQLiteStorage(str(tmp_path / "app.db"))
+        monkeypatch.setattr("app.main._DB", AsyncStorage(engine))
+
+        response = client.post(
+            "/assets",
+            json={"title": "Projector", "inv_id": "inv-001"},
+            headers=admin_headers,
+        )
+        assert response.status_code == 201
+        assert client.get("/assets").json() == [response.json()]
+        engine.close()
+
+    def test_versions_not_repeated_by_new_file(self, tmp_path):
+        """Новый файл базы не повторяет версии прежнего, повторное открытие — да"""
+
+        def versions(engine):
+            return engine.assets.version(), engine.checkouts.version(2)
+
+        first = SQLiteStorage(str(tmp_path / "a.db"))
+        recreated = SQLiteStorage(str(tmp_path / "b.db"))
+        for engine in (first, recreated):
+            engine.assets.insert({"title": "A", "inv_id": "INV-1"})
+        old, new = versions(first), versions(recreated)
+        assert old[0] != new[0] and old[1] != new[1]
+        recreated.close()
+
+        reopened = SQLiteStorage(str(tmp_path / "b.db"))
+        assert versions(reopened) == new
+        first.close()
+        reopened.close()
+
+    def test_changes_logged_for_every_connection(self, tmp_path):
+        """Лог изменений ведут триггеры: его видят все процессы с тем же файлом"""
+        path = str(tmp_path / "app.db")
+        writer, reader = SQLiteStorage(path), SQLiteStorage(path)
+        _, start = reader.changes.bounds()
+        user = writer.users.insert(_user("A", "a@example.com"))
+        checkout = writer.checkouts.insert(_checkout(1, owner_id=user["id"]))
+        writer.checkouts.transition(checkout["id"], "active", "returned")
+        writer.checkouts.delete(checkout["id"])
+
+        changes = reader.changes.after(start)
+        assert [(c.collection, c.op) for c in changes] == [
+            ("users", "insert"),
+            ("checkouts", "insert"),
+            ("checkouts", "update"),
+            ("checkouts", "delete"),
+        ]
+        assert [c.seq for c in changes] == list(range(start + 1, start + 5))
+        assert "password" not in changes[0].record
+        assert changes[1].record == checkout
+        assert changes[2].record["status"] == "returned"
+        assert changes[3].record["owner_id"] == user["id"]
+        assert reader.changes.after(start, limit=1) == changes[:1]
+        assert reader.changes.bounds()[1] == start + 4
+        writer.close()
+        reader.close()
+
+    def test_changes_retention(self, tmp_path):
+        """Хранятся последние change_log_size изменений, номера не сбрасываются"""
+        path = str(tmp_path / "app.db")
+        engine = SQLiteStorage(path, change_log_size=2)
+        for i in range(1, 5):
+            engine.assets.insert({"title": "A", "inv_id": f"INV-{i}"})
+        oldest, latest = engine.changes.bounds()
+        assert latest - oldest == 1
+        assert [c.record["id"] for c in engine.changes.after(0)] == [3, 4]
+        engine.close()
+
+        engine = SQLiteStorage(path, change_log_size=2)
+        engine.assets.insert({"title": "A", "inv_id": "INV-5"})
+        assert engine.changes.bounds() == (latest, latest + 1)
+        engine.close()
+
+    def test_feed_shared_between_workers(
+        self, tmp_path, monkeypatch, client, admin_headers
+    ):
+        """/changes и /events видят записи другого воркера"""
+        from app.changes import StoredChangeLog
+        from app.events import Broadcaster, tail_changes
+        from app.main import _stored_change
+
+        path = str(tmp_path / "app.db")
+        other, engine = SQLiteStorage(path), SQLiteStorage(path)
+        storage = AsyncStorage(engine)
+        log = StoredChangeLog(storage.changes, _stored_change)
+        monkeypatch.setattr("app.main._DB", storage)
+        monkeypatch.setattr("app.main._CHANGES", log)
+        since = engine.changes.bounds()[1]
+        asset = other.assets.insert({"title": "Projector", "inv_id": "INV-001"})
+
+        feed = client.get("/changes", params={"since": since}, headers=admin_headers)
+        assert feed.json()["changes"] == [
+            {
+                "seq": since + 1,
+                "collection": "assets",
+                "op": "insert",
+                "id": asset["id"],
+                "data": asset,
+            }
+        ]
+        assert client.get("/changes", headers=admin_headers).json()["resync"]
+
+        async def scenario():
+            broadcaster = Broadcaster()
+            subscription = broadcaster.subscribe(lambda change: True)
+            tail = asyncio.create_task(tail_changes(log, broadcaster, 0.01))
+            await asyncio.sleep(0.05)
+            other.assets.update(asset["id"], {"title": "Lamp"})
+            change = await asyncio.wait_for(subscription.queue.get(), 5)
+            tail.cancel()
+            return change
+
+        change = asyncio.run(scenario())
+        assert (change.op, change.id, change.seq) == ("update", asset["id"], since + 2)
+        other.close()
+        engine.close()
+
+
+class TestAsyncStorage:
+    """Тесты асинхронной обёртки над хранилищем"""
+
+    def test_concurrent_writes_offloaded(self, storage):
+        """Параллельные корутины получают разные id и видят все записи"""
+        db = AsyncStorage(storage)
+
+        async def scenario():
+            await asyncio.gather(
+                *(
+                    db.assets.insert({"title": f"Asset {i}", "inv_id": f"INV-{i:03}"})
+                    for i in range(20)
+                )
+            )
+            return await db.assets.page(0, 100), await db.assets.count()
+
+        assets, count = asyncio.run(scenario())
+        assert count == 20
+        assert sorted(a["id"] for a in assets) == list(range(1, 21))
+
+    def test_active_checkout_lookup(self, storage):
+        db = AsyncStorage(storage)
+        storage.checkouts.insert(_checkout(1, owner_id=2))
+
+        async def scenario():
+            return await db.checkouts.has_active(1), await db.checkouts.has_active(2)
+
+        assert asyncio.run(scenario()) == (True, False)
+
+
+def _recount(checkouts):
+    stats = {
+        "by_status": {"active": 0, "overdue": 0, "returned": 0},
+        "total": len(checkouts),
+        "active_by_asset": {},
+        "active_by_owner": {},
+        "due_per_day": {},
+    }
+    for checkout in checkouts:
+        stats["by_status"][checkout["status"]] += 1
+        day = checkout["due_at"].date()
+        stats["due_per_day"][day] = stats["due_per_day"].get(day, 0) + 1
+        if checkout["status"] != "returned":
+            for field in ("asset", "owner"):
+                counts = stats[f"active_by_{field}"]
+                key = checkout[f"{field}_id"]
+                counts[key] = counts.get(key, 0) + 1
+    return stats
+
+
+def _state(engine):
+    return {
+        "users": engine.users.list(),
+        "assets": engine.assets.list(),
+        "checkouts": engine.checkouts.list(),
+        "stats": engine.checkouts.stats(),
+    }
+
+
+class TestJournaledStorage:
+    """Тесты журнала операций и снимков in-memory хранилища"""
+
+    def _fill(self, engine):
+        engine.users.insert(_user("A", "a@example.com"))
+        for i in range(1, 6):
+            engine.assets.insert({"title": f"Asset {i}", "inv_id": f"INV-00{i}"})
+        engine.checkouts.insert(_checkout(1, owner_id=1))
+        engine.checkouts.insert(_checkout(2, owner_id=1))
+        engine.checkouts.update(1, {"status": "returned"})
+        engine.assets.update(3, {"title": "Camera"})
+        engine.assets.delete(5)
+
+    def test_recovers_after_restart(self, tmp_path):
+        """После перезапуска состояние и индексы восстанавливаются из журнала"""
+        path = str(tmp_path / "journal")
+        engine = JournaledStorage(path)
+        self._fill(engine)
+        expected = _state(engine)
+        engine.close()
+
+        engine = JournaledStorage(path)
+        assert _state(engine) == expected
+        assert engine.users.get_by_email("A@example.com")["id"] == 1
+        assert engine.checkouts.get_active(2)["id"] == 2
+        assert not engine.checkouts.has_active(1)
+        assert [a["id"] for a in engine.assets.query(inv_id_prefix="INV-00")] == [
+            1,
+            2,
+            3,
+            4,
+        ]
+        assert engine.assets.insert({"title": "New", "inv_id": "INV-006"})["id"] == 6
+        engine.close()
+
+    def test_snapshot_drops_old_segments(self, tmp_path):
+        """Снимок заменяет старые сегменты журнала, новые записи дописываются"""
+        path = tmp_path / "journal"
+        engine = JournaledStorage(str(path), snapshot_every=4)
+        self._fill(engine)
+        engine.snapshot()
+        engine.assets.insert({"title": "After", "inv_id": "INV-007"})
+        expected = _state(engine)
+        engine.close()
+
+        assert (path / "snapshot.ndjson").exists()
+        assert len(list(path.glob("log.*"))) == 1
+
+        engine = JournaledStorage(str(path))
+        assert _state(engine) == expected
+        assert engine.assets.insert({"title": "Next", "inv_id": "INV-008"})["id"] == 7
+        engine.close()
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        """Недописанная последняя строка журнала не мешает восстановлению"""
+        path = tmp_path / "journal"
+        engine = JournaledStorage(str(path))
+        engine.assets.insert({"title": "Projector", "inv_id": "INV-001"})
+        engine.close()
+        with open(sorted(path.glob("log.*"))[-1], "ab") as file:
+            file.write(b'["assets","insert",2,{"tit')
+
+        engine = JournaledStorage(str(path))
+        assert [a["inv_id"] for a in engine.assets.list()] == ["INV-001"]
+        engine.close()
+
+    def test_sync_makes_writes_durable(self, tmp_path):
+        path = tmp_path / "journal"
+        engine = JournaledStorage(str(path), commit_interval=60)
+        engine.assets.insert({"title": "Projector", "inv_id": "INV-001"})
+        engine.sync()
+
+        (segment,) = path.glob("log.*")
+        assert b"INV-001" in segment.read_bytes()
+        engine.close()
+
+    def test_reset_is_journaled(self, tmp_path):
+        path = str(tmp_path / "journal")
+        engine = JournaledStorage(path)
+        self._fill(engine)
+        engine.reset()
+        engine.assets.insert({"title": "Fresh", "inv_id": "INV-001"})
+        engine.close()
+
+        engine = JournaledStorage(path)
+        assert [(a["id"], a["title"]) for a in engine.assets.list()] == [(1, "Fresh")]
+        assert engine.users.list() == []
+        engine.close()
@@ -0,0 +1,55 @@
+import asyncio
+
+from app.tokens import TokenAuthenticator, TokenSigner
+
+
+class TestTokens:
+    """Тесты подписанных токенов и кэша проверенных токенов"""
+
+    signer = TokenSigner(b"secret", ttl=60)
+
+    def test_sign_and_verify(self):
+        token = self.signer.issue(5, "admin", now=1000)
+        claims = self.signer.verify(token, now=1059)
+        assert (claims.user_id, claims.role, claims.expires_at) == (5, "admin", 1060)
+        assert self.signer.verify(token, now=1060) is None
+        assert TokenSigner(b"other", ttl=60).verify(token, now=1000) is None
+
+    def test_tampered_token_rejected(self):
+        token = self.signer.issue(5, "student", now=1000)
+        forged = self.signer.issue(5, "admin", now=1000).split(".")[0]
+        assert self.signer.verify(f"{forged}.{token.split('.')[1]}", 1000) is None
+        for garbage in ("", "abc", "a.b.c", "!!.!!"):
+            assert self.signer.verify(garbage, 1000) is None
+
+    def _authenticator(self, users, cache_size=10):
+        lookups = []
+
+        async def lookup(user_id):
+            lookups.append(user_id)
+            return users.get(user_id)
+
+        return TokenAuthenticator(self.signer, lookup, cache_size, 30.0), lookups
+
+    def test_verified_tokens_cached(self):
+        """Повторный запрос с тем же токеном не проверяет подпись и пользователя"""
+        users = {1: {"role": "admin"}, 2: {"role": "student"}}
+        auth, lookups = self._authenticator(users, cache_size=1)
+        first, second = self.signer.issue(1, "admin"), self.signer.issue(2, "student")
+
+        async def scenario():
+            return [await auth.authenticate(token) for token in (first, first, second)]
+
+        claims = asyncio.run(scenario())
+        assert [c.user_id for c in claims] == [1, 1, 2]
+        assert lookups == [1, 2]
+        assert (auth.hits, auth.misses, len(auth)) == (1, 2, 1)
+
+        auth.forget_user(2)
+        assert len(auth) == 0
+
+    def test_role_must_match_user(self):
+        auth, _ = self._authenticator({1: {"role": "student"}})
+        token = self.signer.issue(1, "admin")
+        assert asyncio.run(auth.authenticate(token)) is None
+        assert len(auth) == 0